@@ -13,7 +13,7 @@
 # limitations under the License.
 
 from collections import namedtuple
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from enum import Enum, auto
 from pathlib import Path
 
@@ -21,11 +21,25 @@ import yaml
 
 ScoreWeights = namedtuple("ScoreWeights", ["flags", "tools"], defaults=[0.5, 0.5])
 
-# SAST tool configuration
+# SAST tool configuration (timeout in seconds and memory limit in MB, 0 = unlimited; sharding: run one process per
+# partition of the source files or, for CodeQL, per batch of queries)
 SASTToolConfig = namedtuple(
-    "SASTToolConfig", ["sanity_checks", "path", "checks", "num_threads"], defaults=["", "", "", -1]
+    "SASTToolConfig",
+    ["sanity_checks", "path", "checks", "num_threads", "timeout", "memory_limit", "sharding"],
+    defaults=["", "", "", -1, 0, 0, False],
 )
 
+# Cache configuration (max. result cache size in MB, max. age of unused tool workspaces and setup artifacts in days)
+CacheConfig = namedtuple(
+    "CacheConfig",
+    ["dir", "max_size", "workspace_max_age"],
+    defaults=[Path.home() / ".cache" / "sast-fuzz" / "sfa", 2048, 7],
+)
+
+# Resource configuration (number of CPU cores shared by the SAST tools, 0 = all available cores; memory shared by the
+# SAST tools in MB, 0 = physical memory)
+ResourceConfig = namedtuple("ResourceConfig", ["cpu_budget", "memory_budget"], defaults=[0, 0])
+
 
 @dataclass
 class AppConfig:
@@ -41,6 +55,9 @@ class AppConfig:
     codeql: SASTToolConfig
     clang_scan: SASTToolConfig
 
+    cache: CacheConfig = field(default_factory=CacheConfig)
+    resources: ResourceConfig = field(default_factory=ResourceConfig)
+
     @classmethod
     def from_yaml(cls, file: Path) -> "AppConfig":
         """
@@ -56,6 +73,10 @@ class AppConfig:
             for check in config["tools"]["codeql"]["checks"]
         ]
 
+        # The cache section is optional; missing entries fall back to the defaults
+        cache_config = config.get("cache") or {}
+        resource_config = config.get("resources") or {}
+
         return cls(
             ScoreWeights(config["scoring"]["weights"]["flags"], config["scoring"]["weights"]["tools"]),
             flawfinder=SASTToolConfig(
@@ -63,29 +84,51 @@ class AppConfig:
                 config["tools"]["flawfinder"]["path"],
                 config["tools"]["flawfinder"]["checks"],
                 -1,
+                config["tools"]["flawfinder"].get("timeout", 0),
+                config["tools"]["flawfinder"].get("memory_limit", 0),
+                config["tools"]["flawfinder"].get("sharding", False),
             ),
             semgrep=SASTToolConfig(
                 config["tools"]["semgrep"]["sanity_checks"],
                 config["tools"]["semgrep"]["path"],
                 config["tools"]["semgrep"]["checks"],
                 config["tools"]["semgrep"]["num_threads"],
+                config["tools"]["semgrep"].get("timeout", 0),
+                config["tools"]["semgrep"].get("memory_limit", 0),
+                config["tools"]["semgrep"].get("sharding", False),
             ),
             infer=SASTToolConfig(
                 config["tools"]["infer"]["sanity_checks"],
                 config["tools"]["infer"]["path"],
                 config["tools"]["infer"]["checks"],
                 config["tools"]["infer"]["num_threads"],
+                config["tools"]["infer"].get("timeout", 0),
+                config["tools"]["infer"].get("memory_limit", 0),
             ),
             codeql=SASTToolConfig(
                 config["tools"]["codeql"]["sanity_checks"],
                 config["tools"]["codeql"]["path"],
                 codeql_checks,
                 config["tools"]["codeql"]["num_threads"],
+                config["tools"]["codeql"].get("timeout", 0),
+                config["tools"]["codeql"].get("memory_limit", 0),
+                config["tools"]["codeql"].get("sharding", False),
             ),
             clang_scan=SASTToolConfig(
                 config["tools"]["clang_scan"]["sanity_checks"],
                 config["tools"]["clang_scan"]["path"],
                 config["tools"]["clang_scan"]["checks"],
                 -1,
+                config["tools"]["clang_scan"].get("timeout", 0),
+                config["tools"]["clang_scan"].get("memory_limit", 0),
+            ),
+            cache=CacheConfig(
+                Path(cache_config.get("dir", CacheConfig().dir)).expanduser(),
+                cache_config.get("max_size", CacheConfig().max_size),
+                cache_config.get("workspace_max_age", CacheConfig().workspace_max_age),
+            ),
+            resources=ResourceConfig(
+                resource_config.get("cpu_budget", ResourceConfig().cpu_budget),
+                resource_config.get("memory_budget", ResourceConfig().memory_budget),
             ),
         )
@@ -13,13 +13,18 @@
 # limitations under the License.
 
 import os
+from array import array
 from collections import namedtuple
+from itertools import groupby, islice
 from pathlib import Path
-from typing import Generator, Optional, Set, Union
+from typing import Dict, Generator, Iterable, Iterator, List, Optional, Set, Tuple, Union
 
 # CSV separator
 CSV_SEP: str = ","
 
+# Number of CSV lines written at once
+CSV_CHUNK_SIZE: int = 10_000
+
 # SAST flag
 SASTFlag = namedtuple("SASTFlag", ["tool", "file", "line", "vuln"])
 
@@ -44,6 +49,86 @@ def div(a: Union[int, float], b: Union[int, float]) -> float:
     return 0 if b == 0 else (a / b)
 
 
+def parse_flag(line: str) -> Optional[SASTFlagType]:
+    """
+    Parse a single SAST flag from a CSV line.
+
+    :param line:
+    :return: SAST flag or None if the line is neither a regular nor a grouped SAST flag
+    """
+    vals = line.strip().split(CSV_SEP)
+
+    if len(vals) == 4:  # Regular SAST flag
+        return SASTFlag(vals[0], vals[1], int(vals[2]), vals[3])
+
+    if len(vals) == 9:  # Grouped SAST flag
+        return GroupedSASTFlag(
+            vals[0],
+            vals[1],
+            int(vals[2]),
+            vals[3],
+            int(vals[4]),
+            int(vals[5]),
+            int(vals[6]),
+            int(vals[7]),
+            float(vals[8]),
+        )
+
+    return None
+
+
+def read_flags_csv(file: Path) -> Iterator[SASTFlagType]:
+    """
+    Lazily read SAST flags from a CSV file, one line at a time.
+
+    :param file:
+    :return:
+    """
+    with file.open("r") as csv_file:
+        for line in csv_file:
+            flag = parse_flag(line)
+
+            if flag is not None:
+                yield flag
+
+
+def write_flags_csv(flags: Iterable[SASTFlagType], file: Path, chunk_size: int = CSV_CHUNK_SIZE) -> None:
+    """
+    Write SAST flags to a CSV file in chunks of lines.
+
+    :param flags:
+    :param file:
+    :param chunk_size: Number of lines written at once
+    :return:
+    """
+    with file.open("w+") as csv_file:
+        lines = []
+
+        for flag in flags:
+            lines.append(CSV_SEP.join(map(str, flag)) + os.linesep)
+
+            if len(lines) == chunk_size:
+                csv_file.writelines(lines)
+                lines.clear()
+
+        csv_file.writelines(lines)
+
+
+def unique_flags(flags: Iterable[SASTFlagType]) -> Iterator[SASTFlagType]:
+    """
+    Lazily drop duplicate SAST flags.
+
+    :param flags:
+    :return:
+    """
+    seen: Set[SASTFlagType] = set()
+
+    for flag in flags:
+        if flag not in seen:
+            seen.add(flag)
+            yield flag
+
+
 class SASTFlags:
     """
     SAST flag container.
@@ -86,9 +171,7 @@ class SASTFlags:
         :param file:
         :return:
         """
-        with file.open("w+") as csv_file:
-            for flag in self._flags:
-                csv_file.write(CSV_SEP.join(map(str, flag)) + os.linesep)
+        write_flags_csv(self._flags, file)
 
     @classmethod
     def from_csv(cls, file: Path) -> "SASTFlags":
@@ -98,33 +181,12 @@ class SASTFlags:
         :param file:
         :return:
         """
-        flags = SASTFlags()
-
-        with file.open("r") as csv_file:
-            for line in csv_file:
-                vals = line.strip().split(CSV_SEP)
-
-                if len(vals) == 4:  # Regular SAST flag
-                    flags.add(SASTFlag(vals[0], vals[1], int(vals[2]), vals[3]))
-
-                if len(vals) == 9:  # Grouped SAST flag
-                    flags.add(
-                        GroupedSASTFlag(
-                            vals[0],
-                            vals[1],
-                            int(vals[2]),
-                            vals[3],
-                            int(vals[4]),
-                            int(vals[5]),
-                            int(vals[6]),
-                            int(vals[7]),
-                            float(vals[8]),
-                        )
-                    )
-
-        return flags
+        return SASTFlags(set(read_flags_csv(file)))
 
     def __eq__(self, other: object) -> bool:
+        if isinstance(other, ColumnarSASTFlags):
+            return other == self
+
         return False if not isinstance(other, SASTFlags) else self._flags == other._flags
 
     def __iter__(self) -> Generator[SASTFlagType, None, None]:
@@ -133,3 +195,249 @@ class SASTFlags:
 
     def __len__(self) -> int:
         return len(self._flags)
+
+
+class ColumnarSASTFlags:
+    """
+    Columnar SAST flag container with the same interface as 'SASTFlags'.
+
+    Instead of one tuple object per flag, the flags are stored as integer/float columns ('array' module). The string
+    fields (tool, file, vuln) are dictionary-encoded, i.e., each distinct string is stored once and referenced by its
+    code. New rows are appended as they are, and the duplicates are dropped in bulk once the container is read: the
+    rows are sorted over all columns, so that duplicates become neighbors.
+
+    The container takes far less memory than 'SASTFlags' (about a quarter), but adding and iterating flags is slower,
+    as each flag is encoded/decoded in Python.
+    """
+
+    # Columns (the last five ones are only set for grouped SAST flags); the string fields are dictionary-encoded
+    _COLUMNS: Tuple[str, ...] = (
+        "grouped",
+        "tool",
+        "file",
+        "line",
+        "vuln",
+        "n_flg_lines",
+        "n_all_lines",
+        "n_run_tools",
+        "n_all_tools",
+        "score",
+    )
+
+    # Dictionary-encoded columns
+    _STRING_COLUMNS: Tuple[str, ...] = ("tool", "file", "vuln")
+
+    def __init__(self, flags: Optional[Iterable[SASTFlagType]] = None) -> None:
+        self._strings: List[str] = []
+        self._string_codes: Dict[str, int] = {}
+
+        self._cols: List[array] = self._empty_columns()
+
+        # Number of leading rows that are sorted and unique (see '_compact')
+        self._n_compact = 0
+
+        if flags is not None:
+            self._extend(map(self._encoded, flags))  # type: ignore
+
+    @classmethod
+    def _empty_columns(cls) -> List[array]:
+        return [array("d" if name == "score" else "q") for name in cls._COLUMNS]
+
+    def _encode(self, string: str) -> int:
+        code = self._string_codes.get(string)
+
+        if code is None:
+            code = len(self._strings)
+            self._string_codes[string] = code
+            self._strings.append(string)
+
+        return code
+
+    def _encoded(self, flag: SASTFlagType, encode: bool = True) -> Optional[Tuple]:
+        """
+        Encode a SAST flag into a row.
+
+        :param flag:
+        :param encode: If false, unknown strings are not added to the dictionary
+        :return: Row or None if a string is unknown
+        """
+        if encode:
+            tool, file, vuln = self._encode(flag.tool), self._encode(flag.file), self._encode(flag.vuln)
+        else:
+            tool, file, vuln = (self._string_codes.get(string, -1) for string in (flag.tool, flag.file, flag.vuln))
+
+            if -1 in (tool, file, vuln):
+                return None
+
+        if isinstance(flag, GroupedSASTFlag):
+            # Adding 0.0 turns -0.0 into 0.0 (which are equal)
+            return (1, tool, file, flag.line, vuln, *flag[4:8], flag.score + 0.0)
+
+        return (0, tool, file, flag.line, vuln, 0, 0, 0, 0, 0.0)
+
+    def _extend(self, rows: Iterable[Tuple]) -> None:
+        """
+        Append rows, column by column in chunks of rows.
+
+        :param rows:
+        :return:
+        """
+        rows = iter(rows)
+
+        while True:
+            chunk = list(islice(rows, CSV_CHUNK_SIZE))
+
+            if len(chunk) == 0:
+                return
+
+            for col, vals in zip(self._cols, zip(*chunk)):
+                col.extend(vals)
+
+    def _compact(self) -> None:
+        """
+        Sort the rows over all columns and drop the duplicates (if rows were added since the last compaction).
+
+        :return:
+        """
+        if self._n_compact == len(self._cols[0]):
+            return
+
+        rows = (row for row, _ in groupby(sorted(zip(*self._cols))))
+
+        self._cols = self._empty_columns()
+        self._extend(rows)
+
+        self._n_compact = len(self._cols[0])
+
+    def _row(self, i: int) -> Tuple:
+        return tuple(col[i] for col in self._cols)
+
+    def _find(self, row: Tuple) -> int:
+        """
+        Find a row (binary search over the compacted rows).
+
+        :param row:
+        :return: Row index or -1 if the row is not stored
+        """
+        self._compact()
+
+        lo, hi = 0, len(self._cols[0])
+
+        while lo < hi:
+            mid = (lo + hi) // 2
+
+            if self._row(mid) < row:
+                lo = mid + 1
+            else:
+                hi = mid
+
+        return lo if lo < len(self._cols[0]) and self._row(lo) == row else -1
+
+    def _decode(self, row: Tuple) -> SASTFlagType:
+        grouped, tool, file, line, vuln, n_flg_lines, n_all_lines, n_run_tools, n_all_tools, score = row
+
+        if grouped:
+            return GroupedSASTFlag(
+                self._strings[tool],
+                self._strings[file],
+                line,
+                self._strings[vuln],
+                n_flg_lines,
+                n_all_lines,
+                n_run_tools,
+                n_all_tools,
+                score,
+            )
+
+        return SASTFlag(self._strings[tool], self._strings[file], line, self._strings[vuln])
+
+    def add(self, flag: SASTFlagType) -> None:
+        """
+        Add a single SAST flag.
+
+        :param flag:
+        :return:
+        """
+        for col, val in zip(self._cols, self._encoded(flag)):  # type: ignore
+            col.append(val)
+
+    def update(self, *var_flags: Union["SASTFlags", "ColumnarSASTFlags"]) -> None:
+        """
+        Add multiple SAST flags.
+
+        :param var_flags:
+        :return:
+        """
+        for flags in var_flags:
+            if isinstance(flags, ColumnarSASTFlags):
+                # The columns are appended as a whole, with the string codes of the other container re-mapped
+                codes = [self._encode(string) for string in flags._strings]
+
+                for name, col, other_col in zip(self._COLUMNS, self._cols, flags._cols):
+                    col.extend(
+                        array("q", map(codes.__getitem__, other_col)) if name in self._STRING_COLUMNS else other_col
+                    )
+            else:
+                self._extend(map(self._encoded, flags))  # type: ignore
+
+    def remove(self, flag: SASTFlagType) -> None:
+        """
+        Remove a single SAST flag.
+
+        :param flag:
+        :return:
+        """
+        row = self._encoded(flag, encode=False)
+        i = -1 if row is None else self._find(row)
+
+        if i == -1:
+            raise KeyError(flag)
+
+        for col in self._cols:
+            del col[i]
+
+        self._n_compact -= 1
+
+    def __contains__(self, flag: object) -> bool:
+        if not isinstance(flag, (SASTFlag, GroupedSASTFlag)):
+            return False
+
+        row = self._encoded(flag, encode=False)
+
+        return row is not None and self._find(row) != -1
+
+    def to_csv(self, file: Path) -> None:
+        """
+        Write SAST flags to a CSV file.
+
+        :param file:
+        :return:
+        """
+        write_flags_csv(self, file)
+
+    @classmethod
+    def from_csv(cls, file: Path) -> "ColumnarSASTFlags":
+        """
+        Read SAST flags from a CSV file.
+
+        :param file:
+        :return:
+        """
+        return ColumnarSASTFlags(read_flags_csv(file))
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, (SASTFlags, ColumnarSASTFlags)):
+            return False
+
+        return len(self) == len(other) and set(self) == set(other)
+
+    def __iter__(self) -> Generator[SASTFlagType, None, None]:
+        self._compact()
+
+        for row in zip(*self._cols):
+            yield self._decode(row)
+
+    def __len__(self) -> int:
+        self._compact()
+
+        return len(self._cols[0])
@@ -14,7 +14,7 @@
 
 from abc import ABC, abstractmethod
 from enum import Enum
-from typing import Any, Dict, Iterable
+from typing import Any, Callable, Dict, Iterable
 
 from sfa import SASTToolConfig
 from sfa.analysis.filter import ReachabilityFilter
@@ -52,20 +52,24 @@ class SASTFlagGroupingMode(Enum):
 
 class Factory(ABC):
     """
-    Abstract factory.
+    Abstract factory. Instances are only created for the requested keys, on first access, and then reused.
     """
 
     @abstractmethod
-    def _create_instances(self, param: Any) -> Dict:
+    def _create_instance(self, key: Any, param: Any) -> Any:
         pass
 
     def __init__(self, param: Any) -> None:
-        if param is None:
-            self._instances = {}
-        else:
-            self._instances = self._create_instances(param)
+        self._param = param
+        self._instances: Dict = {}
 
     def get_instance(self, key: Any) -> Any:
+        if key not in self._instances:
+            if self._param is None:
+                raise KeyError(key)
+
+            self._instances[key] = self._create_instance(key, self._param)
+
         return self._instances[key]
 
     def get_instances(self, keys: Iterable) -> Iterable:
@@ -77,17 +81,21 @@ class SASTToolRunnerFactory(Factory):
     SAST tool runner factory.
     """
 
-    def _create_instances(self, param: Any) -> Dict:
-        subject_dir, app_config = param
-        return {
-            SASTTool.FLF: FlawfinderRunner(subject_dir, app_config.flawfinder),
-            SASTTool.SGR: SemgrepRunner(subject_dir, app_config.semgrep),
-            SASTTool.IFR: InferRunner(subject_dir, app_config.infer),
-            SASTTool.CQL: CodeQLRunner(subject_dir, app_config.codeql),
-            SASTTool.CLS: ClangScanRunner(subject_dir, app_config.clang_scan),
-            SASTTool.ASN: AddressSanitizerRunner(subject_dir, SASTToolConfig()),
-            SASTTool.MSN: MemorySanitizerRunner(subject_dir, SASTToolConfig()),
+    def _create_instance(self, key: Any, param: Any) -> Any:
+        subject_dir, app_config, result_cache, workspace_root, build_dir, cpu_budget, artifact_root, prepared_dir = (
+            param
+        )
+        options = (result_cache, workspace_root, build_dir, cpu_budget, artifact_root, prepared_dir)
+        constructors: Dict[SASTTool, Callable] = {
+            SASTTool.FLF: lambda: FlawfinderRunner(subject_dir, app_config.flawfinder, *options),
+            SASTTool.SGR: lambda: SemgrepRunner(subject_dir, app_config.semgrep, *options),
+            SASTTool.IFR: lambda: InferRunner(subject_dir, app_config.infer, *options),
+            SASTTool.CQL: lambda: CodeQLRunner(subject_dir, app_config.codeql, *options),
+            SASTTool.CLS: lambda: ClangScanRunner(subject_dir, app_config.clang_scan, *options),
+            SASTTool.ASN: lambda: AddressSanitizerRunner(subject_dir, SASTToolConfig(), *options),
+            SASTTool.MSN: lambda: MemorySanitizerRunner(subject_dir, SASTToolConfig(), *options),
         }
+        return constructors[key]()
 
 
 class SASTFlagFilterFactory(Factory):
@@ -95,8 +103,9 @@ class SASTFlagFilterFactory(Factory):
     SAST flag filter factory.
     """
 
-    def _create_instances(self, param: Any) -> Dict:
-        return {SASTFlagFilterMode.REH: ReachabilityFilter(param)}
+    def _create_instance(self, key: Any, param: Any) -> Any:
+        constructors: Dict[SASTFlagFilterMode, Callable] = {SASTFlagFilterMode.REH: lambda: ReachabilityFilter(param)}
+        return constructors[key]()
 
 
 class SASTFlagGroupingFactory(Factory):
@@ -104,10 +113,11 @@ class SASTFlagGroupingFactory(Factory):
     SAST flag grouping factory.
     """
 
-    def _create_instances(self, param: Any) -> Dict:
+    def _create_instance(self, key: Any, param: Any) -> Any:
         inspec_file, app_config = param
-        return {
-            SASTFlagGroupingMode.BASIC_BLOCK: BasicBlockGrouping(inspec_file, app_config.score_weights),
-            SASTFlagGroupingMode.BASIC_BLOCK_V2: BasicBlockV2Grouping(inspec_file, app_config.score_weights),
-            SASTFlagGroupingMode.FUNCTION: FunctionGrouping(inspec_file, app_config.score_weights),
+        constructors: Dict[SASTFlagGroupingMode, Callable] = {
+            SASTFlagGroupingMode.BASIC_BLOCK: lambda: BasicBlockGrouping(inspec_file, app_config.score_weights),
+            SASTFlagGroupingMode.BASIC_BLOCK_V2: lambda: BasicBlockV2Grouping(inspec_file, app_config.score_weights),
+            SASTFlagGroupingMode.FUNCTION: lambda: FunctionGrouping(inspec_file, app_config.score_weights),
         }
+        return constructors[key]()
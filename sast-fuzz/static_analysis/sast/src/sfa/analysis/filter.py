@@ -12,14 +12,13 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-import json
 from abc import ABC, abstractmethod
 from collections import defaultdict
-from functools import lru_cache
 from pathlib import Path
-from typing import Dict, List
+from typing import Dict, Iterable, Iterator, List, Set
 
-from sfa.analysis import SASTFlags
+from sfa.analysis import SASTFlags, SASTFlagType
+from sfa.analysis.inspection import load_inspection
 
 
 class SASTFlagFilter(ABC):
@@ -40,6 +39,15 @@ class SASTFlagFilter(ABC):
         """
         pass
 
+    def filter_iter(self, flags: Iterable[SASTFlagType]) -> Iterator[SASTFlagType]:
+        """
+        Lazily filter out certain SAST flags.
+
+        :param flags:
+        :return:
+        """
+        return iter(self.filter(SASTFlags(set(flags))))
+
 
 class ReachabilityFilter(SASTFlagFilter):
     """
@@ -48,35 +56,34 @@ class ReachabilityFilter(SASTFlagFilter):
 
     def __init__(self, inspec_file: Path) -> None:
         super().__init__(inspec_file)
-        self._reachable_code: Dict[str, List[Dict]] = defaultdict(list)
 
-        data = json.loads(inspec_file.read_text())
+        self._reachable_code = load_inspection(inspec_file).reachable_code
 
-        for func in data["functions"]:
-            if func["location"]["reachable_from_main"]:
-                self._reachable_code[func["location"]["filename"]].append(func["location"]["line"])
-
-    @lru_cache(maxsize=None)
-    def _is_reachable(self, file: str, line: int) -> bool:
+    def filter(self, flags: SASTFlags) -> SASTFlags:
         """
-        Check if a code location is reachable from the main function.
+        Filter out SAST flags unreachable from the main function.
 
-        :param file:
-        :param line:
+        :param flags:
         :return:
         """
-        if file in self._reachable_code.keys():
-            for line_range in self._reachable_code[file]:
-                if line_range["start"] <= line <= line_range["end"]:
-                    return True
+        flags_per_file: Dict[str, List[SASTFlagType]] = defaultdict(list)
 
-        return False
+        for flag in flags:
+            flags_per_file[flag.file].append(flag)
 
-    def filter(self, flags: SASTFlags) -> SASTFlags:
+        reachable_flags: Set[SASTFlagType] = set()
+
+        for file, file_flags in flags_per_file.items():
+            reachable_lines = self._reachable_code.contains_all(file, (flag.line for flag in file_flags))
+            reachable_flags.update(flag for flag in file_flags if flag.line in reachable_lines)
+
+        return SASTFlags(reachable_flags)
+
+    def filter_iter(self, flags: Iterable[SASTFlagType]) -> Iterator[SASTFlagType]:
         """
-        Filter out SAST flags unreachable from the main function.
+        Lazily filter out SAST flags unreachable from the main function.
 
         :param flags:
         :return:
         """
-        return SASTFlags(set(filter(lambda flag: self._is_reachable(flag.file, flag.line), flags)))
+        return (flag for flag in flags if self._reachable_code.contains(flag.file, flag.line))
@@ -12,14 +12,17 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-import json
 from abc import ABC, abstractmethod
+from array import array
 from collections import defaultdict, namedtuple
+from dataclasses import dataclass, field
+from enum import Enum, auto
 from pathlib import Path
-from typing import Dict, List, Tuple
+from typing import ClassVar, Dict, FrozenSet, Hashable, Iterable, List, Mapping, Sequence, Set, Tuple, TypeVar
 
 from sfa import ScoreWeights
-from sfa.analysis import GroupedSASTFlag, SASTFlags, div
+from sfa.analysis import GroupedSASTFlag, SASTFlags, SASTFlagType, div
+from sfa.analysis.inspection import CodeBlockInfo, InspectionModel, load_inspection
 
 # Decimal precision of the vulnerability scores
 SCORE_PRECISION = 3
@@ -27,8 +30,151 @@ SCORE_PRECISION = 3
 # Character to concatenate values
 CONCAT_CHAR = "-"
 
-# Container for code block information
-CodeBlockInfo = namedtuple("CodeBlockInfo", ["file", "line_start", "line_end", "n_lines"])
+# Group key type
+K = TypeVar("K", bound=Hashable)
+
+# Scoring result of a group of SAST flags
+GroupScore = namedtuple("GroupScore", ["n_flg_lines", "n_run_tools", "score"])
+
+# Number of bits of the (group-local) value in a packed (group, value) pair
+PAIR_VALUE_BITS: int = 32
+
+
+def _count_distinct(pairs: array, n_groups: int) -> List[int]:
+    """
+    Count the distinct values per group. The packed (group, value) pairs are sorted, so that the equal pairs are
+    adjacent and the distinct ones can be counted in one pass (run-length reduction).
+
+    :param pairs: Packed (group, value) pairs
+    :param n_groups:
+    :return: Number of distinct values per group
+    """
+    counts = [0] * n_groups
+    prev_pair = None
+
+    for pair in sorted(pairs):
+        if pair != prev_pair:
+            counts[pair >> PAIR_VALUE_BITS] += 1
+            prev_pair = pair
+
+    return counts
+
+
+def score_groups(
+    groups: Mapping[K, Iterable[SASTFlagType]], n_all_lines: Mapping[K, int], n_all_tools: int, weights: ScoreWeights
+) -> Dict[K, GroupScore]:
+    """
+    Score all groups of SAST flags at once. This is the scoring engine shared by all grouping modes: the flags of all
+    groups are integer-coded into (group, tool) and (group, line) pairs, from which the number of distinct tools and
+    flagged lines of each group are counted in bulk (see '_count_distinct').
+
+    :param groups: Group -> SAST flags of the group
+    :param n_all_lines: Group -> number of lines of the group's code block
+    :param n_all_tools: Number of all SAST tools
+    :param weights: Score weights
+    :return: Group -> #flagged lines, #tools, and vulnerability score
+    """
+    tool_codes: Dict[str, int] = {}
+    value_mask = (1 << PAIR_VALUE_BITS) - 1
+
+    tool_pairs = array("q")
+    line_pairs = array("q")
+
+    for i, flags in enumerate(groups.values()):
+        for flag in flags:
+            tool_pairs.append((i << PAIR_VALUE_BITS) | tool_codes.setdefault(flag.tool, len(tool_codes)))
+            line_pairs.append((i << PAIR_VALUE_BITS) | (flag.line & value_mask))
+
+    n_run_tools = _count_distinct(tool_pairs, len(groups))
+    n_flg_lines = _count_distinct(line_pairs, len(groups))
+
+    scores: Dict[K, GroupScore] = {}
+
+    for i, key in enumerate(groups):
+        r_flg_lines = div(n_flg_lines[i], n_all_lines[key])
+        r_run_tools = div(n_run_tools[i], n_all_tools)
+
+        # Calculate the vulnerability score
+        score = round((weights.flags * r_flg_lines) + (weights.tools * r_run_tools), SCORE_PRECISION)
+
+        scores[key] = GroupScore(n_flg_lines[i], n_run_tools[i], score)
+
+    return scores
+
+
+def group_labels(flags: Iterable[SASTFlagType]) -> Tuple[str, str]:
+    """
+    Get the labels of a group of SAST flags, i.e., its tools and vulnerabilities (with their lines).
+
+    :param flags:
+    :return: Tools and vulnerabilities
+    """
+    return CONCAT_CHAR.join({flag.tool for flag in flags}), CONCAT_CHAR.join(
+        {f"{flag.vuln}:{flag.line}" for flag in flags}
+    )
+
+
+class Resolution(Enum):
+    """
+    Code granularity a SAST flag is resolved to.
+    """
+
+    BASIC_BLOCK = auto()  # First basic block containing the flag
+    FUNCTION = auto()  # First function containing the flag
+    FUNCTION_BLOCKS = auto()  # First function containing the flag + all of its basic blocks containing the flag
+
+
+@dataclass
+class FlagAssignment:
+    """
+    Assignment of SAST flags to the code blocks containing them.
+    """
+
+    n_tools: int = 0
+    flags_per_bb: Dict[int, Set[SASTFlagType]] = field(default_factory=lambda: defaultdict(set))
+    flags_per_func: Dict[str, Set[SASTFlagType]] = field(default_factory=lambda: defaultdict(set))
+    flagged_blocks: Dict[str, Set[CodeBlockInfo]] = field(default_factory=lambda: defaultdict(set))
+
+
+def assign_flags(
+    model: InspectionModel, flags: Iterable[SASTFlagType], resolutions: Iterable[Resolution]
+) -> FlagAssignment:
+    """
+    Resolve each SAST flag (once) to the code blocks of the requested granularities.
+
+    :param model: Inspection model
+    :param flags:
+    :param resolutions: Code granularities to resolve the flags to
+    :return:
+    """
+    resolutions = set(resolutions)
+
+    assignment = FlagAssignment()
+    all_tools: Set[str] = set()
+
+    for flag in flags:
+        all_tools.add(flag.tool)
+
+        if Resolution.BASIC_BLOCK in resolutions:
+            bb_id = model.basic_block_index.find(flag.file, flag.line)
+
+            if bb_id is not None:
+                assignment.flags_per_bb[bb_id].add(flag)
+
+        if Resolution.FUNCTION in resolutions or Resolution.FUNCTION_BLOCKS in resolutions:
+            func_name = model.function_index.find(flag.file, flag.line)
+
+            if func_name is not None:
+                assignment.flags_per_func[func_name].add(flag)
+
+                if Resolution.FUNCTION_BLOCKS in resolutions:
+                    assignment.flagged_blocks[func_name].update(
+                        model.function_block_indices[func_name].find_all(flag.file, flag.line)
+                    )
+
+    assignment.n_tools = len(all_tools)
+
+    return assignment
 
 
 class SASTFlagGrouping(ABC):
@@ -36,86 +182,95 @@ class SASTFlagGrouping(ABC):
     Abstract SAST flag grouping.
     """
 
+    # Code granularities the SAST flags have to be resolved to
+    _resolutions: ClassVar[FrozenSet[Resolution]]
+
     def __init__(self, inspec_file: Path, weights: ScoreWeights) -> None:
         self._inspec_file = inspec_file
         self._weights = weights
 
-    @abstractmethod
-    def group(self, flags: SASTFlags) -> SASTFlags:
+        self._model = load_inspection(inspec_file)
+
+    def group(self, flags: Iterable[SASTFlagType]) -> SASTFlags:
         """
         Group SAST flags based on a certain code granularity.
 
         :param flags:
         :return:
         """
+        return self.group_assigned(assign_flags(self._model, flags, self._resolutions))
+
+    @abstractmethod
+    def group_assigned(self, assignment: FlagAssignment) -> SASTFlags:
+        """
+        Group SAST flags that are already assigned to their code blocks.
+
+        :param assignment:
+        :return:
+        """
         pass
 
 
+def group_all(groupings: Sequence[SASTFlagGrouping], flags: Iterable[SASTFlagType]) -> List[SASTFlags]:
+    """
+    Group SAST flags based on multiple code granularities. The flags are resolved to their code blocks only once, and
+    each grouping is derived from this shared assignment.
+
+    :param groupings: Groupings (based on the same SFI file)
+    :param flags:
+    :return: Grouped SAST flags per grouping
+    """
+    if len(groupings) == 0:
+        return []
+
+    if len({id(grouping._model) for grouping in groupings}) > 1:
+        raise ValueError("Groupings are based on different SFI files.")
+
+    assignment = assign_flags(
+        groupings[0]._model, flags, set().union(*(grouping._resolutions for grouping in groupings))
+    )
+
+    return [grouping.group_assigned(assignment) for grouping in groupings]
+
+
 class BasicBlockGrouping(SASTFlagGrouping):
     """
     SAST flag basic block grouping.
     """
 
-    def __init__(self, inspec_file: Path, weights: ScoreWeights) -> None:
-        super().__init__(inspec_file, weights)
-        self._bb_infos: Dict[int, CodeBlockInfo] = {}
-
-        data = json.loads(inspec_file.read_text())
-
-        for func in data["functions"]:
-            for bb in func["basic_blocks"]:
-                self._bb_infos[bb["id"]] = CodeBlockInfo(
-                    func["location"]["filename"],
-                    bb["location"]["line"]["start"],
-                    bb["location"]["line"]["end"],
-                    bb["LoC"],
-                )
+    _resolutions = frozenset({Resolution.BASIC_BLOCK})
 
-    def group(self, flags: SASTFlags) -> SASTFlags:
+    def group_assigned(self, assignment: FlagAssignment) -> SASTFlags:
         """
         Group SAST flags based on basic block granularity.
 
-        :param flags:
+        :param assignment:
         :return:
         """
-        flags_per_bb: Dict = defaultdict(set)
+        bb_infos = self._model.basic_blocks
+        flags_per_bb = assignment.flags_per_bb
+        n_tools = assignment.n_tools
 
-        for flag in flags:
-            for bb_id, bb_info in self._bb_infos.items():
-                if flag.file == bb_info.file:
-                    if bb_info.line_start <= flag.line <= bb_info.line_end:
-                        flags_per_bb[bb_id].add(flag)
-                        break
+        scores = score_groups(
+            flags_per_bb, {bb_id: bb_infos[bb_id].n_lines for bb_id in flags_per_bb}, n_tools, self._weights
+        )
 
-        n_tools = len({flag.tool for flag in flags})
         grouped_flags = SASTFlags()
 
-        for bb_id, bb_flags in flags_per_bb.items():
-            bb_tools = {flag.tool for flag in bb_flags}
-            bb_vulns = {f"{flag.vuln}:{flag.line}" for flag in bb_flags}
-
-            n_flg_lines = len({flag.line for flag in bb_flags})
-            n_all_lines = self._bb_infos[bb_id].n_lines
-            n_run_tools = len(bb_tools)
-            n_all_tools = n_tools
-
-            r_flg_lines = div(n_flg_lines, n_all_lines)
-            r_run_tools = div(n_run_tools, n_all_tools)
-
-            # Calculate the vulnerability score
-            score = round((self._weights.flags * r_flg_lines) + (self._weights.tools * r_run_tools), SCORE_PRECISION)
+        for bb_id, bb_score in scores.items():
+            tools, vulns = group_labels(flags_per_bb[bb_id])
 
             grouped_flags.add(
                 GroupedSASTFlag(
-                    CONCAT_CHAR.join(bb_tools),
-                    self._bb_infos[bb_id].file,
-                    self._bb_infos[bb_id].line_start,
-                    CONCAT_CHAR.join(bb_vulns),
-                    n_flg_lines,
-                    n_all_lines,
-                    n_run_tools,
-                    n_all_tools,
-                    score,
+                    tools,
+                    bb_infos[bb_id].file,
+                    bb_infos[bb_id].line_start,
+                    vulns,
+                    bb_score.n_flg_lines,
+                    bb_infos[bb_id].n_lines,
+                    bb_score.n_run_tools,
+                    n_tools,
+                    bb_score.score,
                 )
             )
 
@@ -127,84 +282,38 @@ class BasicBlockV2Grouping(SASTFlagGrouping):
     SAST flag basic block grouping with function-level vuln. score.
     """
 
-    def __init__(self, inspec_file: Path, weights: ScoreWeights) -> None:
-        super().__init__(inspec_file, weights)
-        self._func_infos: Dict[str, Tuple[CodeBlockInfo, List[CodeBlockInfo]]] = {}
-
-        data = json.loads(inspec_file.read_text())
+    _resolutions = frozenset({Resolution.FUNCTION_BLOCKS})
 
-        for func in data["functions"]:
-            func_file = func["location"]["filename"]
-            func_name = f"{func['location']['filename']}:{func['name']}"
-
-            func_info = CodeBlockInfo(
-                func_file, func["location"]["line"]["start"], func["location"]["line"]["end"], func["LoC"]
-            )
-
-            blk_infos = []
-            for bb in func["basic_blocks"]:
-                blk_infos.append(
-                    CodeBlockInfo(
-                        func["location"]["filename"],
-                        bb["location"]["line"]["start"],
-                        bb["location"]["line"]["end"],
-                        bb["LoC"],
-                    )
-                )
+    def group_assigned(self, assignment: FlagAssignment) -> SASTFlags:
+        func_infos = self._model.functions
+        flags_per_func = assignment.flags_per_func
+        n_tools = assignment.n_tools
 
-            self._func_infos[func_name] = (func_info, blk_infos)
+        n_all_lines = {func_name: func_infos[func_name].n_lines for func_name in flags_per_func}
+        func_scores = score_groups(flags_per_func, n_all_lines, n_tools, self._weights)
 
-    def group(self, flags: SASTFlags) -> SASTFlags:
-        flags_per_func: Dict = defaultdict(set)
-        flagged_blocks: Dict = defaultdict(set)
-
-        for flag in flags:
-            for func_name, (func_info, blk_infos) in self._func_infos.items():
-                if flag.file == func_info.file:
-                    if func_info.line_start <= flag.line <= func_info.line_end:
-                        flags_per_func[func_name].add(flag)
-
-                        for bb_info in blk_infos:
-                            if bb_info.line_start <= flag.line <= bb_info.line_end:
-                                flagged_blocks[func_name].add(bb_info)
-
-                        break
-
-        n_tools = len({flag.tool for flag in flags})
         grouped_flags = SASTFlags()
 
-        for func_name, func_flags in flags_per_func.items():
-            func_tools = {flag.tool for flag in func_flags}
-            func_vulns = {f"{flag.vuln}:{flag.line}" for flag in func_flags}
-
-            n_flg_lines = len({flag.line for flag in func_flags})
-            n_all_lines = self._func_infos[func_name][0].n_lines
-            n_run_tools = len(func_tools)
-            n_all_tools = n_tools
+        # Basic block-level tools and vulnerabilities; the scores are taken from the function level
+        for func_name, bb_infos in assignment.flagged_blocks.items():
+            func_score = func_scores[func_name]
 
-            r_flg_lines = div(n_flg_lines, n_all_lines)
-            r_run_tools = div(n_run_tools, n_all_tools)
-
-            # Calculate the vulnerability score
-            score = round((self._weights.flags * r_flg_lines) + (self._weights.tools * r_run_tools), SCORE_PRECISION)
-
-            for bb_info in flagged_blocks[func_name]:
-                bb_flags = [flag for flag in func_flags if bb_info.line_start <= flag.line <= bb_info.line_end]
-
-                bb_tools = {flag.tool for flag in bb_flags}
-                bb_vulns = {f"{flag.vuln}:{flag.line}" for flag in bb_flags}
+            for bb_info in bb_infos:
+                tools, vulns = group_labels(
+                    [flag for flag in flags_per_func[func_name] if bb_info.line_start <= flag.line <= bb_info.line_end]
+                )
 
                 grouped_flags.add(
                     GroupedSASTFlag(
-                        CONCAT_CHAR.join(bb_tools),
+                        tools,
                         bb_info.file,
                         bb_info.line_start,
-                        CONCAT_CHAR.join(bb_vulns),
-                        n_flg_lines,
-                        n_all_lines,
-                        n_run_tools,
-                        n_all_tools,
-                        score,
+                        vulns,
+                        func_score.n_flg_lines,
+                        n_all_lines[func_name],
+                        func_score.n_run_tools,
+                        n_tools,
+                        func_score.score,
                     )
                 )
 
@@ -216,66 +325,42 @@ class FunctionGrouping(SASTFlagGrouping):
     SAST flag function grouping.
     """
 
-    def __init__(self, inspec_file: Path, weights: ScoreWeights) -> None:
-        super().__init__(inspec_file, weights)
-        self._func_infos: Dict[str, CodeBlockInfo] = {}
-
-        data = json.loads(inspec_file.read_text())
-
-        for func in data["functions"]:
-            func_name = f"{func['location']['filename']}:{func['name']}"
-            self._func_infos[func_name] = CodeBlockInfo(
-                func["location"]["filename"],
-                func["location"]["line"]["start"],
-                func["location"]["line"]["end"],
-                func["LoC"],
-            )
+    _resolutions = frozenset({Resolution.FUNCTION})
 
-    def group(self, flags: SASTFlags) -> SASTFlags:
+    def group_assigned(self, assignment: FlagAssignment) -> SASTFlags:
         """
-        Group SAST flags based on basic block granularity.
+        Group SAST flags based on function granularity.
 
-        :param flags:
+        :param assignment:
         :return:
         """
-        flags_per_func: Dict = defaultdict(set)
+        func_infos = self._model.functions
+        flags_per_func = assignment.flags_per_func
+        n_tools = assignment.n_tools
 
-        for flag in flags:
-            for func_name, func_info in self._func_infos.items():
-                if flag.file == func_info.file:
-                    if func_info.line_start <= flag.line <= func_info.line_end:
-                        flags_per_func[func_name].add(flag)
-                        break
+        scores = score_groups(
+            flags_per_func,
+            {func_name: func_infos[func_name].n_lines for func_name in flags_per_func},
+            n_tools,
+            self._weights,
+        )
 
-        n_tools = len({flag.tool for flag in flags})
         grouped_flags = SASTFlags()
 
-        for func_name, func_flags in flags_per_func.items():
-            func_tools = {flag.tool for flag in func_flags}
-            func_vulns = {f"{flag.vuln}:{flag.line}" for flag in func_flags}
-
-            n_flg_lines = len({flag.line for flag in func_flags})
-            n_all_lines = self._func_infos[func_name].n_lines
-            n_run_tools = len(func_tools)
-            n_all_tools = n_tools
-
-            r_flg_lines = div(n_flg_lines, n_all_lines)
-            r_run_tools = div(n_run_tools, n_all_tools)
-
-            # Calculate the vulnerability score
-            score = round((self._weights.flags * r_flg_lines) + (self._weights.tools * r_run_tools), SCORE_PRECISION)
+        for func_name, func_score in scores.items():
+            tools, vulns = group_labels(flags_per_func[func_name])
 
             grouped_flags.add(
                 GroupedSASTFlag(
-                    CONCAT_CHAR.join(func_tools),
-                    self._func_infos[func_name].file,
-                    self._func_infos[func_name].line_start + 1,
-                    CONCAT_CHAR.join(func_vulns),
-                    n_flg_lines,
-                    n_all_lines,
-                    n_run_tools,
-                    n_all_tools,
-                    score,
+                    tools,
+                    func_infos[func_name].file,
+                    func_infos[func_name].line_start + 1,
+                    vulns,
+                    func_score.n_flg_lines,
+                    func_infos[func_name].n_lines,
+                    func_score.n_run_tools,
+                    n_tools,
+                    func_score.score,
                 )
             )
 
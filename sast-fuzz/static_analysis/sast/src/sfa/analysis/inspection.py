@@ -0,0 +1,440 @@
+# Copyright 2023-2024 Chair for Software & Systems Engineering, TUM
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import json
+import logging
+import mmap
+import os
+import struct
+import sys
+from array import array
+from collections import defaultdict, namedtuple
+from functools import cached_property
+from pathlib import Path
+from tempfile import NamedTemporaryFile
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from sfa.utils.fs import hash_file
+from sfa.utils.interval import IntervalIndex, IntervalSet
+
+# Container for code block information
+CodeBlockInfo = namedtuple("CodeBlockInfo", ["file", "line_start", "line_end", "n_lines"])
+
+# Integer columns of the inspection model (per function, per basic block, and per iCFG edge)
+FUNC_COLUMNS: Tuple[str, ...] = (
+    "func_name",
+    "func_file",
+    "func_start",
+    "func_end",
+    "func_loc",
+    "func_reachable",
+    "func_bb_end",
+)
+BB_COLUMNS: Tuple[str, ...] = ("bb_id", "bb_start", "bb_end", "bb_loc")
+ICFG_COLUMNS: Tuple[str, ...] = ("icfg_src", "icfg_dst")
+
+# Suffix of the compiled inspection cache file (stored next to the SFI file)
+INSPECTION_CACHE_SUFFIX: str = ".sfic"
+
+# Compiled inspection cache format version
+INSPECTION_CACHE_VERSION: int = 1
+
+# Compiled inspection cache header: magic, byte order, version, SFI size, SFI mtime, SFI digest, #strings, #functions,
+# #basic blocks, #iCFG edges, string blob size
+INSPECTION_CACHE_HEADER = struct.Struct("<4s2sHQQ32sQQQQQ")
+
+
+class InspectionModel:
+    """
+    SASTFuzz Inspector (SFI) data in columnar form.
+
+    Strings (function and file names) are stored once in a string table and referenced by index. The basic blocks of
+    function i are the rows [func_bb_end[i - 1], func_bb_end[i]) of the basic block columns. The columns are either
+    lists (parsed from JSON) or memory views of a memory-mapped, compiled cache file.
+    """
+
+    def __init__(self, strings: Sequence[str], cols: Dict[str, Sequence[int]]) -> None:
+        self._strings = strings
+
+        self._func_name = cols["func_name"]
+        self._func_file = cols["func_file"]
+        self._func_start = cols["func_start"]
+        self._func_end = cols["func_end"]
+        self._func_loc = cols["func_loc"]
+        self._func_reachable = cols["func_reachable"]
+        self._func_bb_end = cols["func_bb_end"]
+
+        self._bb_id = cols["bb_id"]
+        self._bb_start = cols["bb_start"]
+        self._bb_end = cols["bb_end"]
+        self._bb_loc = cols["bb_loc"]
+
+        self._icfg_src = cols.get("icfg_src", [])
+        self._icfg_dst = cols.get("icfg_dst", [])
+
+    @classmethod
+    def from_json(cls, file: Path) -> "InspectionModel":
+        """
+        Load the inspection model from an SFI (JSON) file.
+
+        :param file:
+        :return:
+        """
+        data = json.loads(file.read_text())
+
+        strings: List[str] = []
+        string_ids: Dict[str, int] = {}
+
+        def intern(string: str) -> int:
+            if string not in string_ids:
+                string_ids[string] = len(strings)
+                strings.append(string)
+
+            return string_ids[string]
+
+        cols: Dict[str, List[int]] = {name: [] for name in FUNC_COLUMNS + BB_COLUMNS + ICFG_COLUMNS}
+
+        for func in data["functions"]:
+            cols["func_name"].append(intern(func["name"]))
+            cols["func_file"].append(intern(func["location"]["filename"]))
+            cols["func_start"].append(func["location"]["line"]["start"])
+            cols["func_end"].append(func["location"]["line"]["end"])
+            cols["func_loc"].append(func["LoC"])
+            cols["func_reachable"].append(int(func["location"]["reachable_from_main"]))
+
+            for bb in func["basic_blocks"]:
+                cols["bb_id"].append(bb["id"])
+                cols["bb_start"].append(bb["location"]["line"]["start"])
+                cols["bb_end"].append(bb["location"]["line"]["end"])
+                cols["bb_loc"].append(bb["LoC"])
+
+            cols["func_bb_end"].append(len(cols["bb_id"]))
+
+        # The iCFG is only part of the SFI file if the inspector was run with '--icfg'
+        for edge in data.get("iCFG", []):
+            for dst in edge["dst"]:
+                cols["icfg_src"].append(edge["src"])
+                cols["icfg_dst"].append(dst)
+
+        return cls(strings, dict(cols))
+
+    def to_cache(self, file: Path, src_stat: os.stat_result, src_digest: bytes) -> None:
+        """
+        Write the inspection model into a compiled cache file.
+
+        :param file:
+        :param src_stat: Stat of the SFI file the model was loaded from
+        :param src_digest: Content hash of the SFI file the model was loaded from
+        :return:
+        """
+        encoded = [string.encode("utf-8") for string in self._strings]
+
+        str_offsets = [0]
+        for string in encoded:
+            str_offsets.append(str_offsets[-1] + len(string))
+
+        blob = b"".join(encoded)
+
+        header = INSPECTION_CACHE_HEADER.pack(
+            b"SFIC",
+            sys.byteorder[:2].encode(),
+            INSPECTION_CACHE_VERSION,
+            src_stat.st_size,
+            src_stat.st_mtime_ns,
+            src_digest,
+            len(self._strings),
+            len(self._func_name),
+            len(self._bb_id),
+            len(self._icfg_src),
+            len(blob),
+        )
+
+        cols = self._columns()
+
+        # Write into a temporary file first, so concurrent readers never see a partially written cache
+        cache_file = NamedTemporaryFile("wb", dir=file.parent, prefix=file.name, delete=False)
+
+        try:
+            with cache_file:
+                cache_file.write(header)
+                cache_file.write(array("q", str_offsets).tobytes())
+
+                for name in FUNC_COLUMNS + BB_COLUMNS + ICFG_COLUMNS:
+                    cache_file.write(array("q", cols[name]).tobytes())
+
+                cache_file.write(blob)
+
+            os.replace(cache_file.name, file)
+        except BaseException:
+            Path(cache_file.name).unlink(missing_ok=True)
+            raise
+
+    @classmethod
+    def from_cache(cls, file: Path, src_stat: os.stat_result, src_digest: Optional[bytes] = None) -> "InspectionModel":
+        """
+        Load the inspection model from a compiled cache file (memory-mapped, the columns are not copied).
+
+        :param file:
+        :param src_stat: Stat of the SFI file the cache is expected to be compiled from
+        :param src_digest: Content hash of the SFI file; if None, the SFI file's size and mtime have to match
+        :return:
+        """
+        with file.open("rb") as cache_file:
+            buffer = mmap.mmap(cache_file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        if len(buffer) < INSPECTION_CACHE_HEADER.size:
+            raise ValueError("Truncated inspection cache file.")
+
+        (magic, byteorder, version, size, mtime, digest, n_strings, n_funcs, n_bbs, n_edges, blob_len) = (
+            INSPECTION_CACHE_HEADER.unpack_from(buffer, 0)
+        )
+
+        if magic != b"SFIC" or byteorder != sys.byteorder[:2].encode() or version != INSPECTION_CACHE_VERSION:
+            raise ValueError("Unsupported inspection cache file.")
+
+        if src_digest is None:
+            if (size, mtime) != (src_stat.st_size, src_stat.st_mtime_ns):
+                raise ValueError("Outdated inspection cache file.")
+        elif digest != src_digest:
+            raise ValueError("Outdated inspection cache file.")
+
+        sizes = [n_strings + 1] + [n_funcs] * len(FUNC_COLUMNS) + [n_bbs] * len(BB_COLUMNS) + [n_edges] * 2
+
+        if len(buffer) != INSPECTION_CACHE_HEADER.size + 8 * sum(sizes) + blob_len:
+            raise ValueError("Truncated inspection cache file.")
+
+        view = memoryview(buffer)
+        offset = INSPECTION_CACHE_HEADER.size
+
+        arrays = []
+        for n in sizes:
+            arrays.append(view[offset : offset + 8 * n].cast("q"))
+            offset += 8 * n
+
+        blob = bytes(view[offset:])
+        str_offsets = arrays[0]
+        strings = [blob[str_offsets[i] : str_offsets[i + 1]].decode("utf-8") for i in range(n_strings)]
+
+        return cls(strings, dict(zip(FUNC_COLUMNS + BB_COLUMNS + ICFG_COLUMNS, arrays[1:])))
+
+    def _columns(self) -> Dict[str, Sequence[int]]:
+        return {
+            "func_name": self._func_name,
+            "func_file": self._func_file,
+            "func_start": self._func_start,
+            "func_end": self._func_end,
+            "func_loc": self._func_loc,
+            "func_reachable": self._func_reachable,
+            "func_bb_end": self._func_bb_end,
+            "bb_id": self._bb_id,
+            "bb_start": self._bb_start,
+            "bb_end": self._bb_end,
+            "bb_loc": self._bb_loc,
+            "icfg_src": self._icfg_src,
+            "icfg_dst": self._icfg_dst,
+        }
+
+    def _func_key(self, i: int) -> str:
+        return f"{self._strings[self._func_file[i]]}:{self._strings[self._func_name[i]]}"
+
+    def _func_info(self, i: int) -> CodeBlockInfo:
+        return CodeBlockInfo(
+            self._strings[self._func_file[i]], self._func_start[i], self._func_end[i], self._func_loc[i]
+        )
+
+    def _bb_rows(self, i: int) -> range:
+        return range(0 if i == 0 else self._func_bb_end[i - 1], self._func_bb_end[i])
+
+    def _bb_infos(self, i: int) -> List[Tuple[int, CodeBlockInfo]]:
+        file = self._strings[self._func_file[i]]
+
+        return [
+            (self._bb_id[j], CodeBlockInfo(file, self._bb_start[j], self._bb_end[j], self._bb_loc[j]))
+            for j in self._bb_rows(i)
+        ]
+
+    @cached_property
+    def functions(self) -> Dict[str, CodeBlockInfo]:
+        """
+        Function view: "<file>:<function name>" -> function code block.
+
+        :return:
+        """
+        return {self._func_key(i): self._func_info(i) for i in range(len(self._func_name))}
+
+    @cached_property
+    def basic_blocks(self) -> Dict[int, CodeBlockInfo]:
+        """
+        Basic block view: block ID -> block code block.
+
+        :return:
+        """
+        return {bb_id: bb_info for i in range(len(self._func_name)) for bb_id, bb_info in self._bb_infos(i)}
+
+    @cached_property
+    def function_blocks(self) -> Dict[str, Tuple[CodeBlockInfo, List[CodeBlockInfo]]]:
+        """
+        Function/basic block view: "<file>:<function name>" -> (function code block, basic block code blocks).
+
+        :return:
+        """
+        return {
+            self._func_key(i): (self._func_info(i), [bb_info for _, bb_info in self._bb_infos(i)])
+            for i in range(len(self._func_name))
+        }
+
+    @cached_property
+    def reachable_functions(self) -> List[CodeBlockInfo]:
+        """
+        Reachability view: code blocks of the functions reachable from the main function.
+
+        :return:
+        """
+        return [self._func_info(i) for i in range(len(self._func_name)) if self._func_reachable[i]]
+
+    @cached_property
+    def reachable_code(self) -> IntervalSet:
+        """
+        Reachability lookup set: code locations within the functions reachable from the main function.
+
+        :return:
+        """
+        return IntervalSet(
+            (self._strings[self._func_file[i]], self._func_start[i], self._func_end[i])
+            for i in range(len(self._func_name))
+            if self._func_reachable[i]
+        )
+
+    @cached_property
+    def function_index(self) -> IntervalIndex[str]:
+        """
+        Function lookup index: code location -> "<file>:<function name>" of the first function containing it.
+
+        :return:
+        """
+        return IntervalIndex(
+            (self._strings[self._func_file[i]], self._func_start[i], self._func_end[i], self._func_key(i))
+            for i in range(len(self._func_name))
+        )
+
+    @cached_property
+    def basic_block_index(self) -> IntervalIndex[int]:
+        """
+        Basic block lookup index: code location -> ID of the first basic block containing it.
+
+        :return:
+        """
+        return IntervalIndex(
+            (self._strings[self._func_file[i]], self._bb_start[j], self._bb_end[j], self._bb_id[j])
+            for i in range(len(self._func_name))
+            for j in self._bb_rows(i)
+        )
+
+    @cached_property
+    def function_block_indices(self) -> Dict[str, IntervalIndex[CodeBlockInfo]]:
+        """
+        Per-function basic block lookup indices: "<file>:<function name>" -> index of the function's basic blocks.
+
+        :return:
+        """
+        return {
+            self._func_key(i): IntervalIndex(
+                (bb_info.file, bb_info.line_start, bb_info.line_end, bb_info) for _, bb_info in self._bb_infos(i)
+            )
+            for i in range(len(self._func_name))
+        }
+
+    @cached_property
+    def icfg(self) -> Dict[int, List[int]]:
+        """
+        iCFG view: block ID -> successor block IDs (empty if the SFI file contains no iCFG).
+
+        :return:
+        """
+        succs: Dict[int, List[int]] = defaultdict(list)
+
+        for src, dst in zip(self._icfg_src, self._icfg_dst):
+            succs[src].append(dst)
+
+        return dict(succs)
+
+
+def _write_compiled(model: InspectionModel, cache_file: Path, stat: os.stat_result, digest: bytes) -> None:
+    try:
+        model.to_cache(cache_file, stat, digest)
+    except OSError as ex:
+        logging.warning(f"Inspection cache {cache_file} couldn't be written: {ex}")
+
+
+def _load_compiled(inspec_file: Path, stat: os.stat_result) -> InspectionModel:
+    """
+    Load the inspection model via the compiled cache next to the SFI file, (re-)compiling the cache if it is missing
+    or outdated.
+
+    :param inspec_file:
+    :param stat:
+    :return:
+    """
+    cache_file = inspec_file.with_name(inspec_file.name + INSPECTION_CACHE_SUFFIX)
+
+    if cache_file.exists():
+        # Fast path: unchanged SFI file size and mtime
+        try:
+            return InspectionModel.from_cache(cache_file, stat)
+        except (OSError, ValueError):
+            pass
+
+    digest = bytes.fromhex(hash_file(inspec_file))
+
+    if cache_file.exists():
+        # Slow path: the SFI file was touched, but its contents may still match
+        try:
+            model = InspectionModel.from_cache(cache_file, stat, digest)
+        except (OSError, ValueError) as ex:
+            logging.debug(f"Inspection cache {cache_file}: {ex}")
+        else:
+            _write_compiled(model, cache_file, stat, digest)
+            return model
+
+    model = InspectionModel.from_json(inspec_file)
+    _write_compiled(model, cache_file, stat, digest)
+
+    return model
+
+
+# Inspection models loaded by this process: SFI file -> ((mtime, size), model)
+_loaded_models: Dict[Path, Tuple[Tuple[int, int], InspectionModel]] = {}
+
+
+def load_inspection(inspec_file: Path, use_cache: bool = True) -> InspectionModel:
+    """
+    Load the inspection model of an SFI file. The model is loaded once per process and shared by all callers as long as
+    the file is not modified.
+
+    :param inspec_file:
+    :param use_cache: If true, load the model from (and maintain) the compiled cache next to the SFI file
+    :return:
+    """
+    inspec_file = inspec_file.resolve()
+
+    stat = inspec_file.stat()
+    version = (stat.st_mtime_ns, stat.st_size)
+
+    cached = _loaded_models.get(inspec_file)
+
+    if cached is None or cached[0] != version:
+        model = _load_compiled(inspec_file, stat) if use_cache else InspectionModel.from_json(inspec_file)
+        _loaded_models[inspec_file] = (version, model)
+
+    return _loaded_models[inspec_file][1]
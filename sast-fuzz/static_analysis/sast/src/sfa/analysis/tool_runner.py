@@ -14,19 +14,50 @@
 
 import json
 import logging
+import math
 import os
+import shlex
+import shutil
+import threading
 import time
 import traceback
+import urllib.request
 from abc import ABC, abstractmethod
-from itertools import chain
+from collections import defaultdict
+from contextlib import contextmanager
+from functools import lru_cache
+from itertools import chain, count
 from pathlib import Path
-from tempfile import TemporaryDirectory
-from typing import Callable, ClassVar, Dict, Optional
+from tempfile import NamedTemporaryFile, TemporaryDirectory
+from typing import Callable, ClassVar, Dict, FrozenSet, Iterator, List, Optional, Sequence, Tuple, Union
+
+import yaml
 
 from sfa import SASTToolConfig
 from sfa.analysis import SASTFlag, SASTFlags
-from sfa.utils.fs import copy_dir, find_files
-from sfa.utils.proc import run_shell_command
+from sfa.utils.cache import FileCache, cache_key
+from sfa.utils.compile_db import intercept_build, to_compilation_database, write_replay_script
+from sfa.utils.fs import (
+    VCS_DIRS,
+    clone_dir,
+    find_files,
+    hash_dir,
+    hash_file,
+    link_files,
+    lock_dir,
+    partition_files,
+    sync_dir,
+    wait_for_file,
+)
+from sfa.utils.jobserver import CPUBudget, available_cores
+from sfa.utils.proc import (
+    ResourceLimitError,
+    run_shell_command,
+    run_shell_command_to_file,
+    run_shell_commands,
+    run_shell_commands_to_files,
+)
+from sfa.utils.scheduler import Task
 
 # Build script name
 BUILD_SCRIPT_NAME: str = "build.sh"
@@ -34,18 +65,79 @@ BUILD_SCRIPT_NAME: str = "build.sh"
 # Compilation database name
 COMPILATION_DATABASE_NAME: str = "compile_commands.json"
 
+# Scheduler resource occupied by the build of the subject
+BUILD_RESOURCE: str = "build"
+
+# Name of the script replaying the compiler invocations of the shared build
+REPLAY_SCRIPT_NAME: str = "sfa_replay.sh"
+
 # Name of the environment variable holding the path to clang-scan
 CLANG_SCAN_ENVVAR: str = "CLANG_SCAN"
 
 # Supported SARIF version
 SARIF_VERSION: str = "2.1.0"
 
+# C/C++ source file extensions (analyzed file by file by the per-file SAST tools)
+SOURCE_FILE_EXTS: List[str] = [
+    ".c",
+    ".h",
+    ".ec",
+    ".ecp",
+    ".pgc",
+    ".C",
+    ".cpp",
+    ".CPP",
+    ".cxx",
+    ".c++",
+    ".cc",
+    ".CC",
+    ".pcc",
+    ".hpp",
+    ".H",
+]
+
+# Files/directories of the subject that are not cloned into the tool workspaces
+WORKSPACE_EXCLUDES: List[str] = VCS_DIRS
+
+# Max. number of changed files passed to a per-file SAST tool (otherwise, the whole subject is re-analyzed)
+INCREMENTAL_MAX_FILES: int = 512
+
+# Min. number of files per shard of a sharded SAST tool run
+MIN_SHARD_FILES: int = 8
+
+# Min. number of queries per batch of a sharded CodeQL run
+MIN_SHARD_QUERIES: int = 8
+
+# (Relative) cost of a CodeQL query using the data-flow/taint-tracking libraries compared to a local query
+DATAFLOW_QUERY_COST: float = 10.0
+
+# Queries computing the metrics that the CodeQL sanity checks inspect (path suffixes)
+CODEQL_SANITY_QUERIES: List[str] = ["Summary/LinesOfCode.ql", "Summary/LinesOfUserCode.ql"]
+
+# Semgrep registry (the rules of a registry config are fetched from '<url>/<config>')
+SEMGREP_REGISTRY_URL: str = "https://semgrep.dev/c"
+
+# Prefixes of the Semgrep configs that are fetched from the registry (rules, rulesets)
+SEMGREP_REGISTRY_PREFIXES: Tuple[str, ...] = ("r/", "p/")
+
+# Max. waiting time (in seconds) for a response of the Semgrep registry
+REGISTRY_TIMEOUT: float = 60.0
+
+# Max. waiting time (in seconds) for a report file to be complete once the SAST tool exited
+REPORT_TIMEOUT: float = 10.0
+
+# Max. time (in seconds) for interpreting the partial results of a SAST tool that was cut off
+SALVAGE_TIMEOUT: float = 300.0
+
 # SAST tool setup environment variables
 SAST_SETUP_ENV: Dict[str, str] = {
     **os.environ.copy(),
     **{"CC": "clang", "CXX": "clang++", "CFLAGS": "-O0 -fno-inline", "CXXFLAGS": "-O0 -fno-inline"},
 }
 
+# SAST tool output: the output itself or the (report) file it was streamed into
+SASTOutput = Union[str, Path]
+
 
 def is_cmake_project(subject_dir: Path) -> bool:
     """
@@ -57,17 +149,152 @@ def is_cmake_project(subject_dir: Path) -> bool:
     return (subject_dir / "CMakeLists.txt").exists()
 
 
-def default_sarif_checks(string: str) -> Dict:
+@lru_cache(maxsize=None)
+def subject_digest(subject_dir: Path) -> str:
+    """
+    Compute the content hash of the subject directory (once per process).
+
+    :param subject_dir:
+    :return:
+    """
+    return hash_dir(subject_dir, exclude=VCS_DIRS)
+
+
+def source_file_hashes(subject_dir: Path, result_cache: FileCache) -> Dict[str, str]:
+    """
+    Compute the content hashes of the C/C++ source files of the subject. Files whose size and modification time are
+    unchanged since the last call (recorded in a manifest in the result cache) are not hashed again.
+
+    :param subject_dir:
+    :param result_cache:
+    :return: Mapping from relative file path to content hash
+    """
+    manifest_key = cache_key("manifest", str(subject_dir.resolve()))
+    manifest_file = result_cache.get(manifest_key)
+
+    manifest: Dict[str, List] = {}
+
+    if manifest_file is not None:
+        try:
+            manifest = json.loads(manifest_file.read_text())
+        except (OSError, ValueError):
+            manifest = {}
+
+    new_manifest: Dict[str, List] = {}
+
+    for file in find_files(subject_dir, exts=SOURCE_FILE_EXTS):
+        rel_path = file.relative_to(subject_dir)
+
+        if any(part in VCS_DIRS for part in rel_path.parts):
+            continue
+
+        stat = file.stat()
+        entry = manifest.get(str(rel_path))
+
+        if entry is not None and entry[0] == stat.st_mtime_ns and entry[1] == stat.st_size:
+            new_manifest[str(rel_path)] = entry
+        else:
+            new_manifest[str(rel_path)] = [stat.st_mtime_ns, stat.st_size, hash_file(file)]
+
+    if new_manifest != manifest:
+        with TemporaryDirectory() as temp_dir:
+            temp_file = Path(temp_dir) / "manifest.json"
+            temp_file.write_text(json.dumps(new_manifest))
+
+            result_cache.put(manifest_key, temp_file)
+
+    return {rel_path: entry[2] for rel_path, entry in new_manifest.items()}
+
+
+def shared_build(subject_dir: Path, build_dir: Path, cpu_budget: Optional[CPUBudget] = None) -> bool:
+    """
+    Build a (Make-based) subject once, and record its compiler invocations, so that the build-based SAST tools can
+    reuse the build instead of building the subject themselves. The compilation database and a script replaying the
+    compiler invocations are written into the root directory of the build.
+
+    :param subject_dir:
+    :param build_dir: Directory the subject is built in
+    :param cpu_budget: CPU budget the build takes its make jobs from
+    :return: True if compiler invocations could be recorded, otherwise, False
+    """
+    workspace = clone_dir(subject_dir, build_dir, exclude=WORKSPACE_EXCLUDES)
+
+    if cpu_budget is None:
+        calls = intercept_build(f"./{BUILD_SCRIPT_NAME} make", workspace, SAST_SETUP_ENV)
+    else:
+        with cpu_budget.build():
+            calls = intercept_build(
+                f"./{BUILD_SCRIPT_NAME} make",
+                workspace,
+                {**SAST_SETUP_ENV, **cpu_budget.make_env()},
+                pass_fds=cpu_budget.make_fds,
+            )
+
+    if len(calls) == 0:
+        logging.warning("Shared build: No compiler invocations recorded (does the build respect CC/CXX?).")
+        return False
+
+    write_replay_script(calls, workspace, workspace / REPLAY_SCRIPT_NAME)
+    (workspace / COMPILATION_DATABASE_NAME).write_text(json.dumps(to_compilation_database(calls), indent=2))
+
+    logging.info(f"Shared build: {len(calls)} compiler invocation(s) recorded")
+
+    return True
+
+
+def is_json_file(file: Path) -> bool:
+    """
+    Check if a file holds a (complete) JSON document.
+
+    :param file:
+    :return:
+    """
+    try:
+        json.loads(file.read_text())
+    except ValueError:
+        return False
+
+    return True
+
+
+def read_output(output: SASTOutput) -> str:
+    """
+    Read SAST tool output.
+
+    :param output:
+    :return:
+    """
+    return output.read_text() if isinstance(output, Path) else output
+
+
+def load_sarif(output: SASTOutput) -> Dict:
     """
-    Run default checks on SARIF string.
+    Load SARIF data from SAST tool output. A report file is parsed from the file (without reading it into a string).
 
-    :param string:
+    :param output:
     :return:
     """
-    if len(string.strip()) == 0:
+    if isinstance(output, Path):
+        if output.stat().st_size == 0:
+            raise ValueError(f"Empty report file '{output}' / no JSON string.")
+
+        with output.open() as file:
+            return json.load(file)
+
+    if len(output.strip()) == 0:
         raise ValueError("Empty input / no JSON string.")
 
-    sarif_data = json.loads(string)
+    return json.loads(output)
+
+
+def default_sarif_checks(output: SASTOutput) -> Dict:
+    """
+    Run default checks on SARIF output.
+
+    :param output:
+    :return:
+    """
+    sarif_data = load_sarif(output)
 
     if sarif_data["version"] != SARIF_VERSION:
         raise ValueError(f"SARIF version {sarif_data['version']} is not supported.")
@@ -75,14 +302,14 @@ def default_sarif_checks(string: str) -> Dict:
     return sarif_data
 
 
-def convert_sarif(string: str) -> SASTFlags:
+def convert_sarif(output: SASTOutput) -> SASTFlags:
     """
     Convert SARIF data into our SAST flag format.
 
-    :param string:
+    :param output:
     :return:
     """
-    sarif_data = json.loads(string)
+    sarif_data = load_sarif(output)
 
     flags = SASTFlags()
 
@@ -106,17 +333,483 @@ def convert_sarif(string: str) -> SASTFlags:
     return flags
 
 
+def merge_sarif(outputs: Sequence[SASTOutput], file: Path) -> Path:
+    """
+    Merge SARIF outputs into one SARIF report file holding the runs of all inputs.
+
+    :param outputs:
+    :param file: Report file to write
+    :return: Report file
+    """
+    sarif_data = [load_sarif(output) for output in outputs]
+
+    with file.open("w") as report_file:
+        json.dump({**sarif_data[0], **{"runs": [run for data in sarif_data for run in data["runs"]]}}, report_file)
+
+    return file
+
+
+@lru_cache(maxsize=None)
+def bundled_rule_ids(rule_bundle: Path) -> FrozenSet[str]:
+    """
+    Read the rule IDs of a Semgrep rule bundle (once per process).
+
+    :param rule_bundle:
+    :return:
+    """
+    with rule_bundle.open("r") as bundle_file:
+        return frozenset(rule["id"] for rule in json.load(bundle_file)["rules"])
+
+
+def registry_rule_id(rule_id: str, rule_ids: FrozenSet[str]) -> str:
+    """
+    Strip the path prefix that Semgrep puts in front of the ID of a bundled rule.
+
+    :param rule_id: Rule ID reported by Semgrep
+    :param rule_ids: IDs of the bundled rules
+    :return: ID of the bundled rule or the given ID if it doesn't belong to a bundled rule
+    """
+    parts = rule_id.split(".")
+
+    # The longest bundled ID wins, so a dot-separated registry ID isn't cut short
+    for i in range(len(parts)):
+        suffix = ".".join(parts[i:])
+
+        if suffix in rule_ids:
+            return suffix
+
+    return rule_id
+
+
 class SASTToolRunner(ABC):
     """
     Abstract SAST tool runner.
     """
 
-    def __init__(self, subject_dir: Path, config: SASTToolConfig) -> None:
+    # Whether the tool results remain complete if the subject is rebuilt incrementally (in a warm workspace)
+    _warm_workspace: ClassVar[bool] = False
+
+    # Whether the tool can reuse the shared build of the subject (see 'shared_build')
+    shares_build: ClassVar[bool] = False
+
+    # Whether the setup phase builds the subject
+    builds: ClassVar[bool] = False
+
+    # Whether the working directory of the setup phase (e.g., the CodeQL database) only depends on the subject contents
+    # and the tool version (not on the checks), so that it can be kept across runs (see 'artifact_root')
+    _keeps_artifact: ClassVar[bool] = False
+
+    def __init__(
+        self,
+        subject_dir: Path,
+        config: SASTToolConfig,
+        result_cache: Optional[FileCache] = None,
+        workspace_root: Optional[Path] = None,
+        build_dir: Optional[Path] = None,
+        cpu_budget: Optional[CPUBudget] = None,
+        artifact_root: Optional[Path] = None,
+        prepared_dir: Optional[Path] = None,
+    ) -> None:
         self._subject_dir = subject_dir
         self._config = config
+        self._result_cache = result_cache
+        self._workspace_root = workspace_root
+        self._build_dir = build_dir
+        self._cpu_budget = cpu_budget
+        self._artifact_root = artifact_root
+        self._artifact_dir: Optional[Path] = None
+        self._prepared_dir = prepared_dir
+        self._version: Optional[str] = None
 
         self._is_cmake_project = is_cmake_project(subject_dir)
 
+        # Wall time of the SAST tool processes so far (limited by the configured timeout); concurrently running
+        # processes (e.g., of shards) are accounted once
+        self._run_time = 0.0
+        self._run_start = 0.0
+        self._n_running = 0
+        self._run_lock = threading.Lock()
+
+        # Whether the SAST tool was cut off and its output holds the partial results only
+        self._salvaged = False
+
+        # Directory of the report files the SAST tool output is streamed into (created on demand, kept until the
+        # output is formatted)
+        self._report_dir: Optional[TemporaryDirectory] = None
+        self._report_ids = count()
+        self._report_lock = threading.Lock()
+
+    def _workspace(self, temp_dir: Path) -> Path:
+        """
+        Clone the subject into a workspace (in which it is built). If warm workspaces are used (and supported by the
+        tool), the subject is synced into a persistent workspace instead, so that the previous build can be reused.
+
+        :param temp_dir:
+        :return: Workspace directory
+        """
+        if self._workspace_root is not None and self._warm_workspace:
+            workspace = (
+                self._workspace_root / f"{type(self).__name__}_{cache_key(str(self._subject_dir.resolve()))[:16]}"
+            )
+            workspace.mkdir(parents=True, exist_ok=True)
+
+            # Mark the workspace as used (for the garbage collection of stale workspaces)
+            os.utime(workspace)
+
+            return sync_dir(self._subject_dir, workspace / self._subject_dir.name, exclude=WORKSPACE_EXCLUDES)
+
+        return clone_dir(self._subject_dir, temp_dir, exclude=WORKSPACE_EXCLUDES)
+
+    def _shared_build(self) -> Optional[Path]:
+        """
+        Get the root directory of the shared build (if there is one).
+
+        :return:
+        """
+        if self._build_dir is None or not self.shares_build:
+            return None
+
+        build_root = self._build_dir / self._subject_dir.name
+
+        return build_root if (build_root / COMPILATION_DATABASE_NAME).exists() else None
+
+    @contextmanager
+    def _cores(self, max_cores: Optional[int] = None) -> Iterator[int]:
+        """
+        Reserve CPU cores for a (multi-threaded) SAST tool process. Without a CPU budget, the max. number of cores is
+        used.
+
+        :param max_cores: Max. number of cores (default: the configured number of threads)
+        :return: Number of threads the process may use
+        """
+        max_cores = max(1, max_cores or self._config.num_threads)
+
+        if self._cpu_budget is None:
+            yield max_cores
+        else:
+            with self._cpu_budget.cores(max_cores) as n_cores:
+                yield n_cores
+
+    def _run(
+        self, cmd: str, cwd: Optional[Path] = None, env: Optional[Dict[str, str]] = None, pass_fds: Tuple = ()
+    ) -> str:
+        """
+        Run a SAST tool command within the configured limits. The timeout applies to all commands of the tool together.
+
+        :param cmd:
+        :param cwd:
+        :param env:
+        :param pass_fds:
+        :return:
+        :raises ResourceLimitError: If the tool exceeds its limits
+        """
+        with self._accounted() as timeout:
+            return run_shell_command(
+                cmd,
+                cwd=cwd,
+                env=env,
+                pass_fds=pass_fds,
+                timeout=timeout,
+                memory_limit=self._config.memory_limit if self._config.memory_limit > 0 else None,
+            )
+
+    def _run_to_file(self, cmd: str, cwd: Optional[Path] = None) -> Path:
+        """
+        Run a SAST tool command within the configured limits (see '_run'), streaming its output into a new report file
+        rather than holding it in memory.
+
+        :param cmd:
+        :param cwd:
+        :return: Report file
+        :raises ResourceLimitError: If the tool exceeds its limits
+        """
+        with self._accounted() as timeout:
+            return run_shell_command_to_file(
+                cmd,
+                self._report_file(),
+                cwd=cwd,
+                timeout=timeout,
+                memory_limit=self._config.memory_limit if self._config.memory_limit > 0 else None,
+            )
+
+    def _report_file(self, suffix: str = ".sarif") -> Path:
+        """
+        Get a new (unique) report file path. The report files are removed once the SAST tool output is formatted.
+
+        :param suffix:
+        :return:
+        """
+        with self._report_lock:
+            if self._report_dir is None:
+                self._report_dir = TemporaryDirectory(prefix="sfa_reports_")
+
+            return Path(self._report_dir.name) / f"report_{next(self._report_ids)}{suffix}"
+
+    def _remove_reports(self) -> None:
+        """
+        Remove the report files.
+
+        :return:
+        """
+        with self._report_lock:
+            if self._report_dir is not None:
+                self._report_dir.cleanup()
+                self._report_dir = None
+
+    def _run_concurrently(self, cmds: List[str], cwd: Optional[Path] = None) -> List[str]:
+        """
+        Run SAST tool commands concurrently, driven by one event loop, within the configured limits (see '_run'). If a
+        command exceeds the limits, the other commands are killed as well.
+
+        :param cmds:
+        :param cwd:
+        :return: Output of each command
+        :raises ResourceLimitError: If a command exceeds the limits
+        """
+        with self._accounted() as timeout:
+            return run_shell_commands(
+                cmds,
+                len(cmds),
+                cwd=cwd,
+                timeout=timeout,
+                memory_limit=self._config.memory_limit if self._config.memory_limit > 0 else None,
+            )
+
+    def _run_concurrently_to_files(self, cmds: List[str], cwd: Optional[Path] = None) -> List[Path]:
+        """
+        Run SAST tool commands concurrently (see '_run_concurrently'), streaming the output of each command into a new
+        report file.
+
+        :param cmds:
+        :param cwd:
+        :return: Report file of each command
+        :raises ResourceLimitError: If a command exceeds the limits
+        """
+        with self._accounted() as timeout:
+            return run_shell_commands_to_files(
+                cmds,
+                [self._report_file() for _ in cmds],
+                len(cmds),
+                cwd=cwd,
+                timeout=timeout,
+                memory_limit=self._config.memory_limit if self._config.memory_limit > 0 else None,
+            )
+
+    @contextmanager
+    def _accounted(self) -> Iterator[Optional[float]]:
+        """
+        Account the wall time of running SAST tool commands against the configured timeout.
+
+        :return: Remaining time (in seconds) or None if there is no timeout
+        :raises ResourceLimitError: If the timeout is exhausted
+        """
+        timeout = None
+
+        with self._run_lock:
+            if self._config.timeout > 0:
+                run_time = self._run_time + (time.monotonic() - self._run_start if self._n_running > 0 else 0.0)
+                timeout = self._config.timeout - run_time
+
+                if timeout <= 0:
+                    raise ResourceLimitError(f"Timeout of {self._config.timeout} seconds exceeded.")
+
+            if self._n_running == 0:
+                self._run_start = time.monotonic()
+
+            self._n_running += 1
+
+        try:
+            yield timeout
+        finally:
+            with self._run_lock:
+                self._n_running -= 1
+
+                if self._n_running == 0:
+                    self._run_time += time.monotonic() - self._run_start
+
+    def _run_build(self, cmd: str, cwd: Path, env: Dict[str, str]) -> str:
+        """
+        Run a build command, whose make jobs are taken from the CPU budget (if there is one).
+
+        :param cmd:
+        :param cwd:
+        :param env:
+        :return:
+        """
+        if self._cpu_budget is None:
+            return self._run(cmd, cwd=cwd, env=env)
+
+        with self._cpu_budget.build():
+            return self._run(
+                cmd, cwd=cwd, env={**env, **self._cpu_budget.make_env()}, pass_fds=self._cpu_budget.make_fds
+            )
+
+    def _salvage(self, error: ResourceLimitError) -> None:
+        """
+        Mark the output of a SAST tool that was cut off as partial.
+
+        :param error:
+        :return:
+        """
+        logging.warning(f"{type(self).__name__}: {error} Salvaging the partial results.")
+
+        self._salvaged = True
+
+    def _activate(self) -> None:
+        if self._cpu_budget is not None:
+            self._cpu_budget.register(type(self).__name__)
+
+    def _deactivate(self) -> None:
+        if self._cpu_budget is not None:
+            self._cpu_budget.unregister(type(self).__name__)
+
+    def _version_cmd(self) -> str:
+        """
+        Get the shell command printing the SAST tool version.
+
+        :return:
+        """
+        return f"{self._config.path} --version"
+
+    def _tool_version(self) -> str:
+        """
+        Get the SAST tool version (once per runner).
+
+        :return:
+        """
+        if self._version is None:
+            self._version = run_shell_command(self._version_cmd())
+
+        return self._version
+
+    def _config_key(self) -> str:
+        """
+        Compute the cache key of the tool configuration (including the tool version).
+
+        :return:
+        """
+        return cache_key(
+            type(self).__name__,
+            self._config.sanity_checks,
+            self._config.path,
+            *self._config.checks,
+            str(self._config.num_threads),
+            self._tool_version(),
+        )
+
+    def _cache_key(self) -> str:
+        """
+        Compute the result cache key from the subject contents, the tool configuration, and the tool version.
+
+        :return:
+        """
+        return cache_key(self._config_key(), subject_digest(self._subject_dir))
+
+    def _artifact_key(self) -> str:
+        """
+        Compute the key of the setup artifact from the subject contents, the build script, and the tool version.
+
+        :return:
+        """
+        return cache_key(
+            type(self).__name__,
+            self._config.path,
+            self._tool_version(),
+            hash_file(self._subject_dir / BUILD_SCRIPT_NAME),
+            subject_digest(self._subject_dir),
+        )
+
+    def artifact_dir(self) -> Optional[Path]:
+        """
+        Get the directory the setup artifact of the subject is kept in.
+
+        :return: Artifact directory or None if the setup artifacts are not kept
+        """
+        if self._artifact_root is None or not self._keeps_artifact:
+            return None
+
+        if self._artifact_dir is None:
+            self._artifact_dir = self._artifact_root / f"{type(self).__name__}_{self._artifact_key()[:16]}"
+
+        return self._artifact_dir
+
+    def needs_setup(self) -> bool:
+        """
+        Check if the setup phase has to be run, i.e., there is no kept setup artifact.
+
+        :return:
+        """
+        artifact_dir = self.artifact_dir()
+
+        return artifact_dir is None or not artifact_dir.exists()
+
+    def _keep_artifact(self, working_dir: Path, artifact_dir: Path, temp_dir: Path) -> Path:
+        """
+        Keep the working directory of the setup phase as artifact. The directory is moved (or copied if it is not
+        temporary) into place atomically; if a concurrent run was faster, its artifact is taken.
+
+        :param working_dir:
+        :param artifact_dir:
+        :param temp_dir: Temporary directory of the setup phase
+        :return: Artifact directory
+        """
+        artifact_dir.parent.mkdir(parents=True, exist_ok=True)
+
+        with TemporaryDirectory(dir=artifact_dir.parent, prefix=".") as staging_dir:
+            staged_dir = Path(staging_dir) / artifact_dir.name
+
+            if temp_dir in working_dir.parents:
+                shutil.move(str(working_dir), str(staged_dir))
+            else:
+                # The working directory lives in a (persistent) warm workspace
+                shutil.copytree(working_dir, staged_dir, symlinks=True)
+
+            try:
+                os.rename(staged_dir, artifact_dir)
+            except OSError:
+                if not artifact_dir.exists():
+                    raise
+
+        logging.info(f"Artifact kept: {type(self).__name__} ({artifact_dir.name})")
+
+        return artifact_dir
+
+    def prepare(self) -> None:
+        """
+        Prepare the SAST tool runs ahead of time (e.g., for offline runs). The prepared files are written into the
+        prepared directory and used by all later runs automatically.
+
+        :return:
+        """
+        pass
+
+    def _cache_flags(self, key: str, flags: SASTFlags) -> None:
+        """
+        Store SAST flags in the result cache.
+
+        :param key:
+        :param flags:
+        :return:
+        """
+        if self._result_cache is None:
+            return
+
+        with TemporaryDirectory() as temp_dir:
+            result_file = Path(temp_dir) / "flags.csv"
+            flags.to_csv(result_file)
+
+            self._result_cache.put(key, result_file)
+
+    def _run_sanity_checks(self) -> bool:
+        """
+        Check if the sanity checks are enabled for the subject.
+
+        :return:
+        """
+        return self._config.sanity_checks == "always" or (
+            self._config.sanity_checks == "cmake" and self._is_cmake_project
+        )
+
     @abstractmethod
     def _setup(self, temp_dir: Path) -> Path:
         """
@@ -128,52 +821,173 @@ class SASTToolRunner(ABC):
         pass
 
     @abstractmethod
-    def _analyze(self, working_dir: Path) -> str:
+    def _analyze(self, working_dir: Path) -> SASTOutput:
         """
         Analyze target program using SAST tool.
 
         :param working_dir:
-        :return:
+        :return: SAST tool output or the report file it was streamed into (see '_report_file')
         """
         pass
 
     @abstractmethod
-    def _sanity_checks(self, string: str) -> None:
+    def _sanity_checks(self, output: SASTOutput) -> None:
         """
         Run sanity checks on SAST tool output.
 
-        :param string:
+        :param output:
         :return:
         """
         pass
 
     @abstractmethod
-    def _format(self, string: str) -> SASTFlags:
+    def _format(self, output: SASTOutput) -> SASTFlags:
         """
         Format SAST tool output.
 
-        :param flags:
+        :param output:
         :return:
         """
         pass
 
+    def cached_flags(self) -> Optional[SASTFlags]:
+        """
+        Get the flags of a previous run with the same subject contents and tool configuration from the result cache.
+
+        :return: Cached flags or None if no result cache is used or there are no cached flags
+        """
+        if self._result_cache is None:
+            return None
+
+        key = self._cache_key()
+        cached_file = self._result_cache.get(key)
+
+        if cached_file is None:
+            return None
+
+        logging.info(f"Cache hit: {type(self).__name__} ({key[:12]})")
+
+        return SASTFlags.from_csv(cached_file)
+
+    def _setup_phase(self) -> Tuple[TemporaryDirectory, Path]:
+        """
+        Setup phase: Set up the target program in a temporary directory.
+
+        :return: Temporary directory (cleaned up by the analysis phase) and working directory
+        """
+        temp_dir = TemporaryDirectory()
+
+        try:
+            artifact_dir = self.artifact_dir()
+
+            if artifact_dir is not None and artifact_dir.exists():
+                logging.info(f"Artifact hit: {type(self).__name__} ({artifact_dir.name})")
+
+                # Mark the artifact as used (for the garbage collection of stale artifacts)
+                os.utime(artifact_dir)
+
+                return temp_dir, artifact_dir
+
+            working_dir = self._setup(Path(temp_dir.name))
+
+            if artifact_dir is not None and not self._salvaged:
+                working_dir = self._keep_artifact(working_dir, artifact_dir, Path(temp_dir.name))
+
+            return temp_dir, working_dir
+        except BaseException:
+            temp_dir.cleanup()
+            self._deactivate()
+            raise
+
+    def _analyze_phase(self, setup: Tuple[TemporaryDirectory, Path]) -> SASTOutput:
+        """
+        Analysis phase: Run the SAST tool.
+
+        :param setup: Result of the setup phase
+        :return: SAST tool output (or report file)
+        """
+        temp_dir, working_dir = setup
+
+        try:
+            return self._analyze(working_dir)
+        except BaseException:
+            self._remove_reports()
+            raise
+        finally:
+            temp_dir.cleanup()
+            self._deactivate()
+
+    def _format_phase(self, output: SASTOutput) -> SASTFlags:
+        """
+        Format phase: Run the sanity checks, format the SAST tool output, and cache the flags. The partial results of a
+        SAST tool that was cut off are neither checked (e.g., for the metrics of the last query) nor cached.
+
+        :param output: Result of the analysis phase
+        :return:
+        """
+        try:
+            if self._run_sanity_checks() and not self._salvaged:
+                self._sanity_checks(output)
+
+            flags = self._format(output)
+        finally:
+            self._remove_reports()
+
+        if self._result_cache is not None and not self._salvaged:
+            self._cache_flags(self._cache_key(), flags)
+
+        return flags
+
+    def tasks(self) -> List[Task]:
+        """
+        Split the run into schedulable setup/analysis/format tasks (or a single task returning the cached flags). The
+        first task is the setup task, and the result of the last task is the runner's result.
+
+        :return:
+        """
+        name = type(self).__name__
+
+        try:
+            cached_flags = self.cached_flags()
+        except Exception as ex:
+            # Only this runner fails (e.g., if the SAST tool is missing) rather than the whole run
+            error = ex
+
+            def _fail() -> SASTFlags:
+                raise error
+
+            return [Task(f"{name}:format", _fail)]
+
+        if cached_flags is not None:
+            return [Task(f"{name}:format", lambda: cached_flags)]
+
+        # The tool takes part in the CPU budget until its analysis is done
+        self._activate()
+
+        return [
+            Task(
+                f"{name}:setup",
+                self._setup_phase,
+                resource=BUILD_RESOURCE if self.builds and self.needs_setup() else None,
+            ),
+            Task(f"{name}:analyze", self._analyze_phase, [f"{name}:setup"]),
+            Task(f"{name}:format", self._format_phase, [f"{name}:analyze"]),
+        ]
+
     def run(self) -> SASTFlags:
         """
-        Setup target program, run SAST tool (+ sanity checks), and format output.
+        Setup target program, run SAST tool (+ sanity checks), and format output. If a result cache is used, the
+        formatted flags of a previous run with the same subject contents and tool configuration are returned instead.
 
         :return:
         """
         try:
-            with TemporaryDirectory() as temp_dir:
-                working_dir = self._setup(Path(temp_dir))
-                flags = self._analyze(working_dir)
+            flags = self.cached_flags()
 
-            if self._config.sanity_checks == "always" or (
-                self._config.sanity_checks == "cmake" and self._is_cmake_project
-            ):
-                self._sanity_checks(flags)
+            if flags is None:
+                flags = self._format_phase(self._analyze_phase(self._setup_phase()))
 
-            return self._format(flags)
+            return flags
 
         except Exception as ex:
             logging.error(ex)
@@ -182,44 +996,293 @@ class SASTToolRunner(ABC):
             return SASTFlags()
 
 
-class FlawfinderRunner(SASTToolRunner):
+class PerFileSASTToolRunner(SASTToolRunner):
     """
-    Flawfinder runner.
+    Abstract runner of a SAST tool whose findings only depend on the analyzed file itself.
+
+    If a result cache is used, the runner works incrementally: the flags are cached per source file, and only the
+    changed or added files are passed to the SAST tool. Since the flags only hold the file *name*, files with the same
+    name are cached (and re-analyzed) together.
+
+    In sharding mode, the files are partitioned into shards of similar size, which are analyzed by one SAST tool process
+    each (in parallel, driven by one event loop). The SAST tool output has to be SARIF, so that the outputs of the
+    shards can be merged.
     """
 
+    @abstractmethod
+    def _analyze_cmd(self, paths: List[Path], n_threads: int) -> str:
+        """
+        Get the SAST tool command analyzing the given files/directories.
+
+        :param paths:
+        :param n_threads: Number of threads the SAST tool may use
+        :return:
+        """
+        pass
+
+    def _analyze_paths(self, paths: List[Path], n_threads: int) -> SASTOutput:
+        """
+        Analyze the given files/directories using the SAST tool.
+
+        :param paths:
+        :param n_threads: Number of threads the SAST tool may use
+        :return:
+        """
+        return self._run_to_file(self._analyze_cmd(paths, n_threads))
+
+    def _analyze_shards(self, paths: List[Path]) -> SASTOutput:
+        """
+        Analyze the given files/directories (within the subject directory), sharded if the sharding mode is enabled. The
+        number of shards follows the number of reserved cores.
+
+        :param paths:
+        :return:
+        """
+        if not self._config.sharding:
+            with self._cores() as n_threads:
+                return self._analyze_paths(paths, n_threads)
+
+        files = [
+            file
+            for path in paths
+            for file in (sorted(find_files(path, exts=SOURCE_FILE_EXTS)) if path.is_dir() else [path])
+            if not any(part in VCS_DIRS for part in file.relative_to(self._subject_dir).parts)
+        ]
+
+        max_cores = self._config.num_threads if self._config.num_threads > 0 else available_cores()
+
+        with self._cores(max_cores) as n_cores:
+            shards = partition_files(files, min(n_cores, math.ceil(len(files) / MIN_SHARD_FILES)))
+
+            if len(shards) <= 1:
+                return self._analyze_paths(paths, n_cores)
+
+            logging.info(f"{type(self).__name__}: {len(files)} file(s) in {len(shards)} shard(s)")
+
+            # Each shard is analyzed in a directory of its own (rather than passing the files on the command line)
+            with TemporaryDirectory() as temp_dir:
+                shard_dirs = [
+                    link_files(shard, self._subject_dir, Path(temp_dir) / f"shard_{i}")
+                    for i, shard in enumerate(shards)
+                ]
+
+                report_files = self._run_concurrently_to_files(
+                    [self._analyze_cmd([shard_dir], 1) for shard_dir in shard_dirs]
+                )
+
+        return merge_sarif(report_files, self._report_file())
+
     def _setup(self, temp_dir: Path) -> Path:
         return self._subject_dir
 
-    def _analyze(self, working_dir: Path) -> str:
-        return run_shell_command(
-            f"{self._config.path} --dataonly --sarif {' '.join(self._config.checks)} {working_dir}"
-        )
+    def _analyze(self, working_dir: Path) -> SASTOutput:
+        return self._analyze_shards([working_dir])
+
+    def _run_incremental(self, result_cache: FileCache) -> SASTFlags:
+        """
+        Analyze the changed source files only, and merge their flags with the cached flags of the unchanged files.
+
+        :param result_cache:
+        :return:
+        """
+        try:
+            return self._analyze_incremental(result_cache)
+        finally:
+            # The runner leaves the CPU budget on every exit path (e.g., if no source file changed)
+            self._deactivate()
+
+    def _analyze_incremental(self, result_cache: FileCache) -> SASTFlags:
+        """
+        See '_run_incremental'.
+
+        :param result_cache:
+        :return:
+        """
+        config_key = self._config_key()
+        file_hashes = source_file_hashes(self._subject_dir, result_cache)
 
-    def _sanity_checks(self, string: str) -> None:
-        default_sarif_checks(string)
+        file_groups: Dict[str, List[str]] = defaultdict(list)
 
-    def _format(self, string: str) -> SASTFlags:
-        return convert_sarif(string)
+        for rel_path in sorted(file_hashes):
+            file_groups[Path(rel_path).name].append(rel_path)
 
+        group_keys = {
+            name: cache_key(config_key, *(f"{rel_path}:{file_hashes[rel_path]}" for rel_path in rel_paths))
+            for name, rel_paths in file_groups.items()
+        }
 
-class SemgrepRunner(SASTToolRunner):
+        flags = SASTFlags()
+        changed_groups = []
+
+        for name, key in group_keys.items():
+            cached_file = result_cache.get(key)
+
+            if cached_file is None:
+                changed_groups.append(name)
+            else:
+                flags.update(SASTFlags.from_csv(cached_file))
+
+        logging.info(f"{type(self).__name__}: {len(changed_groups)} of {len(group_keys)} source file(s) changed")
+
+        if len(changed_groups) == 0:
+            return flags
+
+        changed_files = [self._subject_dir / rel_path for name in changed_groups for rel_path in file_groups[name]]
+
+        try:
+            if len(changed_groups) == len(group_keys) or len(changed_files) > INCREMENTAL_MAX_FILES:
+                output = self._analyze_shards([self._subject_dir])
+            else:
+                output = self._analyze_shards(changed_files)
+        except BaseException:
+            self._remove_reports()
+            raise
+
+        try:
+            if self._run_sanity_checks():
+                self._sanity_checks(output)
+
+            new_flags = self._format(output)
+        finally:
+            self._remove_reports()
+
+        flags_per_group: Dict[str, SASTFlags] = {name: SASTFlags() for name in changed_groups}
+
+        for flag in new_flags:
+            if flag.file in flags_per_group:
+                flags_per_group[flag.file].add(flag)
+
+        # The group entries are stored as one batch, i.e., the cache is evicted once
+        with TemporaryDirectory() as temp_dir:
+            for i, (name, group_flags) in enumerate(flags_per_group.items()):
+                result_file = Path(temp_dir) / f"flags_{i}.csv"
+                group_flags.to_csv(result_file)
+
+                result_cache.put(group_keys[name], result_file, evict=False)
+
+        result_cache.evict()
+
+        flags.update(new_flags)
+
+        return flags
+
+    def tasks(self) -> List[Task]:
+        result_cache = self._result_cache
+
+        if result_cache is None:
+            return super().tasks()
+
+        self._activate()
+
+        return [Task(f"{type(self).__name__}:format", lambda: self._run_incremental(result_cache))]
+
+    def run(self) -> SASTFlags:
+        if self._result_cache is None:
+            return super().run()
+
+        try:
+            return self._run_incremental(self._result_cache)
+
+        except Exception as ex:
+            logging.error(ex)
+            logging.error(traceback.format_exc())
+
+            return SASTFlags()
+
+
+class FlawfinderRunner(PerFileSASTToolRunner):
+    """
+    Flawfinder runner.
+    """
+
+    def _analyze_cmd(self, paths: List[Path], n_threads: int) -> str:
+        return f"{self._config.path} --dataonly --sarif {' '.join(self._config.checks)} {' '.join(map(str, paths))}"
+
+    def _sanity_checks(self, output: SASTOutput) -> None:
+        default_sarif_checks(output)
+
+    def _format(self, output: SASTOutput) -> SASTFlags:
+        return convert_sarif(output)
+
+
+class SemgrepRunner(PerFileSASTToolRunner):
     """
     Semgrep runner.
+
+    The registry rules (see 'prepare') are taken from a local rule bundle if there is one, so that no network access is
+    needed.
     """
 
-    def _setup(self, temp_dir: Path) -> Path:
-        return self._subject_dir
+    def _registry_checks(self) -> List[str]:
+        return [check for check in self._config.checks if check.startswith(SEMGREP_REGISTRY_PREFIXES)]
 
-    def _analyze(self, working_dir: Path) -> str:
-        return run_shell_command(
-            f"{self._config.path} scan --quiet --sarif --jobs {self._config.num_threads} {' '.join([f'--config {check}' for check in self._config.checks])} {working_dir}"
+    def _rule_bundle(self) -> Optional[Path]:
+        """
+        Get the file of the local bundle of the registry rules (per Semgrep version, as the rule syntax evolves).
+
+        :return: Bundle file or None if there is no prepared directory
+        """
+        if self._prepared_dir is None:
+            return None
+
+        return (
+            self._prepared_dir / f"semgrep_rules_{cache_key(self._tool_version(), *self._registry_checks())[:16]}.yml"
         )
 
-    def _sanity_checks(self, string: str) -> None:
-        default_sarif_checks(string)
+    def prepare(self) -> None:
+        rule_bundle = self._rule_bundle()
+
+        if rule_bundle is None or len(self._registry_checks()) == 0:
+            return
+
+        rules = []
+
+        for check in self._registry_checks():
+            with urllib.request.urlopen(  # nosec B310
+                f"{SEMGREP_REGISTRY_URL}/{check}", timeout=REGISTRY_TIMEOUT
+            ) as response:
+                rules.extend(yaml.safe_load(response.read())["rules"])
+
+        rule_bundle.parent.mkdir(parents=True, exist_ok=True)
+
+        # JSON is valid YAML, but it is much faster to read back (see 'bundled_rule_ids')
+        with NamedTemporaryFile("w", dir=rule_bundle.parent, prefix=".", delete=False) as temp_file:
+            json.dump({"rules": rules}, temp_file)
+
+        os.replace(temp_file.name, rule_bundle)
+
+        logging.info(f"SemgrepRunner: {len(rules)} rule(s) bundled in {rule_bundle}")
+
+    def _analyze_cmd(self, paths: List[Path], n_threads: int) -> str:
+        configs = self._config.checks
+        flags = ""
+
+        rule_bundle = self._rule_bundle()
+
+        if rule_bundle is not None and rule_bundle.exists():
+            configs = [*(check for check in configs if check not in self._registry_checks()), str(rule_bundle)]
+
+            # Don't send metrics (Semgrep would contact its server for these)
+            flags = "--metrics=off "
 
-    def _format(self, string: str) -> SASTFlags:
-        return convert_sarif(string)
+        return f"{self._config.path} scan --quiet --sarif {flags}--jobs {n_threads} {' '.join([f'--config {config}' for config in configs])} {' '.join(map(str, paths))}"
+
+    def _sanity_checks(self, output: SASTOutput) -> None:
+        default_sarif_checks(output)
+
+    def _format(self, output: SASTOutput) -> SASTFlags:
+        flags = convert_sarif(output)
+
+        rule_bundle = self._rule_bundle()
+
+        if rule_bundle is None or not rule_bundle.exists():
+            return flags
+
+        # Semgrep prefixes the IDs of the rules in a local config with the path of that config, so the IDs of the
+        # bundled rules are mapped back to their registry IDs
+        rule_ids = bundled_rule_ids(rule_bundle)
+
+        return SASTFlags({flag._replace(vuln=registry_rule_id(flag.vuln, rule_ids)) for flag in flags})
 
 
 class InferRunner(SASTToolRunner):
@@ -227,35 +1290,72 @@ class InferRunner(SASTToolRunner):
     Infer runner.
     """
 
+    # In a warm workspace, the capture is continued, i.e., only the recompiled files are captured again
+    _warm_workspace: ClassVar[bool] = True
+
+    # The capture can be re-analyzed with other checkers
+    _keeps_artifact: ClassVar[bool] = True
+
+    shares_build: ClassVar[bool] = True
+
+    builds: ClassVar[bool] = True
+
     def _setup(self, temp_dir: Path) -> Path:
-        result_dir = temp_dir / "infer_res"
+        build_root = self._shared_build()
+
+        if build_root is not None:
+            result_dir = temp_dir / "infer_res"
+
+            with self._cores() as n_threads:
+                self._run(
+                    f"{self._config.path} capture --results-dir {result_dir} --jobs {n_threads} --compilation-database {COMPILATION_DATABASE_NAME}",
+                    cwd=build_root,
+                    env=SAST_SETUP_ENV,
+                )
+
+            return result_dir
+
+        workspace = self._workspace(temp_dir)
+        result_dir = workspace.parent / "infer_res"
+
+        capture_cmd = f"{self._config.path} capture --results-dir {result_dir}"
+
+        if result_dir.exists():
+            capture_cmd = f"{capture_cmd} --continue"
 
         if self._is_cmake_project:
-            setup_cmd = f'./{BUILD_SCRIPT_NAME} "{self._config.path} capture --results-dir {result_dir} --compilation-database {COMPILATION_DATABASE_NAME}"'
+            setup_cmd = f'./{BUILD_SCRIPT_NAME} "{capture_cmd} --compilation-database {COMPILATION_DATABASE_NAME}"'
         else:
-            setup_cmd = f'./{BUILD_SCRIPT_NAME} "{self._config.path} capture --results-dir {result_dir} -- make"'
+            setup_cmd = f'./{BUILD_SCRIPT_NAME} "{capture_cmd} -- make"'
 
-        run_shell_command(setup_cmd, cwd=copy_dir(self._subject_dir, temp_dir), env=SAST_SETUP_ENV)
+        self._run_build(setup_cmd, cwd=workspace, env=SAST_SETUP_ENV)
 
         return result_dir
 
-    def _analyze(self, working_dir: Path) -> str:
-        run_shell_command(
-            f"{self._config.path} analyze --results-dir {working_dir} --jobs {self._config.num_threads} --keep-going {' '.join(self._config.checks)}"
-        )
+    def _analyze(self, working_dir: Path) -> SASTOutput:
+        # A kept capture is analyzed in place, i.e., concurrent runs (e.g., with other checkers) take turns
+        with lock_dir(working_dir):
+            # The report of a previous analysis of a kept capture is replaced
+            (working_dir / "report.json").unlink(missing_ok=True)
 
-        time.sleep(5)
+            with self._cores() as n_threads:
+                self._run(
+                    f"{self._config.path} analyze --results-dir {working_dir} --jobs {n_threads} --keep-going {' '.join(self._config.checks)}"
+                )
 
-        # By default, Infer writes the results into the 'report.json' file once the analysis is complete.
-        return (working_dir / "report.json").read_text()
+            # By default, Infer writes the results into the 'report.json' file once the analysis is complete. The report
+            # is copied while the capture is locked, as the next analysis replaces it.
+            report_file = wait_for_file(working_dir / "report.json", REPORT_TIMEOUT, is_complete=is_json_file)
 
-    def _sanity_checks(self, string: str) -> None:
+            return Path(shutil.copyfile(report_file, self._report_file(".json")))
+
+    def _sanity_checks(self, output: SASTOutput) -> None:
         pass
 
-    def _format(self, string: str) -> SASTFlags:
+    def _format(self, output: SASTOutput) -> SASTFlags:
         flags = SASTFlags()
 
-        for flag in json.loads(string):
+        for flag in json.loads(read_output(output)):
             tool = "infer"
             file = flag["file"]
             line = flag["line"]
@@ -268,42 +1368,228 @@ class InferRunner(SASTToolRunner):
         return flags
 
 
+def _query_cost(query: Path) -> float:
+    """
+    Estimate the evaluation cost of a CodeQL query. Queries using the (global) data-flow/taint-tracking libraries
+    dominate the run time.
+
+    :param query:
+    :return:
+    """
+    try:
+        text = query.read_text()
+    except OSError:
+        return 1.0
+
+    return DATAFLOW_QUERY_COST if "DataFlow" in text or "TaintTracking" in text else 1.0
+
+
 class CodeQLRunner(SASTToolRunner):
     """
     CodeQL runner.
     """
 
-    def _setup(self, temp_dir: Path) -> Path:
-        result_dir = temp_dir / "codeql_res"
+    # The database can be queried with other queries
+    _keeps_artifact: ClassVar[bool] = True
 
-        if self._is_cmake_project:
-            run_shell_command(
-                f"{self._config.path} database create --language=cpp --command=./{BUILD_SCRIPT_NAME} --threads={self._config.num_threads} {result_dir}",
-                cwd=copy_dir(self._subject_dir, temp_dir),
-                env=SAST_SETUP_ENV,
+    shares_build: ClassVar[bool] = True
+
+    builds: ClassVar[bool] = True
+
+    def _version_cmd(self) -> str:
+        return f"{self._config.path} version"
+
+    def _query_cache_dir(self) -> Optional[Path]:
+        """
+        Get the compilation cache directory of the queries (compiled queries depend on the CodeQL version).
+
+        :return: Cache directory or None if there is no prepared directory
+        """
+        if self._prepared_dir is None:
+            return None
+
+        return self._prepared_dir / f"codeql_queries_{cache_key(self._config.path, self._tool_version())[:16]}"
+
+    def _query_cache_flags(self) -> str:
+        query_cache_dir = self._query_cache_dir()
+
+        if query_cache_dir is None or not query_cache_dir.exists():
+            return ""
+
+        return f"--compilation-cache={query_cache_dir} "
+
+    def prepare(self) -> None:
+        query_cache_dir = self._query_cache_dir()
+
+        if query_cache_dir is None:
+            return
+
+        with self._cores() as n_threads:
+            self._run(
+                f"{self._config.path} query compile --threads={n_threads} --compilation-cache={query_cache_dir} {' '.join(self._config.checks)}"
             )
+
+        # The runs only use the compilation cache if it exists
+        if not query_cache_dir.exists() or next(query_cache_dir.iterdir(), None) is None:
+            shutil.rmtree(query_cache_dir, ignore_errors=True)
+            raise ValueError("CodeQL queries couldn't be compiled.")
+
+        logging.info(f"CodeQLRunner: {len(self._config.checks)} queries compiled into {query_cache_dir}")
+
+    def _setup(self, temp_dir: Path) -> Path:
+        result_dir = temp_dir / "codeql_res"
+        build_root = self._shared_build()
+
+        # The database is created step by step, so that the cores are reserved for its finalization (TRAP import) only,
+        # whereas the build takes its make jobs from the budget
+        trace_cmd = f"{self._config.path} database trace-command {result_dir} --"
+
+        if build_root is not None:
+            # CodeQL extracts the code by tracing the compiler invocations, so these are replayed on a clone of the build
+            cwd = clone_dir(build_root, temp_dir)
+            build_cmd = f"{trace_cmd} sh {REPLAY_SCRIPT_NAME}"
+        elif self._is_cmake_project:
+            cwd = self._workspace(temp_dir)
+            build_cmd = f"{trace_cmd} ./{BUILD_SCRIPT_NAME}"
         else:
-            run_shell_command(
-                f'./{BUILD_SCRIPT_NAME} "{self._config.path} database create --language=cpp --command=make --threads={self._config.num_threads} {result_dir}"',
-                cwd=copy_dir(self._subject_dir, temp_dir),
-                env=SAST_SETUP_ENV,
-            )
+            cwd = self._workspace(temp_dir)
+            build_cmd = f'./{BUILD_SCRIPT_NAME} "{trace_cmd} make"'
+
+        self._run(f"{self._config.path} database init --language=cpp --source-root={cwd} {result_dir}")
+        self._run_build(build_cmd, cwd=cwd, env=SAST_SETUP_ENV)
+
+        with self._cores() as n_threads:
+            self._run(f"{self._config.path} database finalize --threads={n_threads} {result_dir}")
 
         return result_dir
 
-    def _analyze(self, working_dir: Path) -> str:
-        result_file = working_dir / "report.sarif"
+    def _analyze(self, working_dir: Path) -> SASTOutput:
+        # The reports are written outside the database (which may be kept) and parsed from the files
+        result_file = self._report_file()
 
-        run_shell_command(
-            f"{self._config.path} database analyze --output={result_file} --format=sarifv2.1.0 --threads={self._config.num_threads} {working_dir} {' '.join(self._config.checks)}"
-        )
+        try:
+            with self._cores() as n_threads:
+                if self._config.sharding:
+                    batches = self._query_batches(
+                        min(n_threads, math.ceil(len(self._config.checks) / MIN_SHARD_QUERIES))
+                    )
+                else:
+                    batches = [self._config.checks]
+
+                if len(batches) <= 1:
+                    result_files = [result_file]
+                    cmds = [self._analyze_cmd(working_dir, self._config.checks, result_file, n_threads)]
+                else:
+                    logging.info(f"CodeQLRunner: {len(self._config.checks)} queries in {len(batches)} batch(es)")
+
+                    # The batches are evaluated on the same database, each writing a report of its own
+                    result_files = [self._report_file() for _ in batches]
+                    cmds = [
+                        self._analyze_cmd(working_dir, batch, file, max(1, n_threads // len(batches)))
+                        for batch, file in zip(batches, result_files)
+                    ]
+
+                if len(cmds) == 1:
+                    self._run(cmds[0])
+                else:
+                    self._run_concurrently(cmds)
+        except ResourceLimitError as err:
+            self._salvage(err)
+
+            return self._interpret_partial_results(working_dir, result_file)
+
+        for file in result_files:
+            wait_for_file(file, REPORT_TIMEOUT, is_complete=is_json_file)
+
+        # The batch holding the sanity check queries comes last
+        return result_files[0] if len(result_files) == 1 else merge_sarif(result_files, self._report_file())
+
+    def _analyze_cmd(self, database_dir: Path, queries: List[str], result_file: Path, n_threads: int) -> str:
+        """
+        Get the command evaluating queries on the CodeQL database.
+
+        :param database_dir:
+        :param queries:
+        :param result_file:
+        :param n_threads:
+        :return:
+        """
+        return f"{self._config.path} database analyze --output={result_file} --format=sarifv2.1.0 --threads={n_threads} {self._query_cache_flags()}{database_dir} {' '.join(queries)}"
 
-        time.sleep(5)
+    def _query_batches(self, n_batches: int) -> List[List[str]]:
+        """
+        Split the queries into batches of similar (estimated) cost. The sanity check queries are put into the last
+        batch, since the sanity checks inspect the last run of the (merged) SARIF report.
+
+        :param n_batches:
+        :return: Non-empty batches
+        """
+        queries = {Path(shlex.split(check)[0]): check for check in self._config.checks}
 
-        return result_file.read_text()
+        sanity_queries = [
+            query
+            for query in queries
+            if any(query.as_posix().endswith(f"/{suffix}") for suffix in CODEQL_SANITY_QUERIES)
+        ]
 
-    def _sanity_checks(self, string: str) -> None:
-        sarif_data = default_sarif_checks(string)
+        batches = partition_files(
+            [query for query in queries if query not in sanity_queries], n_batches, cost=_query_cost
+        ) or [[]]
+
+        # Keep the configured order within the batches
+        order = {query: i for i, query in enumerate(queries)}
+        batches = [sorted(batch, key=order.__getitem__) for batch in batches]
+
+        batches[-1].extend(sanity_queries)
+
+        return [[queries[query] for query in batch] for batch in batches]
+
+    def _interpret_partial_results(self, database_dir: Path, result_file: Path) -> Path:
+        """
+        Interpret the results of the queries that CodeQL completed before it was cut off. The result of each query is
+        stored in the database (as BQRS file) as soon as the query is evaluated.
+
+        :param database_dir:
+        :param result_file:
+        :return: SARIF report file
+        """
+        results_dir = database_dir / "results"
+
+        # The results are stored by query pack and path of the query within the pack, i.e., the query (path) of a
+        # result ends with (at least) the directory and name of the result file
+        result_suffixes = {
+            "/".join(parts[i:])
+            for parts in (
+                file.relative_to(results_dir).with_suffix(".ql").parts for file in find_files(results_dir, [".bqrs"])
+            )
+            for i in range(len(parts) - 1)
+        }
+
+        queries = [
+            check
+            for check in self._config.checks
+            if any(Path(shlex.split(check)[0]).as_posix().endswith(f"/{suffix}") for suffix in result_suffixes)
+        ]
+
+        if len(queries) == 0:
+            raise ValueError("CodeQL was cut off before any query was completed.")
+
+        logging.info(f"CodeQLRunner: Results of {len(queries)} of {len(self._config.checks)} queries salvaged")
+
+        # The time budget of the tool is used up, so the interpretation is bounded on its own
+        try:
+            run_shell_command(
+                f"{self._config.path} database interpret-results --output={result_file} --format=sarifv2.1.0 {database_dir} {' '.join(queries)}",
+                timeout=SALVAGE_TIMEOUT,
+                memory_limit=self._config.memory_limit if self._config.memory_limit > 0 else None,
+            )
+        except ResourceLimitError as err:
+            raise ValueError(f"CodeQL results couldn't be salvaged: {err}") from err
+
+        return result_file
+
+    def _sanity_checks(self, output: SASTOutput) -> None:
+        sarif_data = default_sarif_checks(output)
 
         n_runs = len(sarif_data["runs"])
 
@@ -331,8 +1617,8 @@ class CodeQLRunner(SASTToolRunner):
         if user_loc == 0:
             raise ValueError("No user C/C++ source code found in the CodeQL database.")
 
-    def _format(self, string: str) -> SASTFlags:
-        return convert_sarif(string)
+    def _format(self, output: SASTOutput) -> SASTFlags:
+        return convert_sarif(output)
 
 
 class ClangScanRunner(SASTToolRunner):
@@ -340,30 +1626,59 @@ class ClangScanRunner(SASTToolRunner):
     Clang analyzer (scan-build) runner.
     """
 
+    shares_build: ClassVar[bool] = True
+
+    builds: ClassVar[bool] = True
+
+    def _version_cmd(self) -> str:
+        return "clang --version"
+
     def _setup(self, temp_dir: Path) -> Path:
         result_dir = temp_dir / "clang-scan_res"
+        build_root = self._shared_build()
 
-        run_shell_command(
-            f"./{BUILD_SCRIPT_NAME} \"{self._config.path} --use-cc clang --use-c++ clang++ -o {result_dir} --keep-empty -sarif {' '.join(self._config.checks)} make\"",
-            cwd=copy_dir(self._subject_dir, temp_dir),
-            env={**SAST_SETUP_ENV, **{CLANG_SCAN_ENVVAR: self._config.path}},
-        )
+        scan_cmd = f"{self._config.path} --use-cc clang --use-c++ clang++ -o {result_dir} --keep-empty -sarif {' '.join(self._config.checks)}"
+
+        try:
+            if build_root is not None:
+                # scan-build analyzes the compiler invocations, so these are replayed on a clone of the build
+                self._run_build(
+                    f"{scan_cmd} sh {REPLAY_SCRIPT_NAME}",
+                    cwd=clone_dir(build_root, temp_dir),
+                    env={**SAST_SETUP_ENV, **{CLANG_SCAN_ENVVAR: self._config.path}},
+                )
+            else:
+                self._run_build(
+                    f'./{BUILD_SCRIPT_NAME} "{scan_cmd} make"',
+                    cwd=self._workspace(temp_dir),
+                    env={**SAST_SETUP_ENV, **{CLANG_SCAN_ENVVAR: self._config.path}},
+                )
+        except ResourceLimitError as err:
+            # The SARIF files of the translation units analyzed so far are kept
+            if len(find_files(result_dir, exts=[".sarif"])) == 0:
+                raise
+
+            self._salvage(err)
 
         return result_dir
 
     def _analyze(self, working_dir: Path) -> str:
         result_files = find_files(working_dir, exts=[".sarif"])
 
+        if self._salvaged:
+            # Skip the SARIF file(s) that were being written when scan-build was cut off
+            result_files = {file for file in result_files if is_json_file(file)}
+
         # Clang analyzer writes the results of each checker into a separate SARIF file. Therefore, we append the results
         # (JSON string) of each file as one line to the return string.
         return os.linesep.join(map(lambda file: json.dumps(json.loads(file.read_text()), indent=None), result_files))
 
-    def _sanity_checks(self, string: str) -> None:
-        for sarif_str in string.split(os.linesep):
+    def _sanity_checks(self, output: SASTOutput) -> None:
+        for sarif_str in read_output(output).split(os.linesep):
             default_sarif_checks(sarif_str)
 
-    def _format(self, string: str) -> SASTFlags:
-        nested_flags = map(convert_sarif, string.split(os.linesep))
+    def _format(self, output: SASTOutput) -> SASTFlags:
+        nested_flags = map(convert_sarif, read_output(output).split(os.linesep))
 
         return SASTFlags(set(chain(*nested_flags)))
 
@@ -375,6 +1690,15 @@ class SanitizerRunner(SASTToolRunner):
 
     _report_name: ClassVar[str] = "report.csv"
 
+    # The reports are written by the (patched) compiler, i.e., an incremental build would only report the recompiled
+    # translation units
+    _warm_workspace: ClassVar[bool] = False
+
+    builds: ClassVar[bool] = True
+
+    def _version_cmd(self) -> str:
+        return "clang --version"
+
     @abstractmethod
     def _env_vars(self, result_file: Path) -> Dict[str, str]:
         pass
@@ -382,22 +1706,27 @@ class SanitizerRunner(SASTToolRunner):
     def _setup(self, temp_dir: Path) -> Path:
         result_file = temp_dir / self._report_name
 
-        run_shell_command(
-            f"./{BUILD_SCRIPT_NAME}", cwd=copy_dir(self._subject_dir, temp_dir), env=self._env_vars(result_file)
-        )
+        try:
+            self._run_build(f"./{BUILD_SCRIPT_NAME}", cwd=self._workspace(temp_dir), env=self._env_vars(result_file))
+        except ResourceLimitError as err:
+            # The sanitizer reports written so far are kept
+            if not result_file.exists():
+                raise
+
+            self._salvage(err)
 
         return temp_dir
 
     def _analyze(self, working_dir: Path) -> str:
         return (working_dir / self._report_name).read_text()
 
-    def _sanity_checks(self, string: str) -> None:
+    def _sanity_checks(self, output: SASTOutput) -> None:
         pass
 
-    def _format(self, string: str) -> SASTFlags:
+    def _format(self, output: SASTOutput) -> SASTFlags:
         flags = SASTFlags()
 
-        for _line in string.split(os.linesep):
+        for _line in read_output(output).split(os.linesep):
             if _line != "":
                 vals = _line.split(",")
 
@@ -417,7 +1746,7 @@ class AddressSanitizerRunner(SanitizerRunner):
     """
 
     def _env_vars(self, result_file: Path) -> Dict[str, str]:
-        setup_env = SAST_SETUP_ENV
+        setup_env = SAST_SETUP_ENV.copy()
 
         for flag in ["CFLAGS", "CXXFLAGS"]:
             setup_env[flag] = f"{setup_env[flag]} -g -fsanitize=address"
@@ -433,7 +1762,7 @@ class MemorySanitizerRunner(SanitizerRunner):
     """
 
     def _env_vars(self, result_file: Path) -> Dict[str, str]:
-        setup_env = SAST_SETUP_ENV
+        setup_env = SAST_SETUP_ENV.copy()
 
         for flag in ["CFLAGS", "CXXFLAGS"]:
             setup_env[flag] = f"{setup_env[flag]} -g -fsanitize=memory"
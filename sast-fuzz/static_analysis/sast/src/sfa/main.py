@@ -14,14 +14,17 @@
 
 import logging
 import sys
+import traceback
+from itertools import chain
 from pathlib import Path
-from typing import List, Optional
+from tempfile import TemporaryDirectory
+from typing import Dict, Iterable, List, Optional
 
 import typer
 from typing_extensions import Annotated
 
 from sfa import AppConfig
-from sfa.analysis import SASTFlags
+from sfa.analysis import SASTFlags, SASTFlagType, read_flags_csv, unique_flags, write_flags_csv
 from sfa.analysis.factory import (
     SASTFlagFilterFactory,
     SASTFlagFilterMode,
@@ -30,8 +33,13 @@ from sfa.analysis.factory import (
     SASTTool,
     SASTToolRunnerFactory,
 )
-from sfa.analysis.tool_runner import BUILD_SCRIPT_NAME, SASTToolRunner
-from sfa.utils.proc import run_with_multiproc
+from sfa.analysis.grouping import group_all
+from sfa.analysis.tool_runner import BUILD_RESOURCE, BUILD_SCRIPT_NAME, SASTToolRunner, is_cmake_project, shared_build
+from sfa.utils.cache import FileCache
+from sfa.utils.fs import remove_stale_dirs
+from sfa.utils.history import RunHistory
+from sfa.utils.jobserver import CPUBudget, available_cores, available_memory
+from sfa.utils.scheduler import Task, TaskError, prioritize_critical_path, run_dag
 
 logging.basicConfig(format="%(asctime)s SFA[%(levelname)s]: %(message)s", level=logging.INFO, stream=sys.stdout)
 
@@ -41,41 +49,221 @@ DEFAULT_CONFIG_FILE = Path.cwd() / "config.yml"
 # Path of the default output file.
 DEFAULT_OUTPUT_FILE = Path.cwd() / "output.csv"
 
+# Sub-directories of the cache directory
+RESULT_CACHE_DIR_NAME = "results"
+WORKSPACE_DIR_NAME = "workspaces"
+ARTIFACT_DIR_NAME = "artifacts"
+PREPARED_DIR_NAME = "prepared"
+
+# Name of the run history file (in the cache directory)
+HISTORY_FILE_NAME = "history.json"
+
 app = typer.Typer()
 
 
-def _starter(runner: SASTToolRunner) -> SASTFlags:
-    return runner.run()
+# Name of the shared build task
+SHARED_BUILD_TASK = "shared-build"
+
+# Default max. number of concurrent builds
+DEFAULT_MAX_BUILDS = 2
+
+
+def _run_shared_build(subject_dir: Path, build_dir: Path, cpu_budget: CPUBudget) -> bool:
+    try:
+        return shared_build(subject_dir, build_dir, cpu_budget)
+
+    except Exception as ex:
+        logging.error(ex)
+        logging.error(traceback.format_exc())
+
+        # The tools build the subject themselves
+        return False
 
 
 def run_tools(
-    flags: SASTFlags, tools: List[SASTTool], subject_dir: Path, app_config: AppConfig, parallel: bool
+    flags: SASTFlags,
+    tools: List[SASTTool],
+    subject_dir: Path,
+    app_config: AppConfig,
+    parallel: bool,
+    use_cache: bool = True,
+    warm_workspaces: bool = False,
+    keep_artifacts: bool = False,
+    share_build: bool = True,
+    max_builds: int = DEFAULT_MAX_BUILDS,
+    n_jobs: Optional[int] = None,
 ) -> SASTFlags:
     """
-    Run SAST tools.
+    Run SAST tools. The runs are split into setup (build), analysis, and format tasks, which are scheduled as DAG, so
+    that, e.g., the analyses of build-less tools overlap with the builds of the other tools. The tools (and their
+    builds) share the configured CPU budget.
+
+    The wall time and peak memory usage of each task is recorded in a run history. Based on the previous runs, the
+    tasks on the longest path through the DAG are started first, and tasks are only started concurrently if their
+    (estimated) memory usage fits into the memory budget.
 
     :param flags:
     :param tools:
     :param subject_dir:
     :param app_config:
     :param parallel:
+    :param use_cache: If true, reuse the results of previous runs on the same subject contents
+    :param warm_workspaces: If true, keep the tool workspaces (and builds) in the cache directory across runs
+    :param keep_artifacts: If true, keep the CodeQL databases and Infer captures in the cache directory across runs
+    :param share_build: If true, build a Make-based subject once for all build-based tools
+    :param max_builds: Max. number of concurrent builds (if run in parallel)
+    :param n_jobs: Max. number of concurrently running tasks (default: all tasks if run in parallel, otherwise, one)
     :return:
     """
     logging.info(f"SAST tools: {', '.join([t.value for t in tools])}")
 
-    n_jobs = 1 if not parallel else len(tools)
-    tool_runners = [(runner,) for runner in SASTToolRunnerFactory((subject_dir, app_config)).get_instances(tools)]
+    result_cache = None
+    workspace_root = None
+    artifact_root = None
+
+    if use_cache:
+        result_cache = FileCache(app_config.cache.dir / RESULT_CACHE_DIR_NAME, app_config.cache.max_size * 1024 * 1024)
+
+    if warm_workspaces:
+        workspace_root = app_config.cache.dir / WORKSPACE_DIR_NAME
+
+        for workspace in remove_stale_dirs(workspace_root, app_config.cache.workspace_max_age * 24 * 60 * 60):
+            logging.info(f"Removed stale workspace: {workspace}")
+
+    if keep_artifacts:
+        artifact_root = app_config.cache.dir / ARTIFACT_DIR_NAME
+
+        for artifact in remove_stale_dirs(artifact_root, app_config.cache.workspace_max_age * 24 * 60 * 60):
+            logging.info(f"Removed stale artifact: {artifact}")
+
+    history = RunHistory(app_config.cache.dir / HISTORY_FILE_NAME)
+    subject_key = str(subject_dir.resolve())
+
+    n_cores = app_config.resources.cpu_budget or available_cores()
+    concurrent = parallel or (n_jobs or 1) > 1
+
+    logging.info(f"CPU budget: {n_cores} core(s)")
+
+    with TemporaryDirectory() as build_dir, CPUBudget(n_cores, concurrent=concurrent) as cpu_budget:
+        runners: List[SASTToolRunner] = list(
+            SASTToolRunnerFactory(
+                (
+                    subject_dir,
+                    app_config,
+                    result_cache,
+                    workspace_root,
+                    Path(build_dir),
+                    cpu_budget,
+                    artifact_root,
+                    app_config.cache.dir / PREPARED_DIR_NAME,
+                )
+            ).get_instances(tools)
+        )
+
+        # Cached runs consist of a single task
+        runner_tasks = [runner.tasks() for runner in runners]
+        tasks = list(chain.from_iterable(runner_tasks))
+
+        # A shared build only pays off if (at least) two tools would build the subject otherwise
+        sharing_tasks = [
+            _tasks
+            for runner, _tasks in zip(runners, runner_tasks)
+            if runner.shares_build and len(_tasks) > 1 and runner.needs_setup()
+        ]
+
+        if share_build and len(sharing_tasks) > 1 and not is_cmake_project(subject_dir):
+            tasks.append(
+                Task(
+                    SHARED_BUILD_TASK,
+                    lambda: _run_shared_build(subject_dir, Path(build_dir), cpu_budget),
+                    resource=BUILD_RESOURCE,
+                    priority=1.0,
+                )
+            )
+
+            for _tasks in sharing_tasks:
+                _tasks[0].after.append(SHARED_BUILD_TASK)
+
+        durations = {}
+
+        for task in tasks:
+            estimate = history.estimate(subject_key, task.name)
+
+            if estimate is not None:
+                durations[task.name] = estimate.wall_time
+                task.memory = estimate.peak_rss
+
+            task.func = history.tracked(subject_key, task.name, task.func)
+
+        if len(durations) > 0:
+            prioritize_critical_path(tasks, durations)
+
+        results = run_dag(
+            tasks,
+            n_jobs or (len(tasks) if parallel else 1),
+            {BUILD_RESOURCE: max_builds},
+            memory_limit=app_config.resources.memory_budget or available_memory(),
+        )
+
+    try:
+        history.save()
+    except OSError as ex:
+        logging.warning(f"Run history couldn't be saved: {ex}")
+
+    for _tasks in runner_tasks:
+        result = results[_tasks[-1].name]
+
+        if isinstance(result, BaseException):
+            # Report the failed task (rather than the skipped tasks depending on it)
+            task, error = next(
+                (_task, results[_task.name])
+                for _task in _tasks
+                if isinstance(results[_task.name], BaseException) and not isinstance(results[_task.name], TaskError)
+            )
+
+            logging.error(f"{task.name}: {error}")
+            logging.error("".join(traceback.format_exception(type(error), error, error.__traceback__)))
+        else:
+            flags.update(result)
 
-    nested_flags = run_with_multiproc(_starter, tool_runners, n_jobs)
+    return flags
 
-    flags.update(*map(SASTFlags, nested_flags))
 
-    return flags
+def prepare_tools(tools: List[SASTTool], app_config: AppConfig) -> bool:
+    """
+    Prepare SAST tool runs ahead of time, i.e., precompile the CodeQL queries and download the Semgrep registry rules
+    into the cache directory. The runs use the prepared files automatically (and work offline).
 
+    :param tools:
+    :param app_config:
+    :return: True if all tools could be prepared, otherwise, False
+    """
+    # The runners are only used for the preparation, i.e., no subject is analyzed
+    runners: List[SASTToolRunner] = list(
+        SASTToolRunnerFactory(
+            (Path.cwd(), app_config, None, None, None, None, None, app_config.cache.dir / PREPARED_DIR_NAME)
+        ).get_instances(tools)
+    )
+
+    success = True
+
+    for tool, runner in zip(tools, runners):
+        try:
+            runner.prepare()
+        except Exception as ex:
+            logging.error(f"{tool.value}: {ex}")
+            logging.error(traceback.format_exc())
+
+            success = False
 
-def filter_flags(flags: SASTFlags, filter_modes: List[SASTFlagFilterMode], inspec_file: Path) -> SASTFlags:
+    return success
+
+
+def filter_flags(
+    flags: Iterable[SASTFlagType], filter_modes: List[SASTFlagFilterMode], inspec_file: Path
+) -> Iterable[SASTFlagType]:
     """
-    Filter SAST flags.
+    Filter SAST flags (lazily, the flags are streamed through the filters).
 
     :param flags:
     :param filter_modes:
@@ -83,25 +271,37 @@ def filter_flags(flags: SASTFlags, filter_modes: List[SASTFlagFilterMode], inspe
     :return:
     """
     for flag_filter in SASTFlagFilterFactory(inspec_file).get_instances(filter_modes):
-        flags = flag_filter.filter(flags)
+        flags = flag_filter.filter_iter(flags)
 
     return flags
 
 
 def group_flags(
-    flags: SASTFlags, grouping_mode: SASTFlagGroupingMode, inspec_file: Path, app_config: AppConfig
-) -> SASTFlags:
+    flags: Iterable[SASTFlagType], grouping_modes: List[SASTFlagGroupingMode], inspec_file: Path, app_config: AppConfig
+) -> Dict[SASTFlagGroupingMode, SASTFlags]:
     """
-    Group SAST flags.
+    Group SAST flags (the flags are resolved to their code blocks once for all grouping modes).
 
     :param flags:
-    :param grouping_mode:
+    :param grouping_modes:
     :param inspec_file:
+    :param app_config:
     :return:
     """
-    flag_grouping = SASTFlagGroupingFactory((inspec_file, app_config)).get_instance(grouping_mode)
+    flag_groupings = list(SASTFlagGroupingFactory((inspec_file, app_config)).get_instances(grouping_modes))
 
-    return flag_grouping.group(flags)
+    return dict(zip(grouping_modes, group_all(flag_groupings, flags)))
+
+
+def grouping_output_file(output_file: Path, grouping_mode: SASTFlagGroupingMode) -> Path:
+    """
+    Get the CSV output file of a grouping mode (if multiple grouping modes are applied).
+
+    :param output_file:
+    :param grouping_mode:
+    :return:
+    """
+    return output_file.with_name(f"{output_file.stem}_{grouping_mode.value}{output_file.suffix}")
 
 
 @app.command()
@@ -173,7 +373,54 @@ def main(
             help="SAST tool(s) to be used for the analysis. Note: To run the tools, the subject directory must be specified (--subject).",
         ),
     ] = None,
+    prepare: Annotated[
+        bool,
+        typer.Option(
+            "--prepare",
+            is_flag=True,
+            help="Precompile the CodeQL queries and download the Semgrep rules into the cache directory (of the given tools, default: all), so that later runs start faster and work offline. Then exit.",
+        ),
+    ] = False,
     parallel: Annotated[bool, typer.Option("--parallel", is_flag=True, help="Run the SAST tools in parallel.")] = False,
+    n_jobs: Annotated[
+        Optional[int],
+        typer.Option(
+            "--jobs",
+            "-j",
+            min=1,
+            help="Max. number of concurrently running SAST tool tasks (setup, analysis, format). Implies --parallel.",
+        ),
+    ] = None,
+    no_cache: Annotated[
+        bool, typer.Option("--no-cache", is_flag=True, help="Don't reuse (or store) cached SAST tool results.")
+    ] = False,
+    warm_workspaces: Annotated[
+        bool,
+        typer.Option(
+            "--warm-workspaces",
+            is_flag=True,
+            help="Keep the tool workspaces in the cache directory, so that the subject is rebuilt incrementally.",
+        ),
+    ] = False,
+    keep_artifacts: Annotated[
+        bool,
+        typer.Option(
+            "--keep-artifacts",
+            is_flag=True,
+            help="Keep the CodeQL databases and Infer captures in the cache directory, so that the subject isn't rebuilt if only the checks change.",
+        ),
+    ] = False,
+    max_builds: Annotated[
+        int, typer.Option("--max-builds", min=1, help="Max. number of concurrent subject builds (with --parallel).")
+    ] = DEFAULT_MAX_BUILDS,
+    no_shared_build: Annotated[
+        bool,
+        typer.Option(
+            "--no-shared-build",
+            is_flag=True,
+            help="Don't build Make-based subjects once for Infer, CodeQL, and clang-scan (each tool builds the subject).",
+        ),
+    ] = False,
     filter_modes: Annotated[
         Optional[List[SASTFlagFilterMode]],
         typer.Option(
@@ -181,14 +428,20 @@ def main(
             help="Filter(s) to be applied on the SAST flags. Note: To apply the filters, the SFI file must be specified (--inspection).",
         ),
     ] = None,
-    grouping_mode: Annotated[
-        Optional[SASTFlagGroupingMode],
+    grouping_modes: Annotated[
+        Optional[List[SASTFlagGroupingMode]],
         typer.Option(
             "--grouping",
-            help="Grouping to be applied on the SAST flags. Note: To apply the grouping, the SFI file must be specified (--inspection).",
+            help="Grouping(s) to be applied on the SAST flags. Note: To apply the grouping, the SFI file must be specified (--inspection). If multiple groupings are specified, each one is written to '<output>_<grouping>.csv'.",
         ),
     ] = None,
 ) -> None:
+    if prepare:
+        if not prepare_tools(tools or list(SASTTool), AppConfig.from_yaml(config_file)):
+            raise typer.Exit(code=1)
+
+        return
+
     if tools:
         if subject_dir is None:
             raise typer.BadParameter("Subject directory is not specified.", param_hint="--subject")
@@ -196,20 +449,40 @@ def main(
         if not (subject_dir / BUILD_SCRIPT_NAME).exists():
             raise typer.BadParameter("Build script couldn't be found in the subject directory.", param_hint="--subject")
 
-    if filter_modes or grouping_mode:
+    if filter_modes or grouping_modes:
         if inspec_file is None:
             raise typer.BadParameter("SASTFuzz Inspector file is not specified.", param_hint="--inspection")
 
     app_config = AppConfig.from_yaml(config_file)
 
-    flags = SASTFlags()
-    flags.update(*map(SASTFlags.from_csv, flag_files or []))
+    # The flags of the input files are streamed through the pipeline and only materialized where necessary
+    flags: Iterable[SASTFlagType] = chain.from_iterable(map(read_flags_csv, flag_files or []))
 
     if tools:
-        flags = run_tools(flags, tools, subject_dir, app_config, parallel)  # type: ignore
+        flags = run_tools(
+            SASTFlags(set(flags)),
+            tools,
+            subject_dir,  # type: ignore
+            app_config,
+            parallel,
+            use_cache=not no_cache,
+            warm_workspaces=warm_workspaces,
+            keep_artifacts=keep_artifacts,
+            share_build=not no_shared_build,
+            max_builds=max_builds,
+            n_jobs=n_jobs,
+        )
     if filter_modes:
         flags = filter_flags(flags, filter_modes, inspec_file)  # type: ignore
-    if grouping_mode:
-        flags = group_flags(flags, grouping_mode, inspec_file, app_config)  # type: ignore
+    if grouping_modes:
+        grouped_flags = group_flags(flags, list(dict.fromkeys(grouping_modes)), inspec_file, app_config)  # type: ignore
+
+        if len(grouped_flags) == 1:
+            flags = grouped_flags[grouping_modes[0]]
+        else:
+            for grouping_mode, _grouped_flags in grouped_flags.items():
+                _grouped_flags.to_csv(grouping_output_file(output_file, grouping_mode))
+
+            return
 
-    flags.to_csv(output_file)
+    write_flags_csv(flags if isinstance(flags, SASTFlags) else unique_flags(flags), output_file)
@@ -0,0 +1,133 @@
+# Copyright 2023-2024 Chair for Software & Systems Engineering, TUM
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import hashlib
+import os
+import shutil
+from pathlib import Path
+from tempfile import NamedTemporaryFile
+from typing import Iterable, List, Optional, Tuple
+
+
+def cache_key(*parts: str) -> str:
+    """
+    Compute a cache key from a sequence of strings.
+
+    :param parts:
+    :return: Hex digest
+    """
+    digest = hashlib.blake2b(digest_size=32)
+
+    for part in parts:
+        digest.update(part.encode())
+        digest.update(b"\0")
+
+    return digest.hexdigest()
+
+
+class FileCache:
+    """
+    Content-addressed file cache with a size limit and least-recently-used (LRU) eviction.
+
+    Each entry is a single file named after its key. The modification time of an entry is refreshed on every hit, so
+    the oldest entries are the least recently used ones. Entries are written atomically; thus, a cache directory can be
+    shared by concurrent processes.
+    """
+
+    def __init__(self, root_dir: Path, max_size: int) -> None:
+        self._root_dir = root_dir
+        self._max_size = max_size
+
+    def _entry(self, key: str) -> Path:
+        return self._root_dir / key[:2] / key
+
+    def _entries(self) -> Iterable[Path]:
+        if not self._root_dir.exists():
+            return []
+
+        return (file for file in self._root_dir.glob("??/*") if not file.name.startswith("."))
+
+    def get(self, key: str) -> Optional[Path]:
+        """
+        Look up a cache entry.
+
+        :param key:
+        :return: Path of the cached file or None if there is no entry for the key
+        """
+        entry = self._entry(key)
+
+        try:
+            os.utime(entry)
+        except FileNotFoundError:
+            return None
+
+        return entry
+
+    def put(self, key: str, file: Path, evict: bool = True) -> Path:
+        """
+        Store a copy of a file under the given key (and evict the least recently used entries if necessary).
+
+        :param key:
+        :param file:
+        :param evict: If false, the eviction is left to the caller (e.g., once after storing a batch of entries), since
+            it inspects the whole cache
+        :return: Path of the cached file
+        """
+        entry = self._entry(key)
+        entry.parent.mkdir(parents=True, exist_ok=True)
+
+        with NamedTemporaryFile(dir=entry.parent, prefix=".", delete=False) as temp_file:
+            with file.open("rb") as src_file:
+                shutil.copyfileobj(src_file, temp_file)
+
+        os.replace(temp_file.name, entry)
+
+        if evict:
+            self.evict()
+
+        return entry
+
+    def evict(self) -> None:
+        """
+        Remove the least recently used entries until the cache size is within the limit.
+
+        :return:
+        """
+        entries: List[Tuple[float, int, Path]] = []
+
+        for entry in self._entries():
+            try:
+                stat = entry.stat()
+            except FileNotFoundError:
+                continue
+
+            entries.append((stat.st_mtime, stat.st_size, entry))
+
+        size = sum(entry_size for _, entry_size, _ in entries)
+
+        for _, entry_size, entry in sorted(entries, key=lambda _entry: _entry[0]):
+            if size <= self._max_size:
+                break
+
+            entry.unlink(missing_ok=True)
+            size -= entry_size
+
+    def clear(self) -> None:
+        """
+        Remove all cache entries.
+
+        :return:
+        """
+        for entry in self._entries():
+            entry.unlink(missing_ok=True)
@@ -0,0 +1,129 @@
+# Copyright 2023-2024 Chair for Software & Systems Engineering, TUM
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import json
+import os
+import shlex
+import sys
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from typing import Dict, List, Sequence
+
+from sfa.utils.proc import run_shell_command
+
+# Extensions of the files compiled as translation units
+TRANSLATION_UNIT_EXTS: List[str] = [".c", ".C", ".cc", ".CC", ".cpp", ".CPP", ".cxx", ".c++", ".ec", ".pgc", ".pcc"]
+
+# Compiler wrapper logging its invocation (as JSON line) before running the actual compiler
+COMPILER_WRAPPER_TEMPLATE: str = """#!{python}
+import json, os, sys
+
+compiler = {compiler!r}
+
+with open({log_file!r}, "a") as log_file:
+    log_file.write(json.dumps({{"directory": os.getcwd(), "arguments": compiler + sys.argv[1:]}}) + "\\n")
+
+os.execvp(compiler[0], compiler + sys.argv[1:])
+"""
+
+
+def _translation_units(call: Dict) -> List[str]:
+    return [
+        arg for arg in call["arguments"][1:] if not arg.startswith("-") and Path(arg).suffix in TRANSLATION_UNIT_EXTS
+    ]
+
+
+def _write_wrapper(wrapper_file: Path, compiler: str, log_file: Path) -> None:
+    wrapper_file.write_text(
+        COMPILER_WRAPPER_TEMPLATE.format(python=sys.executable, compiler=shlex.split(compiler), log_file=str(log_file))
+    )
+    wrapper_file.chmod(0o755)
+
+
+def intercept_build(build_cmd: str, cwd: Path, env: Dict[str, str], pass_fds: Sequence[int] = ()) -> List[Dict]:
+    """
+    Run a build and record the compiler invocations. The build has to respect the CC/CXX environment variables.
+
+    :param build_cmd:
+    :param cwd:
+    :param env: Build environment (CC/CXX hold the actual compilers)
+    :param pass_fds: File descriptors inherited by the build (e.g., of a jobserver)
+    :return: Compiler invocations that compile translation units of the build (e.g., no link steps or configure
+        probes), with the working directory and the arguments of each invocation
+    """
+    with TemporaryDirectory() as temp_dir:
+        log_file = Path(temp_dir) / "compiler_calls.jsonl"
+        log_file.touch()
+
+        cc_wrapper = Path(temp_dir) / "cc"
+        cxx_wrapper = Path(temp_dir) / "c++"
+
+        _write_wrapper(cc_wrapper, env.get("CC", "cc"), log_file)
+        _write_wrapper(cxx_wrapper, env.get("CXX", "c++"), log_file)
+
+        run_shell_command(
+            build_cmd, cwd=cwd, env={**env, **{"CC": str(cc_wrapper), "CXX": str(cxx_wrapper)}}, pass_fds=pass_fds
+        )
+
+        calls = [json.loads(line) for line in log_file.read_text().splitlines() if line != ""]
+
+    # Drop duplicate invocations (e.g., of re-run build steps)
+    calls = list({json.dumps(call, sort_keys=True): call for call in calls}.values())
+
+    return [
+        call for call in calls if any((Path(call["directory"]) / file).exists() for file in _translation_units(call))
+    ]
+
+
+def to_compilation_database(calls: List[Dict]) -> List[Dict]:
+    """
+    Convert compiler invocations into compilation database entries (one per compiled translation unit).
+
+    :param calls:
+    :return:
+    """
+    return [
+        {"directory": call["directory"], "arguments": call["arguments"], "file": file}
+        for call in calls
+        for file in _translation_units(call)
+    ]
+
+
+def write_replay_script(calls: List[Dict], root_dir: Path, script_file: Path) -> None:
+    """
+    Write a shell script re-running the compiler invocations of a build (relative to the directory it is started from).
+    The compilers are taken from the CC/CXX environment variables, so that build wrappers like scan-build can intercept
+    the replayed build.
+
+    :param calls:
+    :param root_dir: Root directory of the recorded build
+    :param script_file:
+    :return:
+    """
+    lines = ["#!/bin/sh"]
+
+    for call in calls:
+        directory = Path(call["directory"])
+
+        try:
+            directory = directory.relative_to(root_dir)
+        except ValueError:
+            pass
+
+        compiler = "${CXX:-c++}" if "++" in Path(call["arguments"][0]).name else "${CC:-cc}"
+
+        lines.append(f"(cd {shlex.quote(str(directory))} && {compiler} {shlex.join(call['arguments'][1:])})")
+
+    script_file.write_text(os.linesep.join(lines) + os.linesep)
+    script_file.chmod(0o755)
@@ -12,10 +12,38 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import errno
+import fnmatch
+import hashlib
+import heapq
+import json
+import os
 import shutil
-from os import walk
+import time
+from contextlib import contextmanager
+from os import readlink, walk
 from pathlib import Path
-from typing import List, Optional, Set
+from typing import Callable, Iterable, Iterator, List, Optional, Set
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover
+    fcntl = None  # type: ignore
+
+# Version control directories (not part of the analyzed program)
+VCS_DIRS: List[str] = [".git", ".hg", ".svn"]
+
+# Name of the file (in a synced directory) listing the files synced from the source directory
+SYNC_MANIFEST_NAME: str = ".sfa_sync.json"
+
+# Name of the lock file in a directory shared between processes (see 'lock_dir')
+LOCK_FILE_NAME: str = ".sfa.lock"
+
+# Linux ioctl request for cloning a file (reflink, supported by Btrfs, XFS, ...)
+FICLONE: int = 0x40049409
+
+# Errors indicating that reflinks/hardlinks are not supported (between the source and destination)
+LINK_UNSUPPORTED_ERRNOS: Set[int] = {errno.EXDEV, errno.EOPNOTSUPP, errno.ENOTTY, errno.EINVAL, errno.EPERM}
 
 
 def get_parent(path: Path, depth: int = 1) -> Path:
@@ -52,6 +80,285 @@ def copy_dir(src_dir: Path, dst_dir: Path, overwrite: bool = True, extend_dst: b
     return dst_dir
 
 
+def reflink_file(src_file: Path, dst_file: Path) -> None:
+    """
+    Clone a file using a reflink, i.e., the destination shares the data blocks of the source until either is written.
+
+    :param src_file:
+    :param dst_file:
+    :return:
+    """
+    if fcntl is None:
+        raise OSError(errno.EOPNOTSUPP, "Reflinks are not supported on this platform.")
+
+    with open(src_file, "rb") as src, open(dst_file, "wb") as dst:
+        try:
+            fcntl.ioctl(dst.fileno(), FICLONE, src.fileno())
+        except OSError:
+            dst.close()
+            os.unlink(dst_file)
+            raise
+
+    shutil.copystat(src_file, dst_file)
+
+
+def clone_dir(src_dir: Path, dst_dir: Path, exclude: Optional[Iterable[str]] = None, extend_dst: bool = True) -> Path:
+    """
+    Clone the contents of a source to a destination directory as cheaply as possible.
+
+    Files are reflinked (copy-on-write) if the file system supports it, otherwise, they are copied. (Hardlinks are no
+    option: a build writing a file in place would change the source file as well.)
+
+    :param src_dir: Source directory
+    :param dst_dir: Destination directory
+    :param exclude: Glob-style patterns of directory/file names to skip (e.g., VCS directories)
+    :param extend_dst: If true, extend dest. with source dir name, otherwise, no changes
+    :return: Destination directory path
+    """
+    if extend_dst:
+        dst_dir = dst_dir / src_dir.name
+
+    use_reflink = True
+
+    def _clone_file(src_file: str, dst_file: str) -> None:
+        nonlocal use_reflink
+
+        if use_reflink:
+            try:
+                reflink_file(Path(src_file), Path(dst_file))
+                return
+            except OSError as err:
+                if err.errno not in LINK_UNSUPPORTED_ERRNOS:
+                    raise
+
+                use_reflink = False
+
+        shutil.copy2(src_file, dst_file)
+
+    shutil.copytree(
+        src_dir,
+        dst_dir,
+        symlinks=True,
+        ignore=shutil.ignore_patterns(*exclude) if exclude else None,
+        copy_function=_clone_file,
+        dirs_exist_ok=True,
+    )
+
+    return dst_dir
+
+
+def _file_size(file: Path) -> float:
+    return float(file.stat().st_size)
+
+
+def link_files(files: Iterable[Path], src_dir: Path, dst_dir: Path) -> Path:
+    """
+    Hardlink files into a destination directory, keeping their paths relative to the source directory. If hardlinks are
+    not supported (between the source and destination), the files are copied.
+
+    :param files: Files within the source directory
+    :param src_dir: Source directory
+    :param dst_dir: Destination directory
+    :return: Destination directory path
+    """
+    use_hardlink = True
+
+    for file in files:
+        dst_file = dst_dir / file.relative_to(src_dir)
+        dst_file.parent.mkdir(parents=True, exist_ok=True)
+
+        if use_hardlink:
+            try:
+                os.link(file, dst_file)
+                continue
+            except OSError as err:
+                if err.errno not in LINK_UNSUPPORTED_ERRNOS:
+                    raise
+
+                use_hardlink = False
+
+        shutil.copy2(file, dst_file)
+
+    return dst_dir
+
+
+def partition_files(
+    files: Iterable[Path], n_parts: int, cost: Callable[[Path], float] = _file_size
+) -> List[List[Path]]:
+    """
+    Partition files into (at most) n parts of similar total cost. The most costly files are assigned first, each to the
+    currently cheapest part.
+
+    :param files:
+    :param n_parts:
+    :param cost: Cost of a file (default: file size)
+    :return: Non-empty parts
+    """
+    parts: List[List[Path]] = [[] for _ in range(max(1, n_parts))]
+
+    # Heap of (total cost, part index)
+    costs = [(0.0, i) for i in range(len(parts))]
+
+    for file_cost, file in sorted(((cost(file), file) for file in files), reverse=True):
+        part_cost, i = heapq.heappop(costs)
+
+        parts[i].append(file)
+        heapq.heappush(costs, (part_cost + file_cost, i))
+
+    return [part for part in parts if len(part) > 0]
+
+
+def sync_dir(src_dir: Path, dst_dir: Path, exclude: Optional[Iterable[str]] = None) -> Path:
+    """
+    Incrementally synchronize a destination with a source directory. Only new or changed files (size or modification
+    time differ) are copied, preserving their modification times, so that build tools like make only rebuild what
+    depends on them. Files removed from the source are removed from the destination, while files created in the
+    destination (e.g., build outputs) are kept.
+
+    :param src_dir: Source directory
+    :param dst_dir: Destination directory
+    :param exclude: Glob-style patterns of directory/file names to skip (e.g., VCS directories)
+    :return: Destination directory path
+    """
+    patterns = [*(exclude or []), SYNC_MANIFEST_NAME]
+
+    def _is_excluded(name: str) -> bool:
+        return any(fnmatch.fnmatch(name, pattern) for pattern in patterns)
+
+    manifest_file = dst_dir / SYNC_MANIFEST_NAME
+
+    try:
+        prev_synced = set(json.loads(manifest_file.read_text()))
+    except (OSError, ValueError):
+        prev_synced = set()
+
+    synced: Set[str] = set()
+
+    for root, dirs, files in walk(src_dir):
+        dirs[:] = [_dir for _dir in dirs if not _is_excluded(_dir)]
+
+        rel_root = Path(root).relative_to(src_dir)
+        (dst_dir / rel_root).mkdir(parents=True, exist_ok=True)
+
+        for file in files:
+            if _is_excluded(file):
+                continue
+
+            src_file = Path(root) / file
+            dst_file = dst_dir / rel_root / file
+
+            synced.add(str(rel_root / file))
+
+            if src_file.is_symlink():
+                if not dst_file.is_symlink() or readlink(dst_file) != readlink(src_file):
+                    dst_file.unlink(missing_ok=True)
+                    os.symlink(readlink(src_file), dst_file)
+
+                continue
+
+            src_stat = src_file.stat()
+
+            try:
+                dst_stat = dst_file.lstat()
+                is_unchanged = dst_stat.st_size == src_stat.st_size and dst_stat.st_mtime_ns == src_stat.st_mtime_ns
+            except FileNotFoundError:
+                is_unchanged = False
+
+            if not is_unchanged:
+                dst_file.unlink(missing_ok=True)
+                shutil.copy2(src_file, dst_file)
+
+    for rel_path in prev_synced - synced:
+        (dst_dir / rel_path).unlink(missing_ok=True)
+
+    manifest_file.write_text(json.dumps(sorted(synced)))
+
+    return dst_dir
+
+
+def remove_stale_dirs(root_dir: Path, max_age: float) -> List[Path]:
+    """
+    Remove the sub-directories that haven't been modified for a given time.
+
+    :param root_dir:
+    :param max_age: Max. age in seconds
+    :return: Removed directories
+    """
+    if not root_dir.exists():
+        return []
+
+    now = time.time()
+    removed = []
+
+    for _dir in root_dir.iterdir():
+        if _dir.is_dir() and now - _dir.stat().st_mtime > max_age:
+            shutil.rmtree(_dir, ignore_errors=True)
+            removed.append(_dir)
+
+    return removed
+
+
+@contextmanager
+def lock_dir(directory: Path) -> Iterator[None]:
+    """
+    Hold an exclusive (advisory) lock on a directory shared between processes, e.g., while a SAST tool works in it.
+
+    :param directory:
+    :return:
+    """
+    if fcntl is None:
+        yield
+        return
+
+    with open(directory / LOCK_FILE_NAME, "a") as lock_file:
+        fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+
+def wait_for_file(
+    file: Path, timeout: float, is_complete: Optional[Callable[[Path], bool]] = None, poll_interval: float = 0.1
+) -> Path:
+    """
+    Wait until a file (written by another process) is complete. A file is complete if its size and modification time
+    didn't change between two polls and the given check (if any) succeeds. The (possibly expensive) check is only run
+    once per stable file state.
+
+    :param file:
+    :param timeout: Max. waiting time in seconds
+    :param is_complete: Completeness check
+    :param poll_interval: Time between two polls in seconds
+    :return: File path
+    """
+    deadline = time.monotonic() + timeout
+    prev_state = None
+    checked_state = None
+
+    while True:
+        try:
+            file_stat = file.stat()
+            state = (file_stat.st_size, file_stat.st_mtime_ns)
+
+            if state == prev_state and state != checked_state:
+                if is_complete is None or is_complete(file):
+                    return file
+
+                checked_state = state
+
+            prev_state = state
+
+        except FileNotFoundError:
+            prev_state = None
+
+        if time.monotonic() >= deadline:
+            raise TimeoutError(f"File '{file}' is incomplete after {timeout} seconds.")
+
+        time.sleep(poll_interval)
+
+
 def find_files(root_dir: Path, exts: Optional[List[str]] = None, rec: bool = True) -> Set[Path]:
     """
     Search for files in a directory.
@@ -70,3 +377,49 @@ def find_files(root_dir: Path, exts: Optional[List[str]] = None, rec: bool = Tru
             break
 
     return files
+
+
+def hash_file(file: Path) -> str:
+    """
+    Compute the content hash of a file.
+
+    :param file:
+    :return: Hex digest
+    """
+    digest = hashlib.blake2b(digest_size=32)
+
+    with file.open("rb") as _file:
+        for chunk in iter(lambda: _file.read(1 << 20), b""):
+            digest.update(chunk)
+
+    return digest.hexdigest()
+
+
+def hash_dir(root_dir: Path, exclude: Optional[Iterable[str]] = None) -> str:
+    """
+    Compute the content hash of a directory tree (relative file paths + file contents).
+
+    :param root_dir: Directory to hash
+    :param exclude: Names of directories/files to skip (at any depth)
+    :return: Hex digest
+    """
+    excluded = set(exclude or [])
+    digest = hashlib.blake2b(digest_size=32)
+
+    for root, dirs, files in walk(root_dir):
+        dirs[:] = sorted(_dir for _dir in dirs if _dir not in excluded)
+
+        for file in sorted(_file for _file in files if _file not in excluded):
+            path = Path(root) / file
+
+            digest.update(str(path.relative_to(root_dir)).encode())
+            digest.update(b"\0")
+
+            if path.is_symlink():
+                digest.update(readlink(path).encode())
+            else:
+                digest.update(hash_file(path).encode())
+
+            digest.update(b"\0")
+
+    return digest.hexdigest()
@@ -0,0 +1,127 @@
+# Copyright 2023-2024 Chair for Software & Systems Engineering, TUM
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import json
+import os
+import threading
+import time
+from collections import namedtuple
+from pathlib import Path
+from tempfile import NamedTemporaryFile
+from typing import Any, Callable, Dict, Optional
+
+from sfa.utils.proc import track_usage
+
+# Weight of the latest run in the (exponential moving) average of the recorded runs
+LATEST_RUN_WEIGHT: float = 0.5
+
+# Recorded resource usage of a task (wall time in seconds, peak resident set size in MB)
+TaskUsage = namedtuple("TaskUsage", ["wall_time", "peak_rss"])
+
+
+class RunHistory:
+    """
+    Local store of the resource usage of previous task runs (per subject), used to estimate the usage of the next run.
+    """
+
+    def __init__(self, file: Path) -> None:
+        self._file = file
+        self._lock = threading.Lock()
+
+        self._data: Dict[str, Dict[str, Dict[str, float]]] = {}
+
+        if file.exists():
+            try:
+                self._data = json.loads(file.read_text())
+            except (OSError, ValueError):
+                self._data = {}
+
+    def record(self, subject: str, task: str, usage: TaskUsage) -> None:
+        """
+        Record the resource usage of a task run.
+
+        :param subject:
+        :param task:
+        :param usage:
+        :return:
+        """
+        with self._lock:
+            tasks = self._data.setdefault(subject, {})
+            entry: Dict[str, float] = tasks.get(task) or usage._asdict()
+
+            tasks[task] = {
+                field: LATEST_RUN_WEIGHT * value + (1 - LATEST_RUN_WEIGHT) * entry[field]
+                for field, value in usage._asdict().items()
+            }
+
+    def estimate(self, subject: str, task: str) -> Optional[TaskUsage]:
+        """
+        Estimate the resource usage of a task run. If the task has not been run on the subject yet, the average usage of
+        the task on the other subjects is taken.
+
+        :param subject:
+        :param task:
+        :return: Estimated usage or None if the task has never been run
+        """
+        with self._lock:
+            entry = self._data.get(subject, {}).get(task)
+
+            if entry is not None:
+                return TaskUsage(entry["wall_time"], entry["peak_rss"])
+
+            entries = [tasks[task] for tasks in self._data.values() if task in tasks]
+
+        if len(entries) == 0:
+            return None
+
+        return TaskUsage(
+            sum(entry["wall_time"] for entry in entries) / len(entries),
+            sum(entry["peak_rss"] for entry in entries) / len(entries),
+        )
+
+    def tracked(self, subject: str, task: str, func: Callable[..., Any]) -> Callable[..., Any]:
+        """
+        Wrap a task function, so that the resource usage of its (successful) runs is recorded.
+
+        :param subject:
+        :param task:
+        :param func:
+        :return:
+        """
+
+        def _func(*args: Any) -> Any:
+            start_time = time.monotonic()
+
+            with track_usage() as usage:
+                result = func(*args)
+
+            self.record(subject, task, TaskUsage(time.monotonic() - start_time, usage.peak_rss / 1024))
+
+            return result
+
+        return _func
+
+    def save(self) -> None:
+        """
+        Write the history into its file (atomically).
+
+        :return:
+        """
+        self._file.parent.mkdir(parents=True, exist_ok=True)
+
+        with self._lock:
+            with NamedTemporaryFile("w", dir=self._file.parent, prefix=".", delete=False) as temp_file:
+                json.dump(self._data, temp_file, indent=2)
+
+        os.replace(temp_file.name, self._file)
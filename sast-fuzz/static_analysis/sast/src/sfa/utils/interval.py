@@ -0,0 +1,200 @@
+# Copyright 2023-2024 Chair for Software & Systems Engineering, TUM
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import heapq
+from bisect import bisect_right
+from collections import defaultdict
+from typing import Any, Dict, Generic, Iterable, List, Optional, Set, Tuple, TypeVar
+
+# Type of the values attached to the intervals
+T = TypeVar("T")
+
+
+class IntervalIndex(Generic[T]):
+    """
+    Per-file index over closed line intervals with first-match lookup semantics.
+
+    A lookup returns the value of the *first inserted* interval (of the file) that contains the line, i.e., the same
+    result as a linear scan over the intervals in insertion order with a 'break' on the first match. To achieve this
+    for overlapping intervals, the line axis of each file is split into elementary segments, each of which is assigned
+    its first-matching interval. A lookup is a single bisection over the segments.
+    """
+
+    def __init__(self, items: Iterable[Tuple[str, int, int, T]]) -> None:
+        intervals: Dict[str, List[Tuple[int, int, int, T]]] = defaultdict(list)
+
+        for order, (file, start, end, value) in enumerate(items):
+            if start <= end:
+                intervals[file].append((start, end, order, value))
+
+        for file_intervals in intervals.values():
+            file_intervals.sort(key=lambda interval: interval[0])
+
+        self._segments: Dict[str, Tuple[List[int], List[Optional[T]]]] = {
+            file: self._build_segments(file_intervals) for file, file_intervals in intervals.items()
+        }
+
+        self._intervals = dict(intervals)
+        self._starts = {
+            file: [start for start, _, _, _ in file_intervals] for file, file_intervals in intervals.items()
+        }
+
+    @staticmethod
+    def _build_segments(intervals: List[Tuple[int, int, int, Any]]) -> Tuple[List[int], List[Any]]:
+        """
+        Split the line axis into elementary segments and determine the first-matching interval of each segment.
+
+        :param intervals: Intervals of a single file, sorted by their start line
+        :return:
+        """
+        bounds = sorted({start for start, _, _, _ in intervals} | {end + 1 for _, end, _, _ in intervals})
+
+        seg_starts: List[int] = []
+        seg_values: List[Any] = []
+
+        active: List[Tuple[int, int, Any]] = []
+        i = 0
+
+        for bound in bounds:
+            while i < len(intervals) and intervals[i][0] <= bound:
+                start, end, order, value = intervals[i]
+                heapq.heappush(active, (order, end, value))
+                i += 1
+
+            # Lazily drop the intervals that ended before the current segment
+            while active and active[0][1] < bound:
+                heapq.heappop(active)
+
+            value = active[0][2] if active else None
+
+            # Merge adjacent segments with the same first-matching interval
+            if len(seg_values) == 0 or seg_values[-1] is not value:
+                seg_starts.append(bound)
+                seg_values.append(value)
+
+        return seg_starts, seg_values
+
+    def find(self, file: str, line: int) -> Optional[T]:
+        """
+        Find the value of the first interval containing the code location.
+
+        :param file:
+        :param line:
+        :return: Interval value or None if no interval contains the location
+        """
+        segments = self._segments.get(file)
+
+        if segments is None:
+            return None
+
+        seg_starts, seg_values = segments
+        i = bisect_right(seg_starts, line) - 1
+
+        return None if i < 0 else seg_values[i]
+
+    def find_all(self, file: str, line: int) -> List[T]:
+        """
+        Find the values of all intervals containing the code location.
+
+        :param file:
+        :param line:
+        :return: Interval values in insertion order
+        """
+        if file not in self._intervals:
+            return []
+
+        hits = [
+            (order, value)
+            for _, end, order, value in self._intervals[file][: bisect_right(self._starts[file], line)]
+            if line <= end
+        ]
+
+        return [value for _, value in sorted(hits, key=lambda hit: hit[0])]
+
+
+class IntervalSet:
+    """
+    Per-file set of lines given as a union of closed line intervals.
+
+    Overlapping and adjacent intervals are merged, so each file is represented by two sorted arrays of disjoint
+    interval starts and ends.
+    """
+
+    def __init__(self, items: Iterable[Tuple[str, int, int]]) -> None:
+        intervals: Dict[str, List[Tuple[int, int]]] = defaultdict(list)
+
+        for file, start, end in items:
+            if start <= end:
+                intervals[file].append((start, end))
+
+        self._starts: Dict[str, List[int]] = {}
+        self._ends: Dict[str, List[int]] = {}
+
+        for file, file_intervals in intervals.items():
+            starts: List[int] = []
+            ends: List[int] = []
+
+            for start, end in sorted(file_intervals):
+                if len(ends) > 0 and start <= ends[-1] + 1:
+                    ends[-1] = max(ends[-1], end)
+                else:
+                    starts.append(start)
+                    ends.append(end)
+
+            self._starts[file] = starts
+            self._ends[file] = ends
+
+    def contains(self, file: str, line: int) -> bool:
+        """
+        Check if a code location is covered by the set.
+
+        :param file:
+        :param line:
+        :return:
+        """
+        if file not in self._starts:
+            return False
+
+        i = bisect_right(self._starts[file], line) - 1
+
+        return i >= 0 and line <= self._ends[file][i]
+
+    def contains_all(self, file: str, lines: Iterable[int]) -> Set[int]:
+        """
+        Determine which of the given lines of a file are covered by the set (in a single pass over the file).
+
+        :param file:
+        :param lines:
+        :return: Covered lines
+        """
+        if file not in self._starts:
+            return set()
+
+        starts = self._starts[file]
+        ends = self._ends[file]
+
+        covered = set()
+        i = 0
+
+        for line in sorted(set(lines)):
+            while i < len(ends) and ends[i] < line:
+                i += 1
+
+            if i == len(ends):
+                break
+
+            if starts[i] <= line:
+                covered.add(line)
+
+        return covered
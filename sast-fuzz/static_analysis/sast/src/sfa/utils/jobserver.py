@@ -0,0 +1,296 @@
+# Copyright 2023-2024 Chair for Software & Systems Engineering, TUM
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import fcntl
+import logging
+import math
+import os
+import select
+import struct
+import termios
+import threading
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, Optional, Set, Tuple
+
+# Token written into the jobserver pipe (GNU make accepts any byte)
+JOBSERVER_TOKEN: bytes = b"+"
+
+# Max. waiting time (in seconds) for a jobserver token, before the job runs without a token
+ACQUIRE_TIMEOUT: float = 60.0
+
+
+def available_cores() -> int:
+    """
+    Get the number of CPU cores the process may run on.
+
+    :return:
+    """
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+
+    return os.cpu_count() or 1
+
+
+def available_memory() -> int:
+    """
+    Get the size of the physical memory (in MB).
+
+    :return:
+    """
+    return os.sysconf("SC_PAGE_SIZE") * os.sysconf("SC_PHYS_PAGES") // (1024 * 1024)
+
+
+class Jobserver:
+    """
+    GNU make jobserver, i.e., a pipe holding one token per free job slot. A job reads a token from the pipe before it
+    starts and writes it back once it is done. Make processes (started with the environment of 'make_env') take their
+    tokens from the same pipe, so that they share the job slots with the other token holders.
+    """
+
+    def __init__(self, n_slots: int) -> None:
+        self._read_fd, self._write_fd = os.pipe()
+
+        # The tokens are taken through a file description of their own, which is non-blocking (so that waiting for a
+        # token can time out) without switching the description inherited by the make processes
+        self._acquire_fd = os.open(f"/proc/self/fd/{self._read_fd}", os.O_RDONLY | os.O_NONBLOCK)
+
+        os.write(self._write_fd, JOBSERVER_TOKEN * max(1, n_slots))
+
+    @property
+    def fds(self) -> Tuple[int, int]:
+        """
+        File descriptors of the pipe (to be inherited by the make processes).
+
+        :return:
+        """
+        return self._read_fd, self._write_fd
+
+    def acquire(self, n_tokens: int, timeout: Optional[float] = None) -> int:
+        """
+        Take up to the given number of tokens. Blocks until at least one token is available (or the timeout is over).
+
+        :param n_tokens:
+        :param timeout: Max. waiting time (in seconds)
+        :return: Number of tokens taken (0 if the timeout is over)
+        """
+        while True:
+            try:
+                return len(os.read(self._acquire_fd, max(1, n_tokens)))
+            except BlockingIOError:
+                # Wait until a token is available again
+                readable, _, _ = select.select([self._acquire_fd], [], [], timeout)
+
+                if len(readable) == 0:
+                    return 0
+
+    def available(self) -> int:
+        """
+        Get the number of tokens in the pipe.
+
+        :return:
+        """
+        return struct.unpack("i", fcntl.ioctl(self._acquire_fd, termios.FIONREAD, b"\0" * 4))[0]
+
+    def release(self, n_tokens: int) -> None:
+        """
+        Return tokens.
+
+        :param n_tokens:
+        :return:
+        """
+        if n_tokens > 0:
+            os.write(self._write_fd, JOBSERVER_TOKEN * n_tokens)
+
+    def make_env(self) -> Dict[str, str]:
+        """
+        Get the environment variables pointing GNU make to the jobserver ('--jobserver-fds' is read by make < 4.2).
+
+        :return:
+        """
+        return {
+            "MAKEFLAGS": f"-j --jobserver-fds={self._read_fd},{self._write_fd} --jobserver-auth={self._read_fd},{self._write_fd}"
+        }
+
+    def close(self) -> None:
+        """
+        Close the pipe.
+
+        :return:
+        """
+        os.close(self._acquire_fd)
+        os.close(self._read_fd)
+        os.close(self._write_fd)
+
+
+class CPUBudget:
+    """
+    CPU core budget shared by concurrently running SAST tools. The cores are the tokens of a jobserver: the builds of
+    the tools take their tokens through GNU make, whereas the multi-threaded analyses reserve their fair share of the
+    budget (divided among the active tools) for the lifetime of the tool process. Once a tool is done, its share is
+    divided among the remaining tools.
+
+    Note: Each make process runs one job without a token (as GNU make's top-level process does), i.e., a build always
+    makes progress, even if the budget is exhausted. Likewise, an analysis runs on one core without a token if it waits
+    for a token in vain (see 'ACQUIRE_TIMEOUT').
+
+    A make process that is killed (e.g., when its tool exceeds its limits) doesn't return its tokens. Hence, the tokens
+    are counted whenever no build is running, and the lost tokens are put back into the pipe.
+    """
+
+    def __init__(self, n_cores: int, concurrent: bool = True) -> None:
+        self._n_cores = max(1, n_cores)
+
+        # If the tools run one after another, each tool may use the whole budget
+        self._concurrent = concurrent
+
+        self._jobserver = Jobserver(self._n_cores)
+
+        self._active: Set[str] = set()
+        self._lock = threading.Lock()
+
+        # Tokens reserved by the analyses, number of analyses waiting for tokens, and number of running builds
+        self._n_reserved = 0
+        self._n_acquiring = 0
+        self._n_builds = 0
+
+    def __enter__(self) -> "CPUBudget":
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        self.close()
+
+    @property
+    def n_cores(self) -> int:
+        return self._n_cores
+
+    def register(self, name: str) -> None:
+        """
+        Mark a tool as active.
+
+        :param name:
+        :return:
+        """
+        with self._lock:
+            self._active.add(name)
+
+    def unregister(self, name: str) -> None:
+        """
+        Mark a tool as done (its share is divided among the remaining tools).
+
+        :param name:
+        :return:
+        """
+        with self._lock:
+            self._active.discard(name)
+
+    def share(self) -> int:
+        """
+        Get the fair share of the budget per active tool.
+
+        :return: Number of cores
+        """
+        if not self._concurrent:
+            return self._n_cores
+
+        with self._lock:
+            return math.ceil(self._n_cores / max(1, len(self._active)))
+
+    @contextmanager
+    def cores(self, max_cores: int) -> Iterator[int]:
+        """
+        Reserve (up to) the fair share of the budget. Blocks until at least one core is available.
+
+        :param max_cores:
+        :return: Number of reserved cores
+        """
+        n_tokens = min(max(1, max_cores), self.share())
+
+        with self._lock:
+            self._n_acquiring += 1
+
+        n_tokens = self._jobserver.acquire(n_tokens, timeout=ACQUIRE_TIMEOUT)
+
+        with self._lock:
+            self._n_acquiring -= 1
+            self._n_reserved += n_tokens
+
+            if n_tokens == 0:
+                logging.warning("CPU budget: No core available in time, running on one core without a token.")
+                self._refill()
+
+        try:
+            yield max(1, n_tokens)
+        finally:
+            with self._lock:
+                self._jobserver.release(n_tokens)
+                self._n_reserved -= n_tokens
+
+    @contextmanager
+    def build(self) -> Iterator[None]:
+        """
+        Mark a build (taking its make jobs from the budget) as running. Once no build is running anymore, the tokens lost
+        by killed make processes are put back.
+
+        :return:
+        """
+        with self._lock:
+            self._n_builds += 1
+
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._n_builds -= 1
+                self._refill()
+
+    def _refill(self) -> None:
+        """
+        Put the lost tokens back into the pipe. Without running builds (and analyses waiting for tokens), each token is
+        either reserved by an analysis or in the pipe (to be called with the lock held).
+
+        :return:
+        """
+        if self._n_builds > 0 or self._n_acquiring > 0:
+            return
+
+        n_lost = self._n_cores - self._n_reserved - self._jobserver.available()
+
+        if n_lost > 0:
+            logging.warning(f"CPU budget: {n_lost} token(s) lost by killed make processes put back.")
+            self._jobserver.release(n_lost)
+
+    @property
+    def make_fds(self) -> Tuple[int, int]:
+        """
+        File descriptors to be inherited by the builds.
+
+        :return:
+        """
+        return self._jobserver.fds
+
+    def make_env(self) -> Dict[str, str]:
+        """
+        Get the environment variables connecting the builds to the budget.
+
+        :return:
+        """
+        return self._jobserver.make_env()
+
+    def close(self) -> None:
+        """
+        Close the jobserver.
+
+        :return:
+        """
+        self._jobserver.close()
@@ -12,23 +12,209 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import asyncio
+import io
 import logging
-import multiprocessing as mp
 import os
+import signal
 import subprocess  # nosec
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from functools import partial
 from pathlib import Path
-from typing import Callable, Dict, List, Optional, Union
+from tempfile import TemporaryFile
+from typing import IO, Any, Awaitable, Callable, Dict, Iterator, List, Optional, Sequence, Tuple, TypeVar, Union
 
+# Result type of a sub-process run
+T = TypeVar("T")
 
-def run_shell_command(
-    cmd: Union[str, List[str]], cwd: Optional[Path] = None, env: Optional[Dict[str, str]] = None
-) -> str:
+# Interval (in seconds) in which a sub-process with resource limits is checked
+LIMIT_POLL_INTERVAL: float = 0.2
+
+# Time (in seconds) a process group has to exit after SIGTERM, before it is killed
+KILL_GRACE_PERIOD: float = 5.0
+
+# Max. size (in bytes) of the error output of a sub-process that is logged (the tail)
+STDERR_MAX_SIZE: int = 64 * 1024
+
+
+class ResourceLimitError(Exception):
+    """
+    A sub-process exceeded its time or memory limit and was killed.
+    """
+
+    def __init__(self, message: str, output: str = "") -> None:
+        super().__init__(message)
+
+        # Output of the sub-process until it was killed
+        self.output = output
+
+
+@dataclass
+class ProcUsage:
+    """
+    Resource usage of the sub-processes run by a thread or task (see 'track_usage').
     """
-    Run command as shell sub-process.
+
+    # Peak resident set size (in KB) of the largest sub-process (including its descendants)
+    peak_rss: int = 0
+
+
+# Usage tracked by the current thread or task (each thread starts without one, each task with the one of its creator)
+_tracked_usage: ContextVar[Optional[ProcUsage]] = ContextVar("tracked_usage", default=None)
+
+
+@contextmanager
+def track_usage() -> Iterator[ProcUsage]:
+    """
+    Track the resource usage of the shell sub-processes run by the current thread (or task).
+
+    :return:
+    """
+    usage = ProcUsage()
+    outer_usage = _tracked_usage.get()
+
+    _tracked_usage.set(usage)
+
+    try:
+        yield usage
+    finally:
+        _tracked_usage.set(outer_usage)
+
+        record_usage(usage)
+
+
+def record_usage(usage: ProcUsage) -> None:
+    """
+    Record resource usage in the usage tracked by the current thread, e.g., the usage of the sub-processes of worker
+    threads (which are not tracked by the current thread themselves).
+
+    :param usage:
+    :return:
+    """
+    tracked_usage = _tracked_usage.get()
+
+    if tracked_usage is not None:
+        tracked_usage.peak_rss = max(tracked_usage.peak_rss, usage.peak_rss)
+
+
+def _exit_code(status: int) -> int:
+    return -os.WTERMSIG(status) if os.WIFSIGNALED(status) else os.WEXITSTATUS(status)
+
+
+def process_group_rss(pgid: int) -> int:
+    """
+    Get the total resident set size of the processes of a process group.
+
+    :param pgid:
+    :return: RSS (in bytes)
+    """
+    rss = 0
+
+    for stat_file in Path("/proc").glob("[0-9]*/stat"):
+        try:
+            # The fields after the command name (which may contain spaces) are separated by spaces
+            fields = stat_file.read_text().rsplit(")", 1)[1].split()
+        except (OSError, IndexError):
+            continue
+
+        if int(fields[2]) == pgid:
+            rss += int(fields[21]) * os.sysconf("SC_PAGE_SIZE")
+
+    return rss
+
+
+def _kill_group(pid: int) -> Tuple[int, Any]:
+    """
+    Terminate the process group of a sub-process (and kill it if it doesn't exit in time).
+
+    :param pid: PID of the sub-process (and process group ID)
+    :return: Exit status and resource usage of the sub-process
+    """
+    try:
+        os.killpg(pid, signal.SIGTERM)
+    except ProcessLookupError:
+        pass
+
+    grace_deadline = time.monotonic() + KILL_GRACE_PERIOD
+
+    while time.monotonic() < grace_deadline:
+        reaped_pid, status, rusage = os.wait4(pid, os.WNOHANG)
+
+        if reaped_pid != 0:
+            break
+
+        time.sleep(LIMIT_POLL_INTERVAL)
+    else:
+        try:
+            os.killpg(pid, signal.SIGKILL)
+        except ProcessLookupError:
+            pass
+
+        _, status, rusage = os.wait4(pid, 0)
+
+    # Kill the descendants that outlived the sub-process
+    try:
+        os.killpg(pid, signal.SIGKILL)
+    except ProcessLookupError:
+        pass
+
+    return status, rusage
+
+
+def _wait(pid: int, timeout: Optional[float], memory_limit: Optional[int]) -> Tuple[int, Any]:
+    """
+    Wait for a sub-process (running in its own process group) and enforce its resource limits.
+
+    :param pid:
+    :param timeout: Max. wall time (in seconds)
+    :param memory_limit: Max. total RSS of the process group (in MB)
+    :return: Exit status and resource usage of the sub-process
+    """
+    if timeout is None and memory_limit is None:
+        _, status, rusage = os.wait4(pid, 0)
+        return status, rusage
+
+    deadline = None if timeout is None else time.monotonic() + timeout
+
+    while True:
+        reaped_pid, status, rusage = os.wait4(pid, os.WNOHANG)
+
+        if reaped_pid != 0:
+            return status, rusage
+
+        if deadline is not None and time.monotonic() > deadline:
+            _kill_group(pid)
+            raise ResourceLimitError(f"Timeout of {timeout:g} seconds exceeded.")
+
+        if memory_limit is not None and process_group_rss(pid) > memory_limit * 1024 * 1024:
+            _kill_group(pid)
+            raise ResourceLimitError(f"Memory limit of {memory_limit} MB exceeded.")
+
+        time.sleep(LIMIT_POLL_INTERVAL)
+
+
+def _spawn(
+    cmd: Union[str, List[str]],
+    cwd: Optional[Path],
+    env: Optional[Dict[str, str]],
+    pass_fds: Sequence[int],
+    stdout_file: IO[bytes],
+    stderr_file: IO[bytes],
+    new_session: bool,
+) -> subprocess.Popen:
+    """
+    Start a shell sub-process writing its output into the given files.
 
     :param cmd:
     :param cwd:
     :param env:
+    :param pass_fds:
+    :param stdout_file:
+    :param stderr_file:
+    :param new_session: If true, the sub-process runs in its own process group (i.e., session)
     :return:
     """
     cmd_str = cmd if type(cmd) is str else " ".join(cmd)
@@ -37,33 +223,414 @@ def run_shell_command(
 
     logging.info(f"Command: {cmd_str}")
 
-    proc_info = subprocess.run(
-        cmd_str, shell=True, cwd=cmd_cwd, env=cmd_env, capture_output=True, text=True, encoding="utf-8"
+    return subprocess.Popen(
+        cmd_str,
+        shell=True,
+        cwd=cmd_cwd,
+        env=cmd_env,
+        pass_fds=pass_fds,
+        stdout=stdout_file,
+        stderr=stderr_file,
+        start_new_session=new_session,
     )  # nosec
 
-    if proc_info.stderr:
-        logging.debug(proc_info.stderr)
 
-    return proc_info.stdout
+def _read_text(file: IO[bytes], errors: str = "strict") -> str:
+    """
+    Read the (UTF-8) output of a sub-process from a file, as in text mode (i.e., with universal newlines).
+
+    :param file:
+    :param errors:
+    :return:
+    """
+    file.seek(0)
+
+    return io.TextIOWrapper(file, encoding="utf-8", errors=errors).read()
+
+
+def _killed(proc: subprocess.Popen, err: ResourceLimitError, stdout_file: Optional[IO[bytes]]) -> ResourceLimitError:
+    """
+    Attach the output of a killed sub-process to its error.
+
+    :param proc:
+    :param err:
+    :param stdout_file: Captured output (None if the output was streamed into a file of the caller)
+    :return:
+    """
+    proc.returncode = -signal.SIGKILL
+
+    if stdout_file is not None:
+        err.output = _read_text(stdout_file, errors="replace")
 
+    logging.warning(f"Command killed: {err}")
 
-def run_with_multiproc(func: Callable, items: List, n_jobs: int = mp.cpu_count() - 1) -> List:
+    return err
+
+
+def _reaped(proc: subprocess.Popen, status: int, rusage: Any, stderr_file: IO[bytes]) -> None:
     """
-    Run a function for each element in an iterable with multi-processing.
+    Record the resource usage of a reaped sub-process and log (the tail of) its error output.
 
-    :param func:
-    :param items:
-    :param n_jobs:
+    :param proc:
+    :param status:
+    :param rusage:
+    :param stderr_file:
     :return:
     """
-    with mp.Pool(n_jobs) as pool:
+    proc.returncode = _exit_code(status)
+
+    usage = _tracked_usage.get()
+
+    if usage is not None:
+        usage.peak_rss = max(usage.peak_rss, rusage.ru_maxrss)
+
+    if not logging.getLogger().isEnabledFor(logging.DEBUG):
+        return
+
+    size = stderr_file.seek(0, os.SEEK_END)
+    stderr_file.seek(max(0, size - STDERR_MAX_SIZE))
+
+    stderr = stderr_file.read().decode("utf-8", errors="replace")
+
+    if stderr:
+        logging.debug(stderr if size <= STDERR_MAX_SIZE else f"[...] {stderr}")
+
+
+def _run_to(
+    cmd: Union[str, List[str]],
+    stdout_file: IO[bytes],
+    cwd: Optional[Path],
+    env: Optional[Dict[str, str]],
+    pass_fds: Sequence[int],
+    timeout: Optional[float],
+    memory_limit: Optional[int],
+) -> None:
+    """
+    Run command as shell sub-process writing its output into the given file (see 'run_shell_command').
+
+    :param cmd:
+    :param stdout_file:
+    :param cwd:
+    :param env:
+    :param pass_fds:
+    :param timeout:
+    :param memory_limit:
+    :return:
+    :raises ResourceLimitError: If a limit is exceeded
+    """
+    # The output is written into files (rather than pipes), so that the sub-process can be reaped with wait4(), which
+    # reports its resource usage
+    with TemporaryFile() as stderr_file:
+        # A sub-process with limits runs in its own process group, so that it can be killed as a whole
+        proc = _spawn(
+            cmd, cwd, env, pass_fds, stdout_file, stderr_file, timeout is not None or memory_limit is not None
+        )
+
+        try:
+            status, rusage = _wait(proc.pid, timeout, memory_limit)
+        except ResourceLimitError as err:
+            raise _killed(proc, err, None)
+
+        _reaped(proc, status, rusage, stderr_file)
+
+
+def run_shell_command(
+    cmd: Union[str, List[str]],
+    cwd: Optional[Path] = None,
+    env: Optional[Dict[str, str]] = None,
+    pass_fds: Sequence[int] = (),
+    timeout: Optional[float] = None,
+    memory_limit: Optional[int] = None,
+) -> str:
+    """
+    Run command as shell sub-process. If a limit is exceeded, the whole process group of the sub-process is killed.
+
+    :param cmd:
+    :param cwd:
+    :param env:
+    :param pass_fds: File descriptors inherited by the sub-process (e.g., of a jobserver)
+    :param timeout: Max. wall time (in seconds)
+    :param memory_limit: Max. total RSS of the sub-process and its descendants (in MB)
+    :return:
+    :raises ResourceLimitError: If a limit is exceeded (the error holds the output until then)
+    """
+    with TemporaryFile() as stdout_file:
+        try:
+            _run_to(cmd, stdout_file, cwd, env, pass_fds, timeout, memory_limit)
+        except ResourceLimitError as err:
+            err.output = _read_text(stdout_file, errors="replace")
+            raise
+
+        return _read_text(stdout_file)
+
+
+def run_shell_command_to_file(
+    cmd: Union[str, List[str]],
+    output_file: Path,
+    cwd: Optional[Path] = None,
+    env: Optional[Dict[str, str]] = None,
+    pass_fds: Sequence[int] = (),
+    timeout: Optional[float] = None,
+    memory_limit: Optional[int] = None,
+) -> Path:
+    """
+    Run command as shell sub-process, streaming its output into a file rather than holding it in memory (see
+    'run_shell_command'). If a limit is exceeded, the file holds the output until then.
+
+    :param cmd:
+    :param output_file:
+    :param cwd:
+    :param env:
+    :param pass_fds:
+    :param timeout: Max. wall time (in seconds)
+    :param memory_limit: Max. total RSS of the sub-process and its descendants (in MB)
+    :return: Output file path
+    :raises ResourceLimitError: If a limit is exceeded
+    """
+    with output_file.open("wb") as stdout_file:
+        _run_to(cmd, stdout_file, cwd, env, pass_fds, timeout, memory_limit)
+
+    return output_file
+
+
+async def _wait_async(pid: int, timeout: Optional[float], memory_limit: Optional[int]) -> Tuple[int, Any]:
+    """
+    Wait for a sub-process (running in its own process group) on the event loop and enforce its resource limits. The
+    exit is awaited through a pidfd (Linux, Python >= 3.9), otherwise, the sub-process is polled. If the waiting task is
+    cancelled, the process group is killed.
+
+    :param pid:
+    :param timeout: Max. wall time (in seconds)
+    :param memory_limit: Max. total RSS of the process group (in MB)
+    :return: Exit status and resource usage of the sub-process
+    """
+    loop = asyncio.get_running_loop()
+    deadline = None if timeout is None else loop.time() + timeout
+
+    exited = asyncio.Event()
+    pidfd = None
+
+    if hasattr(os, "pidfd_open"):
+        try:
+            pidfd = os.pidfd_open(pid)
+            loop.add_reader(pidfd, exited.set)
+        except OSError:
+            pidfd = None
+
+    # Without limits (and with a pidfd), there is nothing to check until the sub-process exits
+    poll_interval = LIMIT_POLL_INTERVAL if deadline is not None or memory_limit is not None else None
+
+    try:
+        while True:
+            reaped_pid, status, rusage = os.wait4(pid, os.WNOHANG)
+
+            if reaped_pid != 0:
+                return status, rusage
+
+            if deadline is not None and loop.time() > deadline:
+                await loop.run_in_executor(None, _kill_group, pid)
+                raise ResourceLimitError(f"Timeout of {timeout:g} seconds exceeded.")
+
+            if memory_limit is not None and process_group_rss(pid) > memory_limit * 1024 * 1024:
+                await loop.run_in_executor(None, _kill_group, pid)
+                raise ResourceLimitError(f"Memory limit of {memory_limit} MB exceeded.")
+
+            if pidfd is None:
+                await asyncio.sleep(LIMIT_POLL_INTERVAL)
+            else:
+                try:
+                    await asyncio.wait_for(exited.wait(), timeout=poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+    except asyncio.CancelledError:
+        try:
+            await loop.run_in_executor(None, _kill_group, pid)
+        except ChildProcessError:
+            # Already reaped (killed for exceeding a limit)
+            pass
+
+        raise
+    finally:
+        if pidfd is not None:
+            loop.remove_reader(pidfd)
+            os.close(pidfd)
+
+
+async def _async_run_to(
+    cmd: Union[str, List[str]],
+    stdout_file: IO[bytes],
+    cwd: Optional[Path],
+    env: Optional[Dict[str, str]],
+    pass_fds: Sequence[int],
+    timeout: Optional[float],
+    memory_limit: Optional[int],
+) -> None:
+    """
+    Run command as shell sub-process on the event loop writing its output into the given file (see
+    'async_run_shell_command').
+
+    :param cmd:
+    :param stdout_file:
+    :param cwd:
+    :param env:
+    :param pass_fds:
+    :param timeout:
+    :param memory_limit:
+    :return:
+    :raises ResourceLimitError: If a limit is exceeded
+    """
+    with TemporaryFile() as stderr_file:
+        proc = _spawn(cmd, cwd, env, pass_fds, stdout_file, stderr_file, True)
+
+        try:
+            status, rusage = await _wait_async(proc.pid, timeout, memory_limit)
+        except ResourceLimitError as err:
+            raise _killed(proc, err, None)
+        except asyncio.CancelledError:
+            proc.returncode = -signal.SIGKILL
+            raise
+
+        _reaped(proc, status, rusage, stderr_file)
+
+
+async def async_run_shell_command(
+    cmd: Union[str, List[str]],
+    cwd: Optional[Path] = None,
+    env: Optional[Dict[str, str]] = None,
+    pass_fds: Sequence[int] = (),
+    timeout: Optional[float] = None,
+    memory_limit: Optional[int] = None,
+    limit: Optional[asyncio.Semaphore] = None,
+) -> str:
+    """
+    Run command as shell sub-process on the event loop (see 'run_shell_command'). The sub-process always runs in its own
+    process group, so that it is killed as a whole if the task is cancelled.
+
+    :param cmd:
+    :param cwd:
+    :param env:
+    :param pass_fds:
+    :param timeout: Max. wall time (in seconds)
+    :param memory_limit: Max. total RSS of the sub-process and its descendants (in MB)
+    :param limit: Semaphore limiting the number of concurrently running sub-processes
+    :return:
+    :raises ResourceLimitError: If a limit is exceeded (the error holds the output until then)
+    """
+    if limit is not None:
+        async with limit:
+            return await async_run_shell_command(cmd, cwd, env, pass_fds, timeout, memory_limit)
+
+    with TemporaryFile() as stdout_file:
+        try:
+            await _async_run_to(cmd, stdout_file, cwd, env, pass_fds, timeout, memory_limit)
+        except ResourceLimitError as err:
+            err.output = _read_text(stdout_file, errors="replace")
+            raise
+
+        return _read_text(stdout_file)
+
+
+async def async_run_shell_command_to_file(
+    cmd: Union[str, List[str]],
+    output_file: Path,
+    cwd: Optional[Path] = None,
+    env: Optional[Dict[str, str]] = None,
+    pass_fds: Sequence[int] = (),
+    timeout: Optional[float] = None,
+    memory_limit: Optional[int] = None,
+    limit: Optional[asyncio.Semaphore] = None,
+) -> Path:
+    """
+    Run command as shell sub-process on the event loop, streaming its output into a file (see
+    'async_run_shell_command' and 'run_shell_command_to_file').
+
+    :param cmd:
+    :param output_file:
+    :param cwd:
+    :param env:
+    :param pass_fds:
+    :param timeout: Max. wall time (in seconds)
+    :param memory_limit: Max. total RSS of the sub-process and its descendants (in MB)
+    :param limit: Semaphore limiting the number of concurrently running sub-processes
+    :return: Output file path
+    :raises ResourceLimitError: If a limit is exceeded
+    """
+    if limit is not None:
+        async with limit:
+            return await async_run_shell_command_to_file(cmd, output_file, cwd, env, pass_fds, timeout, memory_limit)
+
+    with output_file.open("wb") as stdout_file:
+        await _async_run_to(cmd, stdout_file, cwd, env, pass_fds, timeout, memory_limit)
+
+    return output_file
+
+
+def _run_all(runs: Sequence[Callable[..., Awaitable[T]]], max_concurrent: int) -> List[T]:
+    """
+    Run sub-processes concurrently, driven by one event loop. If a run fails (e.g., exceeds a limit), the other runs are
+    cancelled, i.e., their process groups are killed. As the sub-processes run side by side, their peak memory usages
+    add up in the usage tracked by the current thread.
+
+    :param runs: Coroutine functions of the runs (taking the concurrency limit as 'limit' argument)
+    :param max_concurrent: Max. number of concurrently running sub-processes
+    :return: Result of each run
+    """
+    usages = [ProcUsage() for _ in runs]
+
+    async def _tracked_run(run: Callable[..., Awaitable[T]], usage: ProcUsage, limit: asyncio.Semaphore) -> T:
+        # Each task runs in a context of its own, i.e., the usage is tracked per task
+        _tracked_usage.set(usage)
+
+        return await run(limit=limit)
+
+    async def _main() -> List[T]:
+        limit = asyncio.Semaphore(max(1, max_concurrent))
+        tasks = [asyncio.ensure_future(_tracked_run(run, usage, limit)) for run, usage in zip(runs, usages)]
+
         try:
-            res: List = pool.starmap(func, items)
+            return list(await asyncio.gather(*tasks))
+        finally:
+            for task in tasks:
+                task.cancel()
+
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    try:
+        return asyncio.run(_main())
+    finally:
+        record_usage(ProcUsage(sum(usage.peak_rss for usage in usages)))
+
 
-        except TypeError as err:
-            logging.info(err)
+def run_shell_commands(cmds: Sequence[Union[str, List[str]]], max_concurrent: int, **kwargs: Any) -> List[str]:
+    """
+    Run commands as shell sub-processes, driven by one event loop. If a command fails (e.g., exceeds a limit), the
+    other commands are cancelled, i.e., their process groups are killed.
+
+    :param cmds:
+    :param max_concurrent: Max. number of concurrently running sub-processes
+    :param kwargs: Arguments of 'async_run_shell_command' (for all commands)
+    :return: Output of each command
+    """
+    return _run_all([partial(async_run_shell_command, cmd, **kwargs) for cmd in cmds], max_concurrent)
 
-            # Try again with map() ...
-            res = pool.map(func, items)
 
-    return res
+def run_shell_commands_to_files(
+    cmds: Sequence[Union[str, List[str]]], output_files: Sequence[Path], max_concurrent: int, **kwargs: Any
+) -> List[Path]:
+    """
+    Run commands as shell sub-processes, driven by one event loop, streaming the output of each command into a file of
+    its own (see 'run_shell_commands').
+
+    :param cmds:
+    :param output_files:
+    :param max_concurrent: Max. number of concurrently running sub-processes
+    :param kwargs: Arguments of 'async_run_shell_command_to_file' (for all commands)
+    :return: Output file paths
+    """
+    return _run_all(
+        [
+            partial(async_run_shell_command_to_file, cmd, output_file, **kwargs)
+            for cmd, output_file in zip(cmds, output_files)
+        ],
+        max_concurrent,
+    )
@@ -0,0 +1,171 @@
+# Copyright 2023-2024 Chair for Software & Systems Engineering, TUM
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Set
+
+
+@dataclass
+class Task:
+    """
+    Task of a DAG. The function of a task is called with the results of its dependencies (in the given order).
+    """
+
+    name: str
+    func: Callable[..., Any]
+    deps: List[str] = field(default_factory=list)
+
+    # Tasks that have to be done before the task starts (without passing their results)
+    after: List[str] = field(default_factory=list)
+
+    # Limited resource the task occupies while running (e.g., "build")
+    resource: Optional[str] = None
+
+    # Ready tasks with a higher priority are started first
+    priority: float = 0.0
+
+    # Estimated peak memory usage (in MB)
+    memory: float = 0.0
+
+
+class TaskError(Exception):
+    """
+    A dependency of the task failed.
+    """
+
+    pass
+
+
+def prioritize_critical_path(tasks: List[Task], durations: Dict[str, float]) -> None:
+    """
+    Set the priority of each task to the (estimated) length of the longest path from the task to the end of the DAG,
+    so that the tasks on the critical path are started first (longest-processing-time-first scheduling).
+
+    :param tasks:
+    :param durations: Estimated duration of the tasks (by name); unknown tasks are assumed to take no time
+    :return:
+    """
+    successors: Dict[str, List[Task]] = {task.name: [] for task in tasks}
+
+    for task in tasks:
+        for dep in [*task.deps, *task.after]:
+            if dep in successors:
+                successors[dep].append(task)
+
+    path_lengths: Dict[str, float] = {}
+
+    def _path_length(task: Task, visiting: Set[str]) -> float:
+        if task.name not in path_lengths:
+            if task.name in visiting:
+                raise ValueError(f"Cyclic dependencies between tasks: {', '.join(visiting)}")
+
+            visiting.add(task.name)
+            path_lengths[task.name] = durations.get(task.name, 0.0) + max(
+                (_path_length(successor, visiting) for successor in successors[task.name]), default=0.0
+            )
+            visiting.discard(task.name)
+
+        return path_lengths[task.name]
+
+    for task in tasks:
+        task.priority = _path_length(task, set())
+
+
+def run_dag(
+    tasks: List[Task], n_workers: int, limits: Optional[Dict[str, int]] = None, memory_limit: Optional[float] = None
+) -> Dict[str, Any]:
+    """
+    Run the tasks of a DAG on a thread pool. A task is started as soon as its dependencies are done, a worker is idle,
+    its resource is below its limit, and its memory fits into the memory limit. The tasks are meant to wait for
+    external processes mostly, so threads suffice.
+
+    :param tasks:
+    :param n_workers: Max. number of concurrently running tasks
+    :param limits: Max. number of concurrently running tasks per resource
+    :param memory_limit: Max. (estimated) memory usage of the concurrently running tasks (in MB); a task exceeding the
+        limit on its own is run once no other task is running
+    :return: Result of each task (by name), or the raised exception if the task (or one of its dependencies) failed
+    """
+    limits = limits or {}
+    by_name = {task.name: task for task in tasks}
+
+    for task in tasks:
+        for dep in [*task.deps, *task.after]:
+            if dep not in by_name:
+                raise ValueError(f"Unknown dependency '{dep}' of task '{task.name}'.")
+
+    # Stable order: higher priority first, then in the given order
+    pending = sorted(tasks, key=lambda _task: -_task.priority)
+
+    results: Dict[str, Any] = {}
+    running: Dict[Future, Task] = {}
+    in_use: Dict[str, int] = {}
+    memory_in_use = 0.0
+
+    with ThreadPoolExecutor(max_workers=max(1, n_workers)) as executor:
+        while len(pending) > 0 or len(running) > 0:
+            started: Set[str] = set()
+
+            for task in pending:
+                if len(running) >= max(1, n_workers):
+                    break
+
+                if any(dep not in results for dep in [*task.deps, *task.after]):
+                    continue
+
+                failed_deps = [dep for dep in [*task.deps, *task.after] if isinstance(results[dep], BaseException)]
+
+                if len(failed_deps) > 0:
+                    results[task.name] = TaskError(f"Task '{task.name}' skipped, '{failed_deps[0]}' failed.")
+                    started.add(task.name)
+                    continue
+
+                if task.resource is not None:
+                    if in_use.get(task.resource, 0) >= max(1, limits.get(task.resource, n_workers)):
+                        continue
+
+                if memory_limit is not None and len(running) > 0 and memory_in_use + task.memory > memory_limit:
+                    continue
+
+                if task.resource is not None:
+                    in_use[task.resource] = in_use.get(task.resource, 0) + 1
+
+                memory_in_use += task.memory
+
+                running[executor.submit(task.func, *(results[dep] for dep in task.deps))] = task
+                started.add(task.name)
+
+            pending = [task for task in pending if task.name not in started]
+
+            if len(running) == 0:
+                if len(started) == 0 and len(pending) > 0:
+                    raise ValueError(f"Cyclic dependencies between tasks: {', '.join(t.name for t in pending)}")
+
+                continue
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+
+            for future in done:
+                task = running.pop(future)
+
+                if task.resource is not None:
+                    in_use[task.resource] -= 1
+
+                memory_in_use -= task.memory
+
+                exception = future.exception()
+                results[task.name] = exception if exception is not None else future.result()
+
+    return results
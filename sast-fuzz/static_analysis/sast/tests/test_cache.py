@@ -0,0 +1,105 @@
+# Copyright 2023-2024 Chair for Software & Systems Engineering, TUM
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+import unittest
+from pathlib import Path
+from tempfile import TemporaryDirectory
+
+from sfa.utils.cache import FileCache, cache_key
+
+
+class TestFileCache(unittest.TestCase):
+    def setUp(self) -> None:
+        self.temp_dir = TemporaryDirectory()
+
+        self.cache = FileCache(Path(self.temp_dir.name) / "cache", max_size=10)
+
+        self.file = Path(self.temp_dir.name) / "data.txt"
+        self.file.write_text("12345")
+
+    def tearDown(self) -> None:
+        self.temp_dir.cleanup()
+
+    def test_get_miss(self) -> None:
+        # Act + Assert
+        self.assertIsNone(self.cache.get(cache_key("a")))
+
+    def test_put_get(self) -> None:
+        # Arrange
+        key = cache_key("a")
+
+        # Act
+        self.cache.put(key, self.file)
+        actual = self.cache.get(key)
+
+        # Assert
+        self.assertIsNotNone(actual)
+        self.assertEqual("12345", actual.read_text())  # type: ignore
+
+    def test_evict_lru(self) -> None:
+        # Arrange
+        key_a, key_b, key_c = cache_key("a"), cache_key("b"), cache_key("c")
+
+        entry_a = self.cache.put(key_a, self.file)
+        entry_b = self.cache.put(key_b, self.file)
+
+        # Make "a" the least and "b" the most recently used entry
+        os.utime(entry_a, (0, 0))
+        os.utime(entry_b, (1, 1))
+        self.cache.get(key_b)
+
+        # Act
+        self.cache.put(key_c, self.file)
+
+        # Assert
+        self.assertIsNone(self.cache.get(key_a))
+        self.assertIsNotNone(self.cache.get(key_b))
+        self.assertIsNotNone(self.cache.get(key_c))
+
+    def test_put_without_evict(self) -> None:
+        # Arrange
+        keys = [cache_key("a"), cache_key("b"), cache_key("c")]
+
+        # Act
+        for key in keys:
+            self.cache.put(key, self.file, evict=False)
+
+        n_entries = sum(self.cache.get(key) is not None for key in keys)
+        self.cache.evict()
+
+        # Assert
+        self.assertEqual(3, n_entries)
+        self.assertEqual(2, sum(self.cache.get(key) is not None for key in keys))
+
+    def test_clear(self) -> None:
+        # Arrange
+        key = cache_key("a")
+        self.cache.put(key, self.file)
+
+        # Act
+        self.cache.clear()
+
+        # Assert
+        self.assertIsNone(self.cache.get(key))
+
+
+class TestCacheKey(unittest.TestCase):
+    def test_cache_key_separator(self) -> None:
+        # Act + Assert
+        self.assertNotEqual(cache_key("ab", "c"), cache_key("a", "bc"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,74 @@
+# Copyright 2023-2024 Chair for Software & Systems Engineering, TUM
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+import unittest
+from pathlib import Path
+from tempfile import TemporaryDirectory
+
+from sfa.utils.compile_db import intercept_build, to_compilation_database, write_replay_script
+from sfa.utils.proc import run_shell_command
+
+
+class TestCompileDB(unittest.TestCase):
+    def setUp(self) -> None:
+        self.temp_dir = TemporaryDirectory()
+
+        self.build_dir = Path(self.temp_dir.name)
+        (self.build_dir / "src").mkdir()
+        (self.build_dir / "src" / "main.c").write_text("int main() { return 0; }")
+
+        # Use 'echo' as compiler, so that the invocations are visible in the output of the replay script
+        self.env = {**os.environ.copy(), **{"CC": "echo cc", "CXX": "echo c++"}}
+        self.build_cmd = "cd src && $CC --version && $CC -c main.c -o main.o && $CC main.o -o main"
+
+    def tearDown(self) -> None:
+        self.temp_dir.cleanup()
+
+    def test_intercept_build(self) -> None:
+        # Arrange
+        expected = [{"directory": str(self.build_dir / "src"), "arguments": ["echo", "cc", "-c", "main.c", "-o", "main.o"]}]
+
+        # Act
+        actual = intercept_build(self.build_cmd, self.build_dir, self.env)
+
+        # Assert
+        self.assertEqual(expected, actual)
+
+    def test_to_compilation_database(self) -> None:
+        # Arrange
+        calls = intercept_build(self.build_cmd, self.build_dir, self.env)
+
+        # Act
+        actual = to_compilation_database(calls)
+
+        # Assert
+        self.assertEqual(1, len(actual))
+        self.assertEqual("main.c", actual[0]["file"])
+
+    def test_write_replay_script(self) -> None:
+        # Arrange
+        calls = intercept_build(self.build_cmd, self.build_dir, self.env)
+        script_file = self.build_dir / "replay.sh"
+
+        # Act
+        write_replay_script(calls, self.build_dir, script_file)
+        actual = run_shell_command(f"sh {script_file}", cwd=self.build_dir, env={**self.env, **{"CC": "echo"}})
+
+        # Assert
+        self.assertEqual("cc -c main.c -o main.o", actual.strip())
+
+
+if __name__ == "__main__":
+    unittest.main()
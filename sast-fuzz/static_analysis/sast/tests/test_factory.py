@@ -0,0 +1,60 @@
+# Copyright 2023-2024 Chair for Software & Systems Engineering, TUM
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import shutil
+import unittest
+from pathlib import Path
+from tempfile import TemporaryDirectory
+
+from sfa import AppConfig
+from sfa.analysis.factory import SASTFlagGroupingFactory, SASTFlagGroupingMode
+from sfa.analysis.grouping import FunctionGrouping
+
+
+class TestSASTFlagGroupingFactory(unittest.TestCase):
+    def setUp(self) -> None:
+        self.temp_dir = TemporaryDirectory()
+
+        inspec_file = Path(self.temp_dir.name) / "quicksort.json"
+        shutil.copy(Path(__file__).parent / "data" / "sfi" / "quicksort.json", inspec_file)
+
+        app_config = AppConfig.from_yaml(Path(__file__).parent.parent / "config.yml")
+
+        self.factory = SASTFlagGroupingFactory((inspec_file, app_config))
+
+    def tearDown(self) -> None:
+        self.temp_dir.cleanup()
+
+    def test_get_instance_lazy(self) -> None:
+        # Act
+        actual = self.factory.get_instance(SASTFlagGroupingMode.FUNCTION)
+
+        # Assert
+        self.assertIsInstance(actual, FunctionGrouping)
+        self.assertEqual([SASTFlagGroupingMode.FUNCTION], list(self.factory._instances.keys()))
+
+    def test_get_instance_memoized(self) -> None:
+        # Act + Assert
+        self.assertIs(
+            self.factory.get_instance(SASTFlagGroupingMode.BASIC_BLOCK),
+            self.factory.get_instance(SASTFlagGroupingMode.BASIC_BLOCK),
+        )
+
+    def test_get_instance_no_param(self) -> None:
+        # Act + Assert
+        self.assertRaises(KeyError, SASTFlagGroupingFactory(None).get_instance, SASTFlagGroupingMode.FUNCTION)
+
+
+if __name__ == "__main__":
+    unittest.main()
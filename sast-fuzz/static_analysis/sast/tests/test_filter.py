@@ -12,8 +12,10 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import shutil
 import unittest
 from pathlib import Path
+from tempfile import TemporaryDirectory
 
 from sfa.analysis import SASTFlag, SASTFlags
 from sfa.analysis.filter import ReachabilityFilter
@@ -21,9 +23,16 @@ from sfa.analysis.filter import ReachabilityFilter
 
 class TestReachabilityFilter(unittest.TestCase):
     def setUp(self) -> None:
-        inspec_file = Path(__file__).parent / "data" / "sfi" / "quicksort.json"
+        self.temp_dir = TemporaryDirectory()
+
+        inspec_file = Path(self.temp_dir.name) / "quicksort.json"
+        shutil.copy(Path(__file__).parent / "data" / "sfi" / "quicksort.json", inspec_file)
+
         self.filter = ReachabilityFilter(inspec_file)
 
+    def tearDown(self) -> None:
+        self.temp_dir.cleanup()
+
     def test_filter_correct(self) -> None:
         # Arrange
         flags = SASTFlags()
@@ -55,6 +64,20 @@ class TestReachabilityFilter(unittest.TestCase):
         # Assert
         self.assertEqual(expected, actual)
 
+    def test_filter_iter_scope_one_out(self) -> None:
+        # Arrange
+        flag1 = SASTFlag("tool1", "quicksort.c", 29, "-")
+        flag2 = SASTFlag("tool2", "quicksort.c", 39, "-")  # Outside function scope
+        flag3 = SASTFlag("tool3", "quicksort.c", 60, "-")
+
+        expected = [flag1, flag3]
+
+        # Act
+        actual = list(self.filter.filter_iter(iter([flag1, flag2, flag3])))
+
+        # Assert
+        self.assertEqual(expected, actual)
+
     def test_filter_scope_all_out(self) -> None:
         # Arrange
         flag1 = SASTFlag("tool1", "quicksort.c", 11, "-")  # Outside function scope
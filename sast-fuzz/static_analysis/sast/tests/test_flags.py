@@ -17,7 +17,16 @@ import unittest
 from pathlib import Path
 from tempfile import TemporaryDirectory
 
-from sfa.analysis import CSV_SEP, SASTFlag, GroupedSASTFlag, SASTFlags
+from sfa.analysis import (
+    CSV_SEP,
+    ColumnarSASTFlags,
+    GroupedSASTFlag,
+    SASTFlag,
+    SASTFlags,
+    read_flags_csv,
+    unique_flags,
+    write_flags_csv,
+)
 
 
 class TestFlags(unittest.TestCase):
@@ -228,5 +237,160 @@ class TestFlagsGrouped(unittest.TestCase):
             self.assertEqual(expected, actual)
 
 
+class TestFlagsStreaming(unittest.TestCase):
+    def test_read_flags_csv(self) -> None:
+        with TemporaryDirectory() as temp_dir:
+            # Arrange
+            temp_file = Path(temp_dir) / "test.csv"
+            lines = [
+                CSV_SEP.join(["tool1", "file1", "10", "vuln1"]) + os.linesep,
+                "invalid" + os.linesep,
+                CSV_SEP.join(["tool2", "file2", "20", "vuln2", "1", "5", "1", "5", "0.200"]) + os.linesep,
+            ]
+
+            with temp_file.open("w") as file:
+                file.writelines(lines)
+
+            expected = [
+                SASTFlag("tool1", "file1", 10, "vuln1"),
+                GroupedSASTFlag("tool2", "file2", 20, "vuln2", 1, 5, 1, 5, 0.200),
+            ]
+
+            # Act
+            actual = list(read_flags_csv(temp_file))
+
+            # Assert
+            self.assertEqual(expected, actual)
+
+    def test_write_flags_csv(self) -> None:
+        with TemporaryDirectory() as temp_dir:
+            # Arrange
+            temp_file = Path(temp_dir) / "test.csv"
+            expected = [SASTFlag("tool", f"file{i}", i, "vuln") for i in range(25)]
+
+            # Act
+            write_flags_csv(iter(expected), temp_file, chunk_size=10)
+
+            actual = list(read_flags_csv(temp_file))
+
+            # Assert
+            self.assertEqual(expected, actual)
+
+    def test_unique_flags(self) -> None:
+        # Arrange
+        flag1 = SASTFlag("tool1", "file1", 10, "vuln1")
+        flag2 = SASTFlag("tool2", "file2", 20, "vuln2")
+
+        expected = [flag1, flag2]
+
+        # Act
+        actual = list(unique_flags([flag1, flag2, flag1, flag2]))
+
+        # Assert
+        self.assertEqual(expected, actual)
+
+
+class TestColumnarFlags(unittest.TestCase):
+    def setUp(self) -> None:
+        self.flags = ColumnarSASTFlags()
+        self.flags.add(SASTFlag("tool1", "file1", 10, "vuln1"))
+        self.flags.add(GroupedSASTFlag("tool2", "file2", 20, "vuln2", 1, 5, 1, 5, 0.200))
+
+    def test_add_duplicate(self) -> None:
+        # Act
+        self.flags.add(SASTFlag("tool1", "file1", 10, "vuln1"))
+
+        # Assert
+        self.assertEqual(2, len(self.flags))
+
+    def test_update(self) -> None:
+        # Arrange
+        flag3 = SASTFlag("tool3", "file1", 30, "vuln1")
+
+        other = ColumnarSASTFlags([flag3, SASTFlag("tool1", "file1", 10, "vuln1")])
+
+        # Act
+        self.flags.update(other, SASTFlags({flag3}))
+
+        # Assert
+        self.assertIn(flag3, self.flags)
+        self.assertEqual(3, len(self.flags))
+
+    def test_remove(self) -> None:
+        # Arrange
+        flag = SASTFlag("tool1", "file1", 10, "vuln1")
+
+        # Act
+        self.flags.remove(flag)
+
+        # Assert
+        self.assertNotIn(flag, self.flags)
+        self.assertRaises(KeyError, self.flags.remove, flag)
+
+    def test_remove_unknown(self) -> None:
+        # Act + Assert
+        self.assertRaises(KeyError, self.flags.remove, SASTFlag("tool1", "file1", 11, "vuln1"))
+        self.assertRaises(KeyError, self.flags.remove, SASTFlag("tool9", "file1", 10, "vuln1"))
+        self.assertEqual(2, len(self.flags))
+
+    def test_contains(self) -> None:
+        # Act + Assert
+        self.assertIn(GroupedSASTFlag("tool2", "file2", 20, "vuln2", 1, 5, 1, 5, 0.200), self.flags)
+        self.assertNotIn(GroupedSASTFlag("tool2", "file2", 20, "vuln2", 1, 5, 1, 5, 0.300), self.flags)
+        self.assertNotIn(SASTFlag("tool2", "file2", 20, "vuln2"), self.flags)
+
+    def test_add_interleaved(self) -> None:
+        # Act
+        lengths = []
+
+        for i in range(4):
+            self.flags.add(SASTFlag("tool1", "file1", 10 + i % 2, "vuln1"))
+            lengths.append(len(self.flags))
+
+        # Assert
+        self.assertEqual([2, 3, 3, 3], lengths)
+
+    def test_like_sastflags(self) -> None:
+        # Arrange
+        flags = [SASTFlag(f"tool{i % 3}", f"file{i % 7}", i % 50, f"vuln{i % 5}") for i in range(500)]
+
+        expected = SASTFlags({*flags, *self.flags})
+
+        # Act
+        self.flags.update(ColumnarSASTFlags(flags[:250]))
+        self.flags.update(SASTFlags(set(flags[200:])))
+
+        for flag in flags[::25]:
+            expected.remove(flag)
+            self.flags.remove(flag)
+
+        # Assert
+        self.assertEqual(len(expected), len(self.flags))
+        self.assertEqual(set(expected), set(self.flags))
+
+    def test_eq(self) -> None:
+        # Arrange
+        expected = SASTFlags(
+            {SASTFlag("tool1", "file1", 10, "vuln1"), GroupedSASTFlag("tool2", "file2", 20, "vuln2", 1, 5, 1, 5, 0.200)}
+        )
+
+        # Act + Assert
+        self.assertEqual(expected, self.flags)
+        self.assertEqual(self.flags, expected)
+
+    def test_csv(self) -> None:
+        with TemporaryDirectory() as temp_dir:
+            # Arrange
+            temp_file = Path(temp_dir) / "test.csv"
+
+            # Act
+            self.flags.to_csv(temp_file)
+
+            actual = ColumnarSASTFlags.from_csv(temp_file)
+
+            # Assert
+            self.assertEqual(self.flags, actual)
+
+
 if __name__ == "__main__":
     unittest.main()
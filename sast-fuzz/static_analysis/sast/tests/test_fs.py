@@ -12,13 +12,30 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import errno
+import json
+import os
+import threading
+import time
 import unittest
 from pathlib import Path
-from typing import Set
-
-from sfa.utils.fs import copy_dir, find_files
-
 from tempfile import TemporaryDirectory
+from typing import Set
+from unittest.mock import MagicMock, patch
+
+from sfa.utils.fs import (
+    VCS_DIRS,
+    clone_dir,
+    copy_dir,
+    find_files,
+    hash_dir,
+    link_files,
+    lock_dir,
+    partition_files,
+    remove_stale_dirs,
+    sync_dir,
+    wait_for_file,
+)
 
 
 class TestFSUtils(unittest.TestCase):
@@ -82,6 +99,224 @@ class TestFSUtils(unittest.TestCase):
             self.assertTrue(actual.exists())
             self.assertTrue((actual / temp_file.name).exists())
 
+    def test_clone_dir(self) -> None:
+        with TemporaryDirectory() as temp_dir:
+            # Arrange
+            src_dir = Path(temp_dir) / "src"
+            dst_dir = Path(temp_dir) / "dst"
+
+            (src_dir / ".git").mkdir(parents=True)
+            (src_dir / ".git" / "HEAD").write_text("ref: refs/heads/main")
+            (src_dir / "main.c").write_text("int main() { return 0; }")
+            (src_dir / "Makefile").write_text("all:")
+
+            expected = dst_dir / src_dir.name
+
+            # Act
+            actual = clone_dir(src_dir, dst_dir, exclude=VCS_DIRS)
+
+            # Assert
+            self.assertEqual(expected, actual)
+
+            self.assertFalse((actual / ".git").exists())
+            self.assertEqual("int main() { return 0; }", (actual / "main.c").read_text())
+
+    def test_clone_dir_write_in_place(self) -> None:
+        with TemporaryDirectory() as temp_dir:
+            # Arrange
+            src_dir = Path(temp_dir) / "src"
+            src_dir.mkdir()
+
+            (src_dir / "Makefile").write_text("all:")
+
+            # Act
+            dst_dir = clone_dir(src_dir, Path(temp_dir) / "dst")
+            (dst_dir / "Makefile").write_text("all: main")
+
+            # Assert
+            self.assertEqual("all:", (src_dir / "Makefile").read_text())
+
+    @patch("sfa.utils.fs.reflink_file", side_effect=OSError(errno.EOPNOTSUPP, "Operation not supported"))
+    def test_clone_dir_copy(self, _: MagicMock) -> None:
+        with TemporaryDirectory() as temp_dir:
+            # Arrange
+            src_dir = Path(temp_dir) / "src"
+            src_dir.mkdir()
+
+            (src_dir / "main.c").write_text("int main() { return 0; }")
+
+            # Act
+            dst_dir = clone_dir(src_dir, Path(temp_dir) / "dst")
+            (dst_dir / "main.c").write_text("int main() { return 1; }")
+
+            # Assert
+            self.assertEqual("int main() { return 0; }", (src_dir / "main.c").read_text())
+            self.assertFalse((src_dir / "main.c").samefile(dst_dir / "main.c"))
+
+    def test_sync_dir(self) -> None:
+        with TemporaryDirectory() as temp_dir:
+            # Arrange
+            src_dir = Path(temp_dir) / "src"
+            dst_dir = Path(temp_dir) / "dst"
+
+            (src_dir / ".git").mkdir(parents=True)
+            (src_dir / "main.c").write_text("int main() { return 0; }")
+            (src_dir / "util.c").write_text("void f() {}")
+
+            sync_dir(src_dir, dst_dir, exclude=VCS_DIRS)
+
+            (dst_dir / "main.o").write_text("build output")
+            (src_dir / "main.c").write_text("int main() { return 1; }")
+            (src_dir / "util.c").unlink()
+
+            # Act
+            actual = sync_dir(src_dir, dst_dir, exclude=VCS_DIRS)
+
+            # Assert
+            self.assertEqual(dst_dir, actual)
+
+            self.assertFalse((actual / ".git").exists())
+            self.assertFalse((actual / "util.c").exists())
+            self.assertTrue((actual / "main.o").exists())
+            self.assertEqual("int main() { return 1; }", (actual / "main.c").read_text())
+            self.assertEqual((src_dir / "main.c").stat().st_mtime_ns, (actual / "main.c").stat().st_mtime_ns)
+
+    def test_link_files(self) -> None:
+        with TemporaryDirectory() as temp_dir:
+            # Arrange
+            src_dir = Path(temp_dir) / "src"
+            (src_dir / "lib").mkdir(parents=True)
+
+            (src_dir / "main.c").write_text("int main() { return 0; }")
+            (src_dir / "lib" / "util.c").write_text("void f() {}")
+
+            # Act
+            actual = link_files([src_dir / "lib" / "util.c"], src_dir, Path(temp_dir) / "dst")
+
+            # Assert
+            self.assertEqual([Path("lib") / "util.c"], [file.relative_to(actual) for file in actual.rglob("*.c")])
+            self.assertTrue((actual / "lib" / "util.c").samefile(src_dir / "lib" / "util.c"))
+
+    def test_partition_files(self) -> None:
+        with TemporaryDirectory() as temp_dir:
+            # Arrange
+            files = []
+
+            for i, size in enumerate([4, 4, 2, 2, 1, 1]):
+                files.append(Path(temp_dir) / f"{i}.c")
+                files[-1].write_text("x" * size)
+
+            # Act
+            actual = partition_files(files, 2)
+
+            # Assert
+            self.assertEqual([7, 7], [sum(file.stat().st_size for file in part) for part in actual])
+            self.assertEqual(sorted(files), sorted(file for part in actual for file in part))
+
+    def test_partition_files_more_parts_than_files(self) -> None:
+        with TemporaryDirectory() as temp_dir:
+            # Arrange
+            file = Path(temp_dir) / "main.c"
+            file.touch()
+
+            # Act
+            actual = partition_files([file], 4)
+
+            # Assert
+            self.assertEqual([[file]], actual)
+
+    def test_remove_stale_dirs(self) -> None:
+        with TemporaryDirectory() as temp_dir:
+            # Arrange
+            stale_dir = Path(temp_dir) / "stale"
+            fresh_dir = Path(temp_dir) / "fresh"
+
+            stale_dir.mkdir()
+            fresh_dir.mkdir()
+
+            os.utime(stale_dir, (0, 0))
+
+            # Act
+            actual = remove_stale_dirs(Path(temp_dir), max_age=60)
+
+            # Assert
+            self.assertEqual([stale_dir], actual)
+            self.assertFalse(stale_dir.exists())
+            self.assertTrue(fresh_dir.exists())
+
+    def test_lock_dir(self) -> None:
+        with TemporaryDirectory() as temp_dir:
+            # Arrange
+            events = []
+
+            def _lock() -> None:
+                with lock_dir(Path(temp_dir)):
+                    events.append("second")
+
+            # Act
+            with lock_dir(Path(temp_dir)):
+                waiter = threading.Thread(target=_lock)
+                waiter.start()
+
+                time.sleep(0.2)
+                events.append("first")
+
+            waiter.join()
+
+            # Assert
+            self.assertEqual(["first", "second"], events)
+
+    def test_wait_for_file(self) -> None:
+        with TemporaryDirectory() as temp_dir:
+            # Arrange
+            file = Path(temp_dir) / "report.json"
+            file.write_text('[{"line": 1}, ')
+
+            def _is_json_file(_file: Path) -> bool:
+                try:
+                    json.loads(_file.read_text())
+                except ValueError:
+                    return False
+                return True
+
+            writer = threading.Timer(0.2, lambda: file.write_text('[{"line": 1}, {"line": 2}]'))
+            writer.start()
+
+            # Act
+            actual = wait_for_file(file, timeout=5, is_complete=_is_json_file, poll_interval=0.01)
+            writer.join()
+
+            # Assert
+            self.assertEqual([{"line": 1}, {"line": 2}], json.loads(actual.read_text()))
+
+    def test_wait_for_file_stable(self) -> None:
+        with TemporaryDirectory() as temp_dir:
+            # Arrange
+            file = Path(temp_dir) / "report.sarif"
+            file.write_text("{}")
+
+            # Act + Assert
+            self.assertEqual(file, wait_for_file(file, timeout=5, poll_interval=0.01))
+
+    def test_wait_for_file_check_once(self) -> None:
+        with TemporaryDirectory() as temp_dir:
+            # Arrange
+            file = Path(temp_dir) / "report.json"
+            file.write_text("[")
+
+            is_complete = MagicMock(return_value=False)
+
+            # Act
+            self.assertRaises(TimeoutError, wait_for_file, file, 0.2, is_complete, 0.01)
+
+            # Assert
+            is_complete.assert_called_once_with(file)
+
+    def test_wait_for_file_timeout(self) -> None:
+        with TemporaryDirectory() as temp_dir:
+            # Act + Assert
+            self.assertRaises(TimeoutError, wait_for_file, Path(temp_dir) / "missing.json", 0.05, None, 0.01)
+
     def test_find_files_no_rec_no_exts(self) -> None:
         # Arrange
         expected = {self.root_dir / "test.json"}
@@ -142,6 +377,40 @@ class TestFSUtils(unittest.TestCase):
         # Assert
         self.assertEqual(expected, actual)
 
+    def test_hash_dir(self) -> None:
+        with TemporaryDirectory() as temp_dir:
+            # Arrange
+            root_dir = Path(temp_dir)
+
+            (root_dir / "src").mkdir()
+            (root_dir / "src" / "main.c").write_text("int main() { return 0; }")
+
+            expected = hash_dir(root_dir)
+
+            # Act
+            (root_dir / "src" / "main.c").write_text("int main() { return 1; }")
+            actual = hash_dir(root_dir)
+
+            # Assert
+            self.assertNotEqual(expected, actual)
+
+    def test_hash_dir_exclude(self) -> None:
+        with TemporaryDirectory() as temp_dir:
+            # Arrange
+            root_dir = Path(temp_dir)
+
+            (root_dir / "main.c").write_text("int main() { return 0; }")
+
+            expected = hash_dir(root_dir, exclude=VCS_DIRS)
+
+            # Act
+            (root_dir / ".git").mkdir()
+            (root_dir / ".git" / "HEAD").write_text("ref: refs/heads/main")
+            actual = hash_dir(root_dir, exclude=VCS_DIRS)
+
+            # Assert
+            self.assertEqual(expected, actual)
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -12,13 +12,29 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import random
+import shutil
 import unittest
 from pathlib import Path
-from typing import Set, Tuple
+from tempfile import TemporaryDirectory
+from typing import Dict, Iterable, Set, Tuple
 
 from sfa import ScoreWeights
-from sfa.analysis import GroupedSASTFlag, SASTFlag, SASTFlags
-from sfa.analysis.grouping import CONCAT_CHAR, BasicBlockGrouping, BasicBlockV2Grouping, FunctionGrouping
+from sfa.analysis import GroupedSASTFlag, SASTFlag, SASTFlags, div
+from sfa.analysis.grouping import (
+    CONCAT_CHAR,
+    SCORE_PRECISION,
+    BasicBlockGrouping,
+    BasicBlockV2Grouping,
+    FunctionGrouping,
+    GroupScore,
+    Resolution,
+    assign_flags,
+    group_all,
+    group_labels,
+    score_groups,
+)
+from sfa.analysis.inspection import load_inspection
 
 
 def unfold(flags: SASTFlags) -> Set[Tuple]:
@@ -46,11 +62,123 @@ def unfold(flags: SASTFlags) -> Set[Tuple]:
     }
 
 
+def reference_scores(
+    groups: Dict, n_all_lines: Dict, n_all_tools: int, weights: ScoreWeights
+) -> Dict[object, Tuple[int, int, float]]:
+    """
+    Score groups of SAST flags with the per-group loop the grouping modes used before the batch scoring engine.
+
+    :param groups:
+    :param n_all_lines:
+    :param n_all_tools:
+    :param weights:
+    :return:
+    """
+    scores = {}
+
+    for key, flags in groups.items():
+        n_flg_lines = len({flag.line for flag in flags})
+        n_run_tools = len({flag.tool for flag in flags})
+
+        r_flg_lines = div(n_flg_lines, n_all_lines[key])
+        r_run_tools = div(n_run_tools, n_all_tools)
+
+        score = round((weights.flags * r_flg_lines) + (weights.tools * r_run_tools), SCORE_PRECISION)
+
+        scores[key] = (n_flg_lines, n_run_tools, score)
+
+    return scores
+
+
+def random_flags(n_flags: int, seed: int) -> Iterable[SASTFlag]:
+    """
+    Generate SAST flags of several tools spread over the lines of the test subject.
+
+    :param n_flags:
+    :param seed:
+    :return:
+    """
+    rng = random.Random(seed)
+
+    return {
+        SASTFlag(f"tool{rng.randint(1, 6)}", "quicksort.c", rng.randint(1, 120), f"vuln{rng.randint(1, 20)}")
+        for _ in range(n_flags)
+    }
+
+
+class TestScoreGroups(unittest.TestCase):
+    def test_score_groups(self) -> None:
+        # Arrange
+        groups = {
+            "a": {
+                SASTFlag("tool1", "quicksort.c", 67, "vuln1"),
+                SASTFlag("tool2", "quicksort.c", 67, "vuln2"),
+                SASTFlag("tool1", "quicksort.c", 73, "vuln1"),
+            },
+            "b": {SASTFlag("tool3", "quicksort.c", 19, "vuln3")},
+            "c": {SASTFlag("tool3", "quicksort.c", 20, "vuln3")},
+        }
+        n_all_lines = {"a": 8, "b": 4, "c": 0}
+
+        expected = {"a": GroupScore(2, 2, 0.458), "b": GroupScore(1, 1, 0.292), "c": GroupScore(1, 1, 0.167)}
+
+        # Act
+        actual = score_groups(groups, n_all_lines, 3, ScoreWeights(0.5, 0.5))
+
+        # Assert
+        self.assertEqual(expected, actual)
+
+    def test_score_groups_reference(self) -> None:
+        # Arrange
+        model = load_inspection(Path(__file__).parent / "data" / "sfi" / "quicksort.json", use_cache=False)
+        assignment = assign_flags(
+            model, random_flags(5000, seed=42), [Resolution.BASIC_BLOCK, Resolution.FUNCTION_BLOCKS]
+        )
+
+        cases = [
+            (assignment.flags_per_bb, {bb_id: model.basic_blocks[bb_id].n_lines for bb_id in assignment.flags_per_bb}),
+            (
+                assignment.flags_per_func,
+                {func_name: model.functions[func_name].n_lines for func_name in assignment.flags_per_func},
+            ),
+        ]
+
+        for groups, n_all_lines in cases:
+            for weights in [ScoreWeights(0.5, 0.5), ScoreWeights(0.3, 0.7), ScoreWeights(0.1, 0.9)]:
+                # Act
+                actual = score_groups(groups, n_all_lines, assignment.n_tools, weights)
+
+                # Assert
+                self.assertGreater(len(actual), 1)
+                self.assertEqual(
+                    reference_scores(groups, n_all_lines, assignment.n_tools, weights),
+                    {key: tuple(score) for key, score in actual.items()},
+                )
+
+    def test_group_labels(self) -> None:
+        # Arrange
+        flags = {SASTFlag("tool1", "quicksort.c", 67, "vuln1"), SASTFlag("tool2", "quicksort.c", 67, "vuln1")}
+
+        # Act
+        tools, vulns = group_labels(flags)
+
+        # Assert
+        self.assertEqual({"tool1", "tool2"}, set(tools.split(CONCAT_CHAR)))
+        self.assertEqual("vuln1:67", vulns)
+
+
 class TestBasicBlockGrouping(unittest.TestCase):
     def setUp(self) -> None:
-        inspec_file = Path(__file__).parent / "data" / "sfi" / "quicksort.json"
+        self.temp_dir = TemporaryDirectory()
+
+        inspec_file = Path(self.temp_dir.name) / "quicksort.json"
+        shutil.copy(Path(__file__).parent / "data" / "sfi" / "quicksort.json", inspec_file)
+
         self.grouping = BasicBlockGrouping(inspec_file, ScoreWeights(0.5, 0.5))
 
+    def tearDown(self) -> None:
+        self.temp_dir.cleanup()
+
     def test_group_same_bb(self) -> None:
         # Arrange
         flags = SASTFlags()
@@ -190,9 +318,16 @@ class TestBasicBlockGrouping(unittest.TestCase):
 
 class TestBasicBlockV2Grouping(unittest.TestCase):
     def setUp(self) -> None:
-        inspec_file = Path(__file__).parent / "data" / "sfi" / "quicksort.json"
+        self.temp_dir = TemporaryDirectory()
+
+        inspec_file = Path(self.temp_dir.name) / "quicksort.json"
+        shutil.copy(Path(__file__).parent / "data" / "sfi" / "quicksort.json", inspec_file)
+
         self.grouping = BasicBlockV2Grouping(inspec_file, ScoreWeights(0.5, 0.5))
 
+    def tearDown(self) -> None:
+        self.temp_dir.cleanup()
+
     def test_group_same_func(self) -> None:
         # Arrange
         flags = SASTFlags()
@@ -334,9 +469,16 @@ class TestBasicBlockV2Grouping(unittest.TestCase):
 
 class TestFunctionGrouping(unittest.TestCase):
     def setUp(self) -> None:
-        inspec_file = Path(__file__).parent / "data" / "sfi" / "quicksort.json"
+        self.temp_dir = TemporaryDirectory()
+
+        inspec_file = Path(self.temp_dir.name) / "quicksort.json"
+        shutil.copy(Path(__file__).parent / "data" / "sfi" / "quicksort.json", inspec_file)
+
         self.grouping = FunctionGrouping(inspec_file, ScoreWeights(0.5, 0.5))
 
+    def tearDown(self) -> None:
+        self.temp_dir.cleanup()
+
     def test_group_same_func(self) -> None:
         # Arrange
         flags = SASTFlags()
@@ -474,5 +616,40 @@ class TestFunctionGrouping(unittest.TestCase):
         self.assertEqual(unfold(expected), unfold(actual))
 
 
+class TestGroupAll(unittest.TestCase):
+    def setUp(self) -> None:
+        self.temp_dir = TemporaryDirectory()
+
+        self.inspec_file = Path(self.temp_dir.name) / "quicksort.json"
+        shutil.copy(Path(__file__).parent / "data" / "sfi" / "quicksort.json", self.inspec_file)
+
+    def tearDown(self) -> None:
+        self.temp_dir.cleanup()
+
+    def test_group_all(self) -> None:
+        # Arrange
+        inspec_file = self.inspec_file
+        weights = ScoreWeights(0.5, 0.5)
+
+        groupings = [
+            BasicBlockGrouping(inspec_file, weights),
+            BasicBlockV2Grouping(inspec_file, weights),
+            FunctionGrouping(inspec_file, weights),
+        ]
+
+        flags = SASTFlags()
+        flags.add(SASTFlag("tool1", "quicksort.c", 58, "vuln1"))
+        flags.add(SASTFlag("tool2", "quicksort.c", 73, "vuln2"))
+        flags.add(SASTFlag("tool3", "quicksort.c", 60, "vuln3"))
+
+        expected = [unfold(grouping.group(flags)) for grouping in groupings]
+
+        # Act
+        actual = [unfold(grouped_flags) for grouped_flags in group_all(groupings, iter(flags))]
+
+        # Assert
+        self.assertEqual(expected, actual)
+
+
 if __name__ == "__main__":
     unittest.main()
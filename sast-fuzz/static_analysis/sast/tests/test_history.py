@@ -0,0 +1,98 @@
+# Copyright 2023-2024 Chair for Software & Systems Engineering, TUM
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import unittest
+from pathlib import Path
+from tempfile import TemporaryDirectory
+
+from sfa.utils.history import RunHistory, TaskUsage
+from sfa.utils.proc import run_shell_command
+
+
+class TestRunHistory(unittest.TestCase):
+    def setUp(self) -> None:
+        self.temp_dir = TemporaryDirectory()
+
+        self.file = Path(self.temp_dir.name) / "history.json"
+        self.history = RunHistory(self.file)
+
+    def tearDown(self) -> None:
+        self.temp_dir.cleanup()
+
+    def test_estimate_unknown(self) -> None:
+        # Act + Assert
+        self.assertIsNone(self.history.estimate("subject", "InferRunner:analyze"))
+
+    def test_estimate_average(self) -> None:
+        # Arrange
+        self.history.record("subject", "InferRunner:analyze", TaskUsage(10.0, 100.0))
+        self.history.record("subject", "InferRunner:analyze", TaskUsage(20.0, 300.0))
+
+        # Act
+        actual = self.history.estimate("subject", "InferRunner:analyze")
+
+        # Assert
+        self.assertEqual(TaskUsage(15.0, 200.0), actual)
+
+    def test_estimate_other_subjects(self) -> None:
+        # Arrange
+        self.history.record("subject_a", "InferRunner:analyze", TaskUsage(10.0, 100.0))
+        self.history.record("subject_b", "InferRunner:analyze", TaskUsage(30.0, 300.0))
+
+        # Act
+        actual = self.history.estimate("subject_c", "InferRunner:analyze")
+
+        # Assert
+        self.assertEqual(TaskUsage(20.0, 200.0), actual)
+
+    def test_save(self) -> None:
+        # Arrange
+        self.history.record("subject", "InferRunner:analyze", TaskUsage(10.0, 100.0))
+
+        # Act
+        self.history.save()
+        actual = RunHistory(self.file).estimate("subject", "InferRunner:analyze")
+
+        # Assert
+        self.assertEqual(TaskUsage(10.0, 100.0), actual)
+
+    def test_tracked(self) -> None:
+        # Arrange
+        func = self.history.tracked("subject", "task", lambda cmd: run_shell_command(cmd))
+
+        # Act
+        output = func("echo flags")
+        actual = self.history.estimate("subject", "task")
+
+        # Assert
+        self.assertEqual("flags\n", output)
+        self.assertIsNotNone(actual)
+        self.assertGreater(actual.peak_rss, 0)  # type: ignore
+
+    def test_tracked_failure(self) -> None:
+        # Arrange
+        def _fail() -> None:
+            raise ValueError("Analysis failed.")
+
+        func = self.history.tracked("subject", "task", _fail)
+
+        # Act
+        self.assertRaises(ValueError, func)
+
+        # Assert
+        self.assertIsNone(self.history.estimate("subject", "task"))
+
+
+if __name__ == "__main__":
+    unittest.main()
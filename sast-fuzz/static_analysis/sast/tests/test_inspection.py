@@ -0,0 +1,181 @@
+# Copyright 2023-2024 Chair for Software & Systems Engineering, TUM
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+import shutil
+import unittest
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from unittest.mock import MagicMock, patch
+
+from sfa.analysis.inspection import INSPECTION_CACHE_SUFFIX, CodeBlockInfo, InspectionModel, load_inspection
+from sfa.utils.fs import hash_file
+
+
+class TestInspectionModel(unittest.TestCase):
+    def setUp(self) -> None:
+        self.inspec_file = Path(__file__).parent / "data" / "sfi" / "quicksort.json"
+        self.model = InspectionModel.from_json(self.inspec_file)
+
+    def test_functions(self) -> None:
+        # Arrange
+        expected = CodeBlockInfo("quicksort.c", 65, 77, 8)
+
+        # Act
+        actual = self.model.functions["quicksort.c:main"]
+
+        # Assert
+        self.assertEqual(expected, actual)
+
+    def test_basic_blocks(self) -> None:
+        # Arrange
+        expected = CodeBlockInfo("quicksort.c", 58, 59, 2)
+
+        # Act
+        actual = self.model.basic_blocks[13]
+
+        # Assert
+        self.assertEqual(expected, actual)
+
+    def test_function_blocks(self) -> None:
+        # Arrange
+        expected_func = CodeBlockInfo("quicksort.c", 56, 61, 6)
+
+        # Act
+        actual_func, actual_blocks = self.model.function_blocks["quicksort.c:printArray"]
+
+        # Assert
+        self.assertEqual(expected_func, actual_func)
+        self.assertEqual(5, len(actual_blocks))
+
+    def test_reachable_functions(self) -> None:
+        # Act
+        actual = self.model.reachable_functions
+
+        # Assert
+        self.assertIn(CodeBlockInfo("quicksort.c", 65, 77, 8), actual)
+
+    def test_reachable_code(self) -> None:
+        # Act
+        actual = self.model.reachable_code
+
+        # Assert
+        self.assertTrue(actual.contains("quicksort.c", 70))
+        self.assertFalse(actual.contains("quicksort.c", 80))
+
+    def test_icfg(self) -> None:
+        # Act
+        actual = self.model.icfg
+
+        # Assert
+        self.assertEqual([8, 11, 16], actual[16])
+
+
+class TestInspectionCache(unittest.TestCase):
+    def setUp(self) -> None:
+        self.temp_dir = TemporaryDirectory()
+
+        self.inspec_file = Path(self.temp_dir.name) / "quicksort.json"
+        shutil.copy(Path(__file__).parent / "data" / "sfi" / "quicksort.json", self.inspec_file)
+
+        self.cache_file = self.inspec_file.with_name(self.inspec_file.name + INSPECTION_CACHE_SUFFIX)
+
+    def tearDown(self) -> None:
+        self.temp_dir.cleanup()
+
+    def test_roundtrip(self) -> None:
+        # Arrange
+        expected = InspectionModel.from_json(self.inspec_file)
+        expected.to_cache(self.cache_file, self.inspec_file.stat(), bytes.fromhex(hash_file(self.inspec_file)))
+
+        # Act
+        actual = InspectionModel.from_cache(self.cache_file, self.inspec_file.stat())
+
+        # Assert
+        self.assertEqual(expected.functions, actual.functions)
+        self.assertEqual(expected.basic_blocks, actual.basic_blocks)
+        self.assertEqual(expected.function_blocks, actual.function_blocks)
+        self.assertEqual(expected.reachable_functions, actual.reachable_functions)
+        self.assertEqual(expected.icfg, actual.icfg)
+
+    def test_outdated(self) -> None:
+        # Arrange
+        model = InspectionModel.from_json(self.inspec_file)
+        model.to_cache(self.cache_file, self.inspec_file.stat(), bytes.fromhex(hash_file(self.inspec_file)))
+
+        self.inspec_file.write_text(self.inspec_file.read_text().replace('"main"', '"start"'))
+
+        # Act + Assert
+        self.assertRaises(
+            ValueError,
+            InspectionModel.from_cache,
+            self.cache_file,
+            self.inspec_file.stat(),
+            bytes.fromhex(hash_file(self.inspec_file)),
+        )
+
+    @patch("sfa.analysis.inspection.os.replace", side_effect=OSError(28, "No space left on device"))
+    def test_to_cache_failure(self, _: MagicMock) -> None:
+        # Arrange
+        model = InspectionModel.from_json(self.inspec_file)
+
+        # Act
+        self.assertRaises(
+            OSError,
+            model.to_cache,
+            self.cache_file,
+            self.inspec_file.stat(),
+            bytes.fromhex(hash_file(self.inspec_file)),
+        )
+
+        # Assert
+        self.assertEqual([self.inspec_file], list(Path(self.temp_dir.name).iterdir()))
+
+    def test_load_inspection_compiles_cache(self) -> None:
+        # Act
+        model = load_inspection(self.inspec_file)
+
+        # Assert
+        self.assertTrue(self.cache_file.exists())
+        self.assertIn("quicksort.c:main", model.functions)
+
+
+class TestLoadInspection(unittest.TestCase):
+    def test_load_once(self) -> None:
+        # Arrange
+        inspec_file = Path(__file__).parent / "data" / "sfi" / "quicksort.json"
+
+        # Act + Assert
+        self.assertIs(load_inspection(inspec_file, use_cache=False), load_inspection(inspec_file, use_cache=False))
+
+    def test_reload_on_change(self) -> None:
+        with TemporaryDirectory() as temp_dir:
+            # Arrange
+            inspec_file = Path(temp_dir) / "quicksort.json"
+            shutil.copy(Path(__file__).parent / "data" / "sfi" / "quicksort.json", inspec_file)
+
+            model = load_inspection(inspec_file)
+
+            stat = inspec_file.stat()
+            os.utime(inspec_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+            # Act
+            actual = load_inspection(inspec_file)
+
+            # Assert
+            self.assertIsNot(model, actual)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,113 @@
+# Copyright 2023-2024 Chair for Software & Systems Engineering, TUM
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import random
+import unittest
+
+from sfa.utils.interval import IntervalIndex, IntervalSet
+
+
+class TestIntervalIndex(unittest.TestCase):
+    def setUp(self) -> None:
+        self.items = [
+            ("a.c", 10, 20, "outer"),
+            ("a.c", 12, 14, "inner"),  # Shadowed by "outer"
+            ("a.c", 18, 25, "overlap"),
+            ("a.c", 30, 30, "single"),
+            ("b.c", 5, 8, "other"),
+        ]
+        self.index = IntervalIndex(self.items)
+
+    def test_find(self) -> None:
+        # Arrange
+        locations = [("a.c", 9), ("a.c", 10), ("a.c", 13), ("a.c", 20), ("a.c", 21), ("a.c", 30), ("b.c", 8)]
+        expected = [None, "outer", "outer", "outer", "overlap", "single", "other"]
+
+        # Act
+        actual = [self.index.find(file, line) for file, line in locations]
+
+        # Assert
+        self.assertEqual(expected, actual)
+
+    def test_find_unknown_file(self) -> None:
+        # Act + Assert
+        self.assertIsNone(self.index.find("c.c", 10))
+
+    def test_find_all(self) -> None:
+        # Arrange
+        expected = ["outer", "inner"]
+
+        # Act
+        actual = self.index.find_all("a.c", 13)
+
+        # Assert
+        self.assertEqual(expected, actual)
+
+    def test_find_linear_scan(self) -> None:
+        # Arrange
+        rand = random.Random(42)  # nosec
+        items = []
+
+        for i in range(500):
+            start = rand.randint(1, 1000)
+            items.append((rand.choice(["a.c", "b.c"]), start, start + rand.randint(-2, 50), i))
+
+        def linear_scan(file: str, line: int) -> object:
+            for _file, start, end, value in items:
+                if file == _file and start <= line <= end:
+                    return value
+            return None
+
+        locations = [(file, line) for file in ["a.c", "b.c"] for line in range(0, 1060)]
+
+        expected = [linear_scan(file, line) for file, line in locations]
+
+        # Act
+        index = IntervalIndex(items)
+        actual = [index.find(file, line) for file, line in locations]
+
+        # Assert
+        self.assertEqual(expected, actual)
+
+
+class TestIntervalSet(unittest.TestCase):
+    def setUp(self) -> None:
+        self.interval_set = IntervalSet(
+            [("a.c", 10, 20), ("a.c", 15, 25), ("a.c", 26, 30), ("a.c", 40, 45), ("a.c", 50, 49), ("b.c", 1, 2)]
+        )
+
+    def test_contains(self) -> None:
+        # Arrange
+        locations = [("a.c", 9), ("a.c", 10), ("a.c", 26), ("a.c", 31), ("a.c", 45), ("a.c", 50), ("c.c", 1)]
+        expected = [False, True, True, False, True, False, False]
+
+        # Act
+        actual = [self.interval_set.contains(file, line) for file, line in locations]
+
+        # Assert
+        self.assertEqual(expected, actual)
+
+    def test_contains_all(self) -> None:
+        # Arrange
+        expected = {10, 30, 42}
+
+        # Act
+        actual = self.interval_set.contains_all("a.c", [50, 42, 9, 30, 10, 31, 100, 10])
+
+        # Assert
+        self.assertEqual(expected, actual)
+
+
+if __name__ == "__main__":
+    unittest.main()
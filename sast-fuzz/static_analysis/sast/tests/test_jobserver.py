@@ -0,0 +1,179 @@
+# Copyright 2023-2024 Chair for Software & Systems Engineering, TUM
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+import shutil
+import threading
+import unittest
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from unittest.mock import patch
+
+from sfa.utils.jobserver import CPUBudget, Jobserver
+from sfa.utils.proc import ResourceLimitError, run_shell_command
+
+
+class TestJobserver(unittest.TestCase):
+    def setUp(self) -> None:
+        self.jobserver = Jobserver(4)
+
+    def tearDown(self) -> None:
+        self.jobserver.close()
+
+    def test_acquire(self) -> None:
+        # Act
+        n_first = self.jobserver.acquire(3)
+        n_second = self.jobserver.acquire(3)
+
+        # Assert
+        self.assertEqual(3, n_first)
+        self.assertEqual(1, n_second)
+
+    def test_release(self) -> None:
+        # Arrange
+        self.jobserver.acquire(4)
+
+        # Act
+        self.jobserver.release(2)
+        actual = self.jobserver.acquire(4)
+
+        # Assert
+        self.assertEqual(2, actual)
+
+    def test_acquire_non_blocking(self) -> None:
+        # Arrange
+        os.set_blocking(self.jobserver.fds[0], False)
+        self.jobserver.acquire(4)
+
+        timer = threading.Timer(0.1, lambda: self.jobserver.release(1))
+        timer.start()
+
+        # Act
+        actual = self.jobserver.acquire(4)
+
+        # Assert
+        self.assertEqual(1, actual)
+
+    def test_acquire_timeout(self) -> None:
+        # Arrange
+        self.jobserver.acquire(4)
+
+        # Act
+        actual = self.jobserver.acquire(4, timeout=0.1)
+
+        # Assert
+        self.assertEqual(0, actual)
+
+    def test_available(self) -> None:
+        # Arrange
+        self.jobserver.acquire(3)
+
+        # Act + Assert
+        self.assertEqual(1, self.jobserver.available())
+
+
+class TestCPUBudget(unittest.TestCase):
+    def setUp(self) -> None:
+        self.budget = CPUBudget(8)
+
+    def tearDown(self) -> None:
+        self.budget.close()
+
+    def test_share(self) -> None:
+        # Arrange
+        for name in ["a", "b", "c"]:
+            self.budget.register(name)
+
+        # Act + Assert
+        self.assertEqual(3, self.budget.share())
+
+        self.budget.unregister("c")
+        self.assertEqual(4, self.budget.share())
+
+    def test_share_sequential(self) -> None:
+        # Arrange
+        with CPUBudget(8, concurrent=False) as budget:
+            budget.register("a")
+            budget.register("b")
+
+            # Act + Assert
+            self.assertEqual(8, budget.share())
+
+    def test_cores(self) -> None:
+        # Arrange
+        self.budget.register("a")
+        self.budget.register("b")
+
+        # Act
+        with self.budget.cores(2) as n_first, self.budget.cores(8) as n_second:
+            pass
+
+        with self.budget.cores(8) as n_third:
+            pass
+
+        # Assert
+        self.assertEqual(2, n_first)
+        self.assertEqual(4, n_second)
+        self.assertEqual(4, n_third)
+
+    @unittest.skipIf(shutil.which("make") is None, "GNU make is not installed.")
+    def test_make_env(self) -> None:
+        # Arrange
+        with TemporaryDirectory() as temp_dir:
+            (Path(temp_dir) / "Makefile").write_text("all: a b\na:\n\t@echo a\nb:\n\t@echo b\n")
+
+            # Act
+            actual = run_shell_command(
+                "make 2>&1",
+                cwd=Path(temp_dir),
+                env={**os.environ.copy(), **self.budget.make_env()},
+                pass_fds=self.budget.make_fds,
+            )
+
+        # Assert
+        self.assertNotIn("jobserver unavailable", actual)
+        self.assertEqual(["a", "b"], sorted(actual.split()))
+
+        with self.budget.cores(8) as n_cores:
+            self.assertEqual(8, n_cores)
+
+    @unittest.skipIf(shutil.which("make") is None, "GNU make is not installed.")
+    @patch("sfa.utils.proc.KILL_GRACE_PERIOD", 0.5)
+    def test_build_killed(self) -> None:
+        # Arrange
+        with TemporaryDirectory() as temp_dir:
+            (Path(temp_dir) / "Makefile").write_text(
+                "all: " + " ".join(f"job{i}" for i in range(8)) + "\n" + "job%:\n\t@sleep 10\n"
+            )
+
+            # Act
+            with self.budget.build():
+                # Make ignores SIGTERM, i.e., it is killed (with SIGKILL) while holding tokens
+                self.assertRaises(
+                    ResourceLimitError,
+                    run_shell_command,
+                    "trap '' TERM && make",
+                    cwd=Path(temp_dir),
+                    env={**os.environ.copy(), **self.budget.make_env()},
+                    pass_fds=self.budget.make_fds,
+                    timeout=1.0,
+                )
+
+        # Assert
+        with self.budget.cores(8) as n_cores:
+            self.assertEqual(8, n_cores)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -12,19 +12,23 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import asyncio
+import logging
+import time
 import unittest
+from pathlib import Path
+from tempfile import TemporaryDirectory
 
-from sfa.utils.proc import run_shell_command, run_with_multiproc
-
-
-def square(x: int) -> int:
-    """
-    Square a number.
-
-    :param x:
-    :return:
-    """
-    return x**2
+from sfa.utils.proc import (
+    STDERR_MAX_SIZE,
+    ResourceLimitError,
+    async_run_shell_command,
+    run_shell_command,
+    run_shell_command_to_file,
+    run_shell_commands,
+    run_shell_commands_to_files,
+    track_usage,
+)
 
 
 class TestProcUtils(unittest.TestCase):
@@ -39,18 +43,176 @@ class TestProcUtils(unittest.TestCase):
         # Assert
         self.assertEqual(expected, actual)
 
-    def test_run_with_multiproc(self) -> None:
+    def test_track_usage(self) -> None:
         # Arrange
+        cmd = "python3 -c 'buffer = bytearray(64 * 1024 * 1024)'"
+
+        # Act
+        with track_usage() as usage:
+            run_shell_command(cmd)
 
-        vals = [(1,), (2,), (3,), (4,), (5,)]
-        expected = [1, 4, 9, 16, 25]
+        # Assert
+        self.assertGreaterEqual(usage.peak_rss, 64 * 1024)
+
+    def test_run_shell_command_timeout(self) -> None:
+        # Arrange
+        cmd = "echo partial && (sleep 10 &) && sleep 10"
+        start_time = time.monotonic()
 
         # Act
-        actual = run_with_multiproc(square, vals, n_jobs=3)
+        with self.assertRaises(ResourceLimitError) as context:
+            run_shell_command(cmd, timeout=0.5)
+
+        # Assert
+        self.assertEqual("partial\n", context.exception.output)
+        self.assertLess(time.monotonic() - start_time, 5)
+
+    def test_run_shell_command_memory_limit(self) -> None:
+        # Arrange
+        cmd = "python3 -c 'import time; buffer = bytearray(256 * 1024 * 1024); time.sleep(10)'"
+
+        # Act + Assert
+        self.assertRaises(ResourceLimitError, run_shell_command, cmd, memory_limit=64)
+
+    def test_run_shell_command_to_file(self) -> None:
+        # Arrange
+        with TemporaryDirectory() as temp_dir:
+            output_file = Path(temp_dir) / "output.txt"
+
+            # Act
+            actual = run_shell_command_to_file("echo 'Hello, World!' && echo error >&2", output_file)
+
+            # Assert
+            self.assertEqual(output_file, actual)
+            self.assertEqual("Hello, World!\n", output_file.read_text())
+
+    def test_run_shell_command_to_file_timeout(self) -> None:
+        # Arrange
+        with TemporaryDirectory() as temp_dir:
+            output_file = Path(temp_dir) / "output.txt"
+
+            # Act
+            with self.assertRaises(ResourceLimitError):
+                run_shell_command_to_file("echo partial && sleep 10", output_file, timeout=0.5)
+
+            # Assert
+            self.assertEqual("partial\n", output_file.read_text())
+
+    def test_run_shell_command_stderr_tail(self) -> None:
+        # Arrange
+        cmd = f"head -c {2 * STDERR_MAX_SIZE} /dev/zero | tr '\\0' x >&2 && echo end >&2"
+
+        # Act
+        with self.assertLogs(level=logging.DEBUG) as logs:
+            run_shell_command(cmd)
+
+        # Assert
+        stderr = logs.records[-1].getMessage()
+
+        self.assertTrue(stderr.startswith("[...] "))
+        self.assertTrue(stderr.endswith("end\n"))
+        self.assertLessEqual(len(stderr), STDERR_MAX_SIZE + len("[...] "))
+
+    def test_async_run_shell_command(self) -> None:
+        # Arrange
+        cmd = "echo 'Hello, World!'"
+        expected = "Hello, World!\n"
+
+        # Act
+        actual = asyncio.run(async_run_shell_command(cmd))
 
         # Assert
         self.assertEqual(expected, actual)
 
+    def test_async_run_shell_command_track_usage(self) -> None:
+        # Arrange
+        cmd = "python3 -c 'buffer = bytearray(64 * 1024 * 1024)'"
+
+        # Act
+        with track_usage() as usage:
+            asyncio.run(async_run_shell_command(cmd))
+
+        # Assert
+        self.assertGreaterEqual(usage.peak_rss, 64 * 1024)
+
+    def test_async_run_shell_command_timeout(self) -> None:
+        # Arrange
+        cmd = "echo partial && sleep 10"
+
+        # Act
+        with self.assertRaises(ResourceLimitError) as context:
+            asyncio.run(async_run_shell_command(cmd, timeout=0.5))
+
+        # Assert
+        self.assertEqual("partial\n", context.exception.output)
+
+    def test_async_run_shell_command_cancel(self) -> None:
+        # Arrange
+        async def _cancel() -> None:
+            task = asyncio.ensure_future(async_run_shell_command("sleep 10"))
+            await asyncio.sleep(0.2)
+
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+
+        start_time = time.monotonic()
+
+        # Act
+        asyncio.run(_cancel())
+
+        # Assert
+        self.assertLess(time.monotonic() - start_time, 5)
+
+    def test_run_shell_commands(self) -> None:
+        # Arrange
+        cmds = [f"sleep 0.3 && echo {i}" for i in range(4)]
+        start_time = time.monotonic()
+
+        # Act
+        actual = run_shell_commands(cmds, max_concurrent=2)
+
+        # Assert
+        self.assertEqual([f"{i}\n" for i in range(4)], actual)
+
+        # Two rounds of two concurrent commands
+        self.assertGreaterEqual(time.monotonic() - start_time, 0.6)
+        self.assertLess(time.monotonic() - start_time, 1.2)
+
+    def test_run_shell_commands_failure(self) -> None:
+        # Arrange
+        cmds = ["sleep 10", "sleep 10", "echo partial && sleep 10"]
+        start_time = time.monotonic()
+
+        # Act + Assert
+        with self.assertRaises(ResourceLimitError):
+            run_shell_commands(cmds, max_concurrent=3, timeout=0.5)
+
+        self.assertLess(time.monotonic() - start_time, 5)
+
+    def test_run_shell_commands_to_files(self) -> None:
+        with TemporaryDirectory() as temp_dir:
+            # Arrange
+            output_files = [Path(temp_dir) / f"output_{i}.txt" for i in range(3)]
+
+            # Act
+            actual = run_shell_commands_to_files([f"echo {i}" for i in range(3)], output_files, max_concurrent=3)
+
+            # Assert
+            self.assertEqual(output_files, actual)
+            self.assertEqual([f"{i}\n" for i in range(3)], [file.read_text() for file in actual])
+
+    def test_run_shell_commands_track_usage(self) -> None:
+        # Arrange
+        cmds = ["python3 -c 'buffer = bytearray(32 * 1024 * 1024)'"] * 2
+
+        # Act
+        with track_usage() as usage:
+            run_shell_commands(cmds, max_concurrent=2)
+
+        # Assert
+        # The commands run side by side, i.e., their peak memory usages add up
+        self.assertGreaterEqual(usage.peak_rss, 2 * 32 * 1024)
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,186 @@
+# Copyright 2023-2024 Chair for Software & Systems Engineering, TUM
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import threading
+import time
+import unittest
+from typing import List
+
+from sfa.utils.scheduler import Task, TaskError, prioritize_critical_path, run_dag
+
+
+class TestRunDAG(unittest.TestCase):
+    def test_run_dag_deps(self) -> None:
+        # Arrange
+        tasks = [
+            Task("format", lambda output: output.upper(), deps=["analyze"]),
+            Task("analyze", lambda working_dir: f"{working_dir}:flags", deps=["setup"]),
+            Task("setup", lambda: "subject"),
+        ]
+
+        # Act
+        actual = run_dag(tasks, n_workers=2)
+
+        # Assert
+        self.assertEqual("SUBJECT:FLAGS", actual["format"])
+
+    def test_run_dag_failure(self) -> None:
+        # Arrange
+        def _fail() -> None:
+            raise ValueError("Build failed.")
+
+        tasks = [
+            Task("setup", _fail),
+            Task("analyze", lambda _: "flags", deps=["setup"]),
+            Task("other", lambda: "flags"),
+        ]
+
+        # Act
+        actual = run_dag(tasks, n_workers=2)
+
+        # Assert
+        self.assertIsInstance(actual["setup"], ValueError)
+        self.assertIsInstance(actual["analyze"], TaskError)
+        self.assertEqual("flags", actual["other"])
+
+    def test_run_dag_after(self) -> None:
+        # Arrange
+        order: List[str] = []
+
+        tasks = [
+            Task("setup", lambda: order.append("setup"), after=["build"]),
+            Task("build", lambda: order.append("build")),
+        ]
+
+        # Act
+        run_dag(tasks, n_workers=2)
+
+        # Assert
+        self.assertEqual(["build", "setup"], order)
+
+    def test_run_dag_resource_limit(self) -> None:
+        # Arrange
+        lock = threading.Lock()
+        n_running = 0
+        max_running = 0
+
+        def _build() -> None:
+            nonlocal n_running, max_running
+
+            with lock:
+                n_running += 1
+                max_running = max(max_running, n_running)
+
+            time.sleep(0.05)
+
+            with lock:
+                n_running -= 1
+
+        tasks = [Task(f"build-{i}", _build, resource="build") for i in range(4)]
+
+        # Act
+        run_dag(tasks, n_workers=4, limits={"build": 2})
+
+        # Assert
+        self.assertEqual(2, max_running)
+
+    def test_run_dag_priority(self) -> None:
+        # Arrange
+        order: List[str] = []
+
+        tasks = [Task("scan", lambda: order.append("scan")), Task("build", lambda: order.append("build"), priority=1)]
+
+        # Act
+        run_dag(tasks, n_workers=1)
+
+        # Assert
+        self.assertEqual(["build", "scan"], order)
+
+    def test_run_dag_memory_limit_exceeded(self) -> None:
+        # Arrange
+        tasks = [Task("infer", lambda: "flags", memory=16000), Task("semgrep", lambda: "flags", memory=1000)]
+
+        # Act
+        actual = run_dag(tasks, n_workers=2, memory_limit=8000)
+
+        # Assert
+        self.assertEqual({"infer": "flags", "semgrep": "flags"}, actual)
+
+    def test_run_dag_memory_limit_concurrency(self) -> None:
+        # Arrange
+        lock = threading.Lock()
+        n_running = 0
+        max_running = 0
+
+        def _analyze() -> None:
+            nonlocal n_running, max_running
+
+            with lock:
+                n_running += 1
+                max_running = max(max_running, n_running)
+
+            time.sleep(0.05)
+
+            with lock:
+                n_running -= 1
+
+        tasks = [Task(f"analyze-{i}", _analyze, memory=3000) for i in range(4)]
+
+        # Act
+        run_dag(tasks, n_workers=4, memory_limit=8000)
+
+        # Assert
+        self.assertEqual(2, max_running)
+
+    def test_run_dag_cycle(self) -> None:
+        # Arrange
+        tasks = [Task("a", lambda _: None, deps=["b"]), Task("b", lambda _: None, deps=["a"])]
+
+        # Act + Assert
+        self.assertRaises(ValueError, run_dag, tasks, 1)
+
+
+class TestPrioritizeCriticalPath(unittest.TestCase):
+    def test_prioritize_critical_path(self) -> None:
+        # Arrange
+        tasks = [
+            Task("semgrep", lambda: None),
+            Task("codeql:setup", lambda: None, after=["build"]),
+            Task("codeql:analyze", lambda _: None, deps=["codeql:setup"]),
+            Task("build", lambda: None),
+        ]
+        durations = {"semgrep": 30.0, "codeql:setup": 20.0, "codeql:analyze": 60.0, "build": 10.0}
+
+        # Act
+        prioritize_critical_path(tasks, durations)
+
+        # Assert
+        self.assertEqual([30.0, 80.0, 60.0, 90.0], [task.priority for task in tasks])
+
+    def test_prioritize_critical_path_order(self) -> None:
+        # Arrange
+        order: List[str] = []
+
+        tasks = [Task("flawfinder", lambda: order.append("flawfinder")), Task("infer", lambda: order.append("infer"))]
+
+        # Act
+        prioritize_critical_path(tasks, {"flawfinder": 5.0, "infer": 300.0})
+        run_dag(tasks, n_workers=1)
+
+        # Assert
+        self.assertEqual(["infer", "flawfinder"], order)
+
+
+if __name__ == "__main__":
+    unittest.main()
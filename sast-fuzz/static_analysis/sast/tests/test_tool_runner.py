@@ -12,11 +12,39 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import io
+import json
+import shlex
+import sys
+import time
 import unittest
 from pathlib import Path
+from tempfile import TemporaryDirectory
+from typing import ClassVar, List
+from unittest.mock import MagicMock, patch
 
+from sfa import SASTToolConfig
 from sfa.analysis import SASTFlag, SASTFlags
-from sfa.analysis.tool_runner import convert_sarif
+from sfa.analysis.tool_runner import (
+    BUILD_SCRIPT_NAME,
+    REGISTRY_TIMEOUT,
+    SALVAGE_TIMEOUT,
+    AddressSanitizerRunner,
+    CodeQLRunner,
+    PerFileSASTToolRunner,
+    SASTOutput,
+    SASTToolRunner,
+    SemgrepRunner,
+    convert_sarif,
+    load_sarif,
+    merge_sarif,
+    read_output,
+    subject_digest,
+)
+from sfa.utils.cache import FileCache
+from sfa.utils.jobserver import CPUBudget
+from sfa.utils.proc import ResourceLimitError, track_usage
+from sfa.utils.scheduler import run_dag
 
 
 class TestFlagSetSarif(unittest.TestCase):
@@ -35,6 +63,719 @@ class TestFlagSetSarif(unittest.TestCase):
         # Assert
         self.assertEqual(expected, actual)
 
+    def test_convert_sarif_file(self) -> None:
+        # Act
+        actual = convert_sarif(self.sarif_file)
+
+        # Assert
+        self.assertEqual(convert_sarif(self.sarif_file.read_text()), actual)
+
+    def test_load_sarif_empty_file(self) -> None:
+        # Arrange
+        with TemporaryDirectory() as temp_dir:
+            report_file = Path(temp_dir) / "report.sarif"
+            report_file.touch()
+
+            # Act + Assert
+            self.assertRaises(ValueError, load_sarif, report_file)
+
+    def test_merge_sarif(self) -> None:
+        # Arrange
+        string = self.sarif_file.read_text()
+
+        with TemporaryDirectory() as temp_dir:
+            report_file = Path(temp_dir) / "report.sarif"
+
+            # Act
+            actual = merge_sarif([string, string], report_file)
+
+            # Assert
+            self.assertEqual(report_file, actual)
+            self.assertEqual(2, len(json.loads(actual.read_text())["runs"]))
+            self.assertEqual(convert_sarif(string), convert_sarif(actual))
+
+
+class CountingRunner(SASTToolRunner):
+    """
+    Dummy SAST tool runner counting its analysis runs.
+    """
+
+    n_runs = 0
+
+    def _setup(self, temp_dir: Path) -> Path:
+        return self._subject_dir
+
+    def _analyze(self, working_dir: Path) -> str:
+        CountingRunner.n_runs += 1
+        return "dummy,main.c,10,Rule-1"
+
+    def _sanity_checks(self, string: str) -> None:
+        pass
+
+    def _format(self, string: str) -> SASTFlags:
+        tool, file, line, vuln = string.split(",")
+        return SASTFlags({SASTFlag(tool, file, int(line), vuln)})
+
+
+class TestSASTToolRunnerCache(unittest.TestCase):
+    def setUp(self) -> None:
+        self.temp_dir = TemporaryDirectory()
+
+        self.subject_dir = Path(self.temp_dir.name) / "subject"
+        self.subject_dir.mkdir()
+        (self.subject_dir / "main.c").write_text("int main() { return 0; }")
+
+        self.cache = FileCache(Path(self.temp_dir.name) / "cache", max_size=1024 * 1024)
+        self.config = SASTToolConfig("none", "true", ["--check"], 1)
+
+        CountingRunner.n_runs = 0
+
+    def tearDown(self) -> None:
+        self.temp_dir.cleanup()
+
+    def test_run_cache_hit(self) -> None:
+        # Arrange
+        expected = CountingRunner(self.subject_dir, self.config, self.cache).run()
+
+        # Act
+        actual = CountingRunner(self.subject_dir, self.config, self.cache).run()
+
+        # Assert
+        self.assertEqual(expected, actual)
+        self.assertEqual(1, CountingRunner.n_runs)
+
+    def test_run_cache_miss_on_config_change(self) -> None:
+        # Arrange
+        CountingRunner(self.subject_dir, self.config, self.cache).run()
+
+        # Act
+        CountingRunner(self.subject_dir, self.config._replace(checks=["--other-check"]), self.cache).run()
+
+        # Assert
+        self.assertEqual(2, CountingRunner.n_runs)
+
+    def test_tasks(self) -> None:
+        # Arrange
+        expected = CountingRunner(self.subject_dir, self.config).run()
+        tasks = CountingRunner(self.subject_dir, self.config, self.cache).tasks()
+
+        # Act
+        actual = run_dag(tasks, n_workers=1)[tasks[-1].name]
+
+        # Assert
+        self.assertEqual(expected, actual)
+        self.assertEqual(["setup", "analyze", "format"], [task.name.split(":")[1] for task in tasks])
+
+    def test_tasks_cached(self) -> None:
+        # Arrange
+        CountingRunner(self.subject_dir, self.config, self.cache).run()
+
+        # Act
+        actual = CountingRunner(self.subject_dir, self.config, self.cache).tasks()
+
+        # Assert
+        self.assertEqual(1, len(actual))
+
+    @patch.object(CountingRunner, "_tool_version", side_effect=RuntimeError("Command not found"))
+    def test_tasks_missing_tool(self, _: MagicMock) -> None:
+        # Act
+        tasks = CountingRunner(self.subject_dir, self.config, self.cache).tasks()
+
+        # Assert
+        self.assertEqual(1, len(tasks))
+        self.assertIsInstance(run_dag(tasks, n_workers=1)[tasks[-1].name], RuntimeError)
+
+    def test_run_no_cache(self) -> None:
+        # Act
+        CountingRunner(self.subject_dir, self.config).run()
+        CountingRunner(self.subject_dir, self.config).run()
+
+        # Assert
+        self.assertEqual(2, CountingRunner.n_runs)
+
+
+class DatabaseRunner(SASTToolRunner):
+    """
+    Dummy SAST tool runner building a database in its setup phase, which is queried for the configured checks.
+    """
+
+    _keeps_artifact: ClassVar[bool] = True
+
+    builds: ClassVar[bool] = True
+
+    n_setups = 0
+
+    def _version_cmd(self) -> str:
+        return "echo 1.0"
+
+    def _setup(self, temp_dir: Path) -> Path:
+        DatabaseRunner.n_setups += 1
+
+        database_dir = temp_dir / "db"
+        database_dir.mkdir()
+        (database_dir / "facts.csv").write_text("dummy,main.c,10,Rule-1")
+
+        return database_dir
+
+    def _analyze(self, working_dir: Path) -> str:
+        return (working_dir / "facts.csv").read_text()
+
+    def _sanity_checks(self, string: str) -> None:
+        pass
+
+    def _format(self, string: str) -> SASTFlags:
+        tool, file, line, vuln = string.split(",")
+        return SASTFlags({SASTFlag(tool, file, int(line), vuln)})
+
+
+class TestSASTToolRunnerArtifacts(unittest.TestCase):
+    def setUp(self) -> None:
+        self.temp_dir = TemporaryDirectory()
+
+        self.subject_dir = Path(self.temp_dir.name) / "subject"
+        self.subject_dir.mkdir()
+        (self.subject_dir / "main.c").write_text("int main() { return 0; }")
+        (self.subject_dir / BUILD_SCRIPT_NAME).write_text("make")
+
+        self.artifact_root = Path(self.temp_dir.name) / "artifacts"
+        self.config = SASTToolConfig("none", "true", ["--check"], 1)
+
+        DatabaseRunner.n_setups = 0
+        subject_digest.cache_clear()
+
+    def tearDown(self) -> None:
+        self.temp_dir.cleanup()
+
+    def _runner(self, config: SASTToolConfig) -> DatabaseRunner:
+        return DatabaseRunner(self.subject_dir, config, artifact_root=self.artifact_root)
+
+    def test_run_artifact_hit_on_config_change(self) -> None:
+        # Arrange
+        expected = self._runner(self.config).run()
+
+        # Act
+        runner = self._runner(self.config._replace(checks=["--other-check"]))
+        actual = runner.run()
+
+        # Assert
+        self.assertEqual(expected, actual)
+        self.assertEqual(1, DatabaseRunner.n_setups)
+        self.assertFalse(runner.needs_setup())
+
+    def test_run_artifact_miss_on_subject_change(self) -> None:
+        # Arrange
+        self._runner(self.config).run()
+
+        (self.subject_dir / "main.c").write_text("int main() { return 1; }")
+        subject_digest.cache_clear()
+
+        # Act
+        self._runner(self.config).run()
+
+        # Assert
+        self.assertEqual(2, DatabaseRunner.n_setups)
+        self.assertEqual(2, len(list(self.artifact_root.iterdir())))
+
+    def test_tasks_artifact_hit(self) -> None:
+        # Arrange
+        self._runner(self.config).run()
+
+        # Act
+        actual = self._runner(self.config).tasks()
+
+        # Assert
+        self.assertIsNone(actual[0].resource)
+
+    def test_run_no_artifacts(self) -> None:
+        # Act
+        DatabaseRunner(self.subject_dir, self.config).run()
+        DatabaseRunner(self.subject_dir, self.config).run()
+
+        # Assert
+        self.assertEqual(2, DatabaseRunner.n_setups)
+
+
+class HangingRunner(SASTToolRunner):
+    """
+    Dummy SAST tool runner writing a (partial) report and hanging afterwards.
+    """
+
+    def _setup(self, temp_dir: Path) -> Path:
+        try:
+            self._run(f"echo dummy,main.c,10,Rule-1 > {temp_dir / 'report.csv'} && sleep 10")
+        except ResourceLimitError as err:
+            self._salvage(err)
+
+        return temp_dir
+
+    def _analyze(self, working_dir: Path) -> str:
+        return (working_dir / "report.csv").read_text()
+
+    def _sanity_checks(self, string: str) -> None:
+        raise ValueError("Report is incomplete.")
+
+    def _format(self, string: str) -> SASTFlags:
+        tool, file, line, vuln = string.strip().split(",")
+        return SASTFlags({SASTFlag(tool, file, int(line), vuln)})
+
+
+class TestSASTToolRunnerLimits(unittest.TestCase):
+    def setUp(self) -> None:
+        self.temp_dir = TemporaryDirectory()
+
+        self.subject_dir = Path(self.temp_dir.name) / "subject"
+        self.subject_dir.mkdir()
+
+        self.cache = FileCache(Path(self.temp_dir.name) / "cache", max_size=1024 * 1024)
+        self.config = SASTToolConfig("always", "true", [], 1, timeout=0.5)
+
+    def tearDown(self) -> None:
+        self.temp_dir.cleanup()
+
+    def test_run_salvage(self) -> None:
+        # Arrange
+        expected = SASTFlags({SASTFlag("dummy", "main.c", 10, "Rule-1")})
+
+        # Act
+        actual = HangingRunner(self.subject_dir, self.config, self.cache).run()
+
+        # Assert
+        self.assertEqual(expected, actual)
+
+        # Partial results are not cached
+        self.assertEqual(3, len(HangingRunner(self.subject_dir, self.config, self.cache).tasks()))
+
+    def test_run_timeout_exhausted(self) -> None:
+        # Arrange
+        runner = HangingRunner(self.subject_dir, self.config)
+        runner.run()
+
+        # Act + Assert
+        self.assertRaises(ResourceLimitError, runner._run, "true")
+
+    def test_run_concurrently(self) -> None:
+        # Arrange
+        runner = HangingRunner(self.subject_dir, self.config)
+
+        # Act
+        actual = runner._run_concurrently(["echo a", "echo b"])
+
+        # Assert
+        self.assertEqual(["a\n", "b\n"], actual)
+
+    def test_run_concurrently_timeout(self) -> None:
+        # Arrange
+        runner = HangingRunner(self.subject_dir, self.config)
+        start_time = time.monotonic()
+
+        # Act + Assert
+        self.assertRaises(ResourceLimitError, runner._run_concurrently, ["sleep 10", "sleep 10"])
+        self.assertLess(time.monotonic() - start_time, 5)
+
+
+# Script converting the output of 'grep -Hn' into SARIF
+GREP_TO_SARIF_SCRIPT: str = """
+import json, os, sys
+
+results = []
+
+for line in sys.stdin:
+    file, line_no, _ = line.split(":", 2)
+    location = {"artifactLocation": {"uri": os.path.basename(file)}, "region": {"startLine": int(line_no)}}
+    results.append({"ruleId": "gets", "locations": [{"physicalLocation": location}]})
+
+driver = {"name": "grep", "rules": [{"id": "gets", "name": "gets"}]}
+print(json.dumps({"version": "2.1.0", "runs": [{"tool": {"driver": driver}, "results": results}]}))
+"""
+
+
+class GrepRunner(PerFileSASTToolRunner):
+    """
+    Dummy per-file SAST tool runner flagging each line containing 'gets'.
+    """
+
+    analyzed_paths: List[List[Path]] = []
+
+    def _analyze_cmd(self, paths: List[Path], n_threads: int) -> str:
+        GrepRunner.analyzed_paths.append(paths)
+
+        return f"grep -rHn --include='*.c' gets {' '.join(map(str, paths))}"
+
+    def _sanity_checks(self, output: SASTOutput) -> None:
+        pass
+
+    def _format(self, output: SASTOutput) -> SASTFlags:
+        flags = SASTFlags()
+
+        for _line in read_output(output).splitlines():
+            file, line, _ = _line.split(":", 2)
+            flags.add(SASTFlag("grep", Path(file).name, int(line), "gets"))
+
+        return flags
+
+
+class SarifGrepRunner(GrepRunner):
+    """
+    Dummy per-file SAST tool runner flagging each line containing 'gets' (SARIF output).
+    """
+
+    report_files: List[Path] = []
+
+    def _analyze_cmd(self, paths: List[Path], n_threads: int) -> str:
+        return f"{super()._analyze_cmd(paths, n_threads)} | {sys.executable} -c {shlex.quote(GREP_TO_SARIF_SCRIPT)}"
+
+    def _report_file(self, suffix: str = ".sarif") -> Path:
+        report_file = super()._report_file(suffix)
+        SarifGrepRunner.report_files.append(report_file)
+
+        return report_file
+
+    def _format(self, output: SASTOutput) -> SASTFlags:
+        return convert_sarif(output)
+
+
+class TestPerFileSASTToolRunner(unittest.TestCase):
+    def setUp(self) -> None:
+        self.temp_dir = TemporaryDirectory()
+
+        self.subject_dir = Path(self.temp_dir.name) / "subject"
+        (self.subject_dir / "lib").mkdir(parents=True)
+
+        (self.subject_dir / "main.c").write_text("int main() {\n  gets(buf);\n}")
+        (self.subject_dir / "util.c").write_text("void f() {}")
+        (self.subject_dir / "lib" / "util.c").write_text("void g() {}")
+
+        self.cache = FileCache(Path(self.temp_dir.name) / "cache", max_size=1024 * 1024)
+        self.config = SASTToolConfig("none", "true", [], 1)
+
+        GrepRunner.analyzed_paths = []
+        SarifGrepRunner.report_files = []
+
+    def tearDown(self) -> None:
+        self.temp_dir.cleanup()
+
+    def test_tasks_unchanged_deactivate(self) -> None:
+        # Arrange
+        GrepRunner(self.subject_dir, self.config, self.cache).run()
+
+        with CPUBudget(4) as budget:
+            runner = GrepRunner(self.subject_dir, self.config, self.cache, cpu_budget=budget)
+
+            # Act
+            run_dag(runner.tasks(), 1)
+
+            # Assert
+            self.assertEqual(4, budget.share())
+            self.assertEqual(0, len(budget._active))
+
+    def test_run_evicts_once(self) -> None:
+        # Act
+        with patch.object(FileCache, "evict") as evict:
+            GrepRunner(self.subject_dir, self.config, self.cache).run()
+
+        # Assert
+        # Once after storing the manifest of the source files and once after storing the flags of all file groups
+        self.assertEqual(2, evict.call_count)
+
+    def test_run_unchanged(self) -> None:
+        # Arrange
+        expected = GrepRunner(self.subject_dir, self.config, self.cache).run()
+
+        # Act
+        actual = GrepRunner(self.subject_dir, self.config, self.cache).run()
+
+        # Assert
+        self.assertEqual(expected, actual)
+        self.assertEqual([[self.subject_dir]], GrepRunner.analyzed_paths)
+
+    def test_run_changed_file(self) -> None:
+        # Arrange
+        GrepRunner(self.subject_dir, self.config, self.cache).run()
+
+        (self.subject_dir / "lib" / "util.c").write_text("void g() {\n  gets(buf);\n}")
+
+        expected = GrepRunner(self.subject_dir, self.config).run()
+
+        # Act
+        actual = GrepRunner(self.subject_dir, self.config, self.cache).run()
+
+        # Assert
+        self.assertEqual(expected, actual)
+
+        # Files with the same name are re-analyzed together
+        self.assertEqual(
+            [self.subject_dir / "lib" / "util.c", self.subject_dir / "util.c"], GrepRunner.analyzed_paths[-1]
+        )
+
+    @patch("sfa.analysis.tool_runner.MIN_SHARD_FILES", 1)
+    def test_run_sharded(self) -> None:
+        # Arrange
+        expected = SarifGrepRunner(self.subject_dir, self.config).run()
+
+        config = SASTToolConfig("none", "true", [], 2, sharding=True)
+
+        # Act
+        actual = SarifGrepRunner(self.subject_dir, config).run()
+
+        # Assert
+        self.assertEqual({SASTFlag("grep", "main.c", 2, "gets")}, set(expected))
+        self.assertEqual(expected, actual)
+
+        # One tool process per shard, each analyzing a directory of its own
+        self.assertEqual(3, len(GrepRunner.analyzed_paths))
+        self.assertEqual(2, len(set(str(paths[0]) for paths in GrepRunner.analyzed_paths[1:])))
+
+    @patch("sfa.analysis.tool_runner.MIN_SHARD_FILES", 1)
+    def test_run_sharded_track_usage(self) -> None:
+        # Arrange
+        analyze_cmd = SarifGrepRunner._analyze_cmd
+
+        def _analyze_cmd(runner: SarifGrepRunner, paths: List[Path], n_threads: int) -> str:
+            return f"python3 -c 'buffer = bytearray(32 * 1024 * 1024)'; {analyze_cmd(runner, paths, n_threads)}"
+
+        config = SASTToolConfig("none", "true", [], 2, sharding=True)
+
+        # Act
+        with patch.object(SarifGrepRunner, "_analyze_cmd", _analyze_cmd), track_usage() as usage:
+            SarifGrepRunner(self.subject_dir, config).run()
+
+        # Assert
+        self.assertGreaterEqual(usage.peak_rss, 2 * 32 * 1024)
+
+    def test_run_removes_reports(self) -> None:
+        # Arrange
+        runner = SarifGrepRunner(self.subject_dir, self.config)
+
+        # Act
+        runner.run()
+
+        # Assert
+        self.assertIsNone(runner._report_dir)
+        self.assertEqual(1, len(SarifGrepRunner.report_files))
+        self.assertFalse(SarifGrepRunner.report_files[0].exists())
+
+
+class TestCodeQLRunnerSetup(unittest.TestCase):
+    def setUp(self) -> None:
+        self.temp_dir = TemporaryDirectory()
+        self.budget = CPUBudget(4)
+
+        self.runner = CodeQLRunner(
+            Path(self.temp_dir.name), SASTToolConfig("always", "codeql", [], 4), cpu_budget=self.budget
+        )
+
+    def tearDown(self) -> None:
+        self.budget.close()
+        self.temp_dir.cleanup()
+
+    def test_setup(self) -> None:
+        # Arrange
+        cmds = []
+        free_cores = []
+
+        def _run(cmd: str, *args, **kwargs) -> str:
+            cmds.append(cmd)
+            return ""
+
+        def _run_build(cmd: str, *args, **kwargs) -> str:
+            cmds.append(cmd)
+            free_cores.append(self.budget._jobserver.available())
+            return ""
+
+        # Act
+        with patch.object(CodeQLRunner, "_run", side_effect=_run), patch.object(
+            CodeQLRunner, "_run_build", side_effect=_run_build
+        ), patch.object(CodeQLRunner, "_workspace", return_value=Path(self.temp_dir.name)):
+            self.runner._setup(Path(self.temp_dir.name))
+
+        # Assert
+        self.assertEqual(3, len(cmds))
+
+        for cmd, step in zip(cmds, ["database init", "database trace-command", "database finalize --threads=4"]):
+            self.assertIn(step, cmd)
+
+        # The build takes its make jobs from the whole budget
+        self.assertEqual([4], free_cores)
+
+
+class TestCodeQLRunnerBatches(unittest.TestCase):
+    def setUp(self) -> None:
+        self.temp_dir = TemporaryDirectory()
+
+        query_dir = Path(self.temp_dir.name) / "cpp" / "ql" / "src"
+        (query_dir / "Summary").mkdir(parents=True)
+
+        self.checks = [str(query_dir / "Summary" / "LinesOfCode.ql"), str(query_dir / "Summary" / "LinesOfUserCode.ql")]
+
+        for i in range(6):
+            query_file = query_dir / f"Query{i}.ql"
+            query_file.write_text("import semmle.code.cpp.dataflow.TaintTracking" if i == 0 else "import cpp")
+
+            self.checks.append(str(query_file))
+
+        self.runner = CodeQLRunner(
+            Path(self.temp_dir.name), SASTToolConfig("always", "codeql", self.checks, 2, sharding=True)
+        )
+
+    def tearDown(self) -> None:
+        self.temp_dir.cleanup()
+
+    def test_query_batches(self) -> None:
+        # Act
+        actual = self.runner._query_batches(2)
+
+        # Assert
+        self.assertEqual(2, len(actual))
+        self.assertEqual(sorted(self.checks), sorted(check for batch in actual for check in batch))
+
+        # The data-flow query outweighs all local queries
+        self.assertIn([self.checks[2]], actual)
+
+        # The sanity check queries are evaluated in the last batch
+        self.assertEqual(self.checks[:2], actual[-1][-2:])
+
+    def test_query_batches_single(self) -> None:
+        # Act
+        actual = self.runner._query_batches(1)
+
+        # Assert
+        self.assertEqual([[*self.checks[2:], *self.checks[:2]]], actual)
+
+    def test_query_cache_flags(self) -> None:
+        # Arrange
+        prepared_dir = Path(self.temp_dir.name) / "prepared"
+        runner = CodeQLRunner(
+            Path(self.temp_dir.name), SASTToolConfig("always", "echo", self.checks, 1), prepared_dir=prepared_dir
+        )
+
+        # Act
+        unprepared = runner._query_cache_flags()
+        runner._query_cache_dir().mkdir(parents=True)  # type: ignore
+        prepared = runner._query_cache_flags()
+
+        # Assert
+        self.assertEqual("", unprepared)
+        self.assertEqual(f"--compilation-cache={runner._query_cache_dir()} ", prepared)
+
+
+class TestSemgrepRunnerRuleBundle(unittest.TestCase):
+    def setUp(self) -> None:
+        self.temp_dir = TemporaryDirectory()
+
+        self.prepared_dir = Path(self.temp_dir.name) / "prepared"
+        self.config = SASTToolConfig("always", "semgrep", ["r/c.lang.rule-1", "rules/local.yml"], 1)
+
+        self.runner = SemgrepRunner(Path(self.temp_dir.name), self.config, prepared_dir=self.prepared_dir)
+        self.runner._version = "semgrep 1.0.0"
+
+    def tearDown(self) -> None:
+        self.temp_dir.cleanup()
+
+    @patch("sfa.analysis.tool_runner.urllib.request.urlopen")
+    def test_prepare(self, urlopen: MagicMock) -> None:
+        # Arrange
+        urlopen.return_value = io.BytesIO(b"rules:\n- id: rule-1\n")
+
+        # Act
+        self.runner.prepare()
+
+        # Assert
+        urlopen.assert_called_once_with("https://semgrep.dev/c/r/c.lang.rule-1", timeout=REGISTRY_TIMEOUT)
+        self.assertEqual({"rules": [{"id": "rule-1"}]}, json.loads(self.runner._rule_bundle().read_text()))  # type: ignore
+
+    def test_rule_bundle_version(self) -> None:
+        # Arrange
+        rule_bundle = self.runner._rule_bundle()
+
+        # Act
+        self.runner._version = "semgrep 2.0.0"
+
+        # Assert
+        self.assertNotEqual(rule_bundle, self.runner._rule_bundle())
+
+    @patch("sfa.analysis.tool_runner.convert_sarif")
+    def test_format_registry_ids(self, convert: MagicMock) -> None:
+        # Arrange
+        self.prepared_dir.mkdir()
+        self.runner._rule_bundle().write_text(json.dumps({"rules": [{"id": "c.lang.rule-1"}]}))  # type: ignore
+
+        convert.return_value = SASTFlags(
+            {
+                SASTFlag("semgrep", "a.c", 1, "tmp.prepared.c.lang.rule-1"),
+                SASTFlag("semgrep", "a.c", 2, "rules.local-rule"),
+            }
+        )
+
+        # Act
+        flags = self.runner._format("")
+
+        # Assert
+        self.assertEqual(
+            {SASTFlag("semgrep", "a.c", 1, "c.lang.rule-1"), SASTFlag("semgrep", "a.c", 2, "rules.local-rule")},
+            set(flags),
+        )
+
+    def test_analyze_cmd_offline(self) -> None:
+        # Arrange
+        self.prepared_dir.mkdir()
+        self.runner._rule_bundle().write_text("rules: []")  # type: ignore
+
+        # Act
+        cmd = self.runner._analyze_cmd([Path("src")], 1)
+
+        # Assert
+        self.assertIn("--metrics=off", cmd)
+        self.assertIn(f"--config {self.runner._rule_bundle()}", cmd)
+        self.assertIn("--config rules/local.yml", cmd)
+        self.assertNotIn("r/c.lang.rule-1", cmd)
+
+    def test_analyze_cmd_online(self) -> None:
+        # Act
+        actual = self.runner._analyze_cmd([Path("src")], 1)
+
+        # Assert
+        self.assertIn("--config r/c.lang.rule-1", actual)
+
+
+class TestCodeQLRunnerSalvage(unittest.TestCase):
+    @patch("sfa.analysis.tool_runner.run_shell_command", side_effect=ResourceLimitError("Timeout of 300s exceeded."))
+    def test_interpret_partial_results_limited(self, run: MagicMock) -> None:
+        with TemporaryDirectory() as temp_dir:
+            # Arrange
+            database_dir = Path(temp_dir) / "db"
+            (database_dir / "results" / "codeql" / "cpp-queries" / "Security").mkdir(parents=True)
+            (database_dir / "results" / "codeql" / "cpp-queries" / "Security" / "Overflow.bqrs").touch()
+
+            config = SASTToolConfig("always", "codeql", ["/queries/Security/Overflow.ql"], 1, memory_limit=512)
+            runner = CodeQLRunner(Path(temp_dir), config)
+
+            # Act + Assert
+            self.assertRaises(ValueError, runner._interpret_partial_results, database_dir, Path(temp_dir) / "out.sarif")
+
+            self.assertEqual(SALVAGE_TIMEOUT, run.call_args[1]["timeout"])
+            self.assertEqual(512, run.call_args[1]["memory_limit"])
+
+
+class TestSanitizerRunner(unittest.TestCase):
+    def test_workspace_not_warm(self) -> None:
+        with TemporaryDirectory() as temp_dir:
+            # Arrange
+            subject_dir = Path(temp_dir) / "subject"
+            subject_dir.mkdir()
+            (subject_dir / "main.c").write_text("int main() { return 0; }")
+
+            workspace_root = Path(temp_dir) / "workspaces"
+            build_dir = Path(temp_dir) / "build"
+
+            runner = AddressSanitizerRunner(subject_dir, SASTToolConfig(), workspace_root=workspace_root)
+
+            # Act
+            workspace = runner._workspace(build_dir)
+
+            # Assert
+            self.assertEqual(build_dir / subject_dir.name, workspace)
+            self.assertFalse(workspace_root.exists())
+
 
 if __name__ == "__main__":
     unittest.main()